@@ -0,0 +1,97 @@
+"""Latency of the user lookups: ORM statements against prepared ones.
+
+Needs the database from settings with the applied migrations.
+
+    python -m benchmarks.auth_lookup [calls]
+"""
+import asyncio
+import sys
+from time import perf_counter
+from typing import Awaitable, Callable
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.authentication import AuthModel, Principal, auth_crud, principal_crud
+from src.authentication.principal import profile_models
+from src.core.enums import UserType
+from src.db.postgres.database import ASessionMaker, aengine
+from src.main import app  # noqa F401 registers the profile tables
+
+EMAIL = "benchmark@example.com"
+
+
+async def orm_auth(db: AsyncSession) -> None:
+    await auth_crud.get(db, AuthModel.email == EMAIL)
+
+
+async def fast_auth(db: AsyncSession) -> None:
+    await auth_crud.get_by_email(db, EMAIL)
+
+
+async def orm_principal(db: AsyncSession) -> None:
+    # the query of `principal_crud.get` before the prepared statements
+    models = tuple(profile_models.values())
+    stmt = select(AuthModel, *models)
+    for model in models:
+        stmt = stmt.outerjoin(model, model.auth_id == AuthModel.id)
+    stmt = stmt.where(
+        AuthModel.email == EMAIL,
+        AuthModel.is_active == True,  # noqa E712
+    ).limit(1)
+    auth, *profiles = (await db.execute(stmt)).first()
+    Principal(auth, next((p for p in profiles if p is not None), None))
+
+
+async def fast_principal(db: AsyncSession) -> None:
+    await principal_crud.get(db, EMAIL, cached=False)
+
+
+async def measure(
+    lookup: Callable[[AsyncSession], Awaitable[None]],
+    calls: int,
+) -> float:
+    """Get the mean time of the lookup in microseconds."""
+    async with ASessionMaker() as db:
+        for _ in range(100):  # warm up the caches of the connection
+            await lookup(db)
+        start = perf_counter()
+        for _ in range(calls):
+            await lookup(db)
+        return (perf_counter() - start) / calls * 1_000_000
+
+
+async def main(calls: int) -> None:
+    aengine.echo = False
+    async with ASessionMaker() as db:
+        await db.execute(delete(AuthModel).where(AuthModel.email == EMAIL))
+        await db.execute(
+            insert(AuthModel).values(
+                email=EMAIL,
+                password="x",
+                is_active=True,
+                user_type=UserType.PARENT,
+            )
+        )
+        await db.commit()
+
+    try:
+        for name, orm, fast in (
+            ("auth by email", orm_auth, fast_auth),
+            ("principal", orm_principal, fast_principal),
+        ):
+            orm_time = await measure(orm, calls)
+            fast_time = await measure(fast, calls)
+            print(
+                f"{name:<14} orm {orm_time:8.1f} us"
+                f"  prepared {fast_time:8.1f} us"
+                f"  x{orm_time / fast_time:.2f}"
+            )
+    finally:
+        async with ASessionMaker() as db:
+            await db.execute(delete(AuthModel).where(AuthModel.email == EMAIL))
+            await db.commit()
+        await aengine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
@@ -0,0 +1,193 @@
+"""001
+
+Revision ID: cae42bb439b8
+Revises: cdc20c22af6a
+Create Date: 2026-10-17 10:12:31.204518
+
+"""
+import sqlalchemy as sa
+from alembic import op
+from src.core.enums import TableNames
+
+# revision identifiers, used by Alembic.
+revision = "cae42bb439b8"
+down_revision = "cdc20c22af6a"
+branch_labels = None
+depends_on = None
+
+# the rows of the same group are merged into the one with the least ID
+MERGE_CHILDREN = """
+    UPDATE {child} SET {column} = dup.kept_id
+    FROM (
+        SELECT id, min(id) OVER (PARTITION BY {key}) AS kept_id
+        FROM {table}
+    ) AS dup
+    WHERE {child}.{column} = dup.id AND dup.id <> dup.kept_id
+"""
+DELETE_DUPLICATES = """
+    DELETE FROM {table}
+    USING (
+        SELECT id, min(id) OVER (PARTITION BY {key}) AS kept_id
+        FROM {table}
+    ) AS dup
+    WHERE {table}.id = dup.id AND dup.id <> dup.kept_id
+"""
+
+# `district_id` pointed to the regions, keep the real districts only
+CLEAR_CITY_DISTRICT = f"""
+    UPDATE {TableNames.CITY} SET district_id = NULL
+    WHERE district_id IS NOT NULL AND NOT EXISTS (
+        SELECT 1 FROM {TableNames.DISTRICT}
+        WHERE {TableNames.DISTRICT}.id = {TableNames.CITY}.district_id
+            AND {TableNames.DISTRICT}.region_id
+                IS NOT DISTINCT FROM {TableNames.CITY}.region_id
+    )
+"""
+
+
+def merge_duplicates(
+    table: str,
+    key: str,
+    children: tuple[tuple[str, str], ...],
+) -> None:
+    """Repoint the children to the kept rows and delete the duplicates.
+
+    #### Args:
+    - table (str):
+        Table with the duplicates.
+    - key (str):
+        Columns of the unique constraint or index.
+    - children (tuple[tuple[str, str], ...]):
+        Tables and columns referencing the table.
+    """
+    for child, column in children:
+        op.execute(
+            MERGE_CHILDREN.format(
+                child=child, column=column, table=table, key=key
+            )
+        )
+    op.execute(DELETE_DUPLICATES.format(table=table, key=key))
+    return None
+
+
+def upgrade() -> None:
+    op.drop_constraint(
+        "city_district_id_fkey", TableNames.CITY, type_="foreignkey"
+    )
+    op.execute(CLEAR_CITY_DISTRICT)
+
+    # parents first, their merge makes new duplicates of the children
+    merge_duplicates(
+        TableNames.REGION,
+        "country_id, name",
+        (
+            (TableNames.DISTRICT, "region_id"),
+            (TableNames.CITY, "region_id"),
+        ),
+    )
+    merge_duplicates(
+        TableNames.DISTRICT,
+        "coalesce(region_id, 0), name",
+        ((TableNames.CITY, "district_id"),),
+    )
+    merge_duplicates(
+        TableNames.CITY,
+        "country_id, coalesce(region_id, 0), "
+        "coalesce(district_id, 0), name",
+        (
+            (TableNames.STREET, "city_id"),
+            (TableNames.ADDRESS, "city_id"),
+        ),
+    )
+    merge_duplicates(
+        TableNames.STREET,
+        "city_id, name",
+        ((TableNames.ADDRESS, "street_id"),),
+    )
+    merge_duplicates(
+        TableNames.ADDRESS,
+        "city_id, coalesce(street_id, 0), coalesce(building, ''), "
+        "coalesce(adds, ''), coalesce(office, '')",
+        (
+            (TableNames.PHONE, "address_id"),
+            (TableNames.INSTITUTION, "address_id"),
+            (TableNames.OWNER_ADDRESS, "address_id"),
+        ),
+    )
+
+    op.create_foreign_key(
+        "city_district_id_fkey",
+        TableNames.CITY,
+        TableNames.DISTRICT,
+        ["district_id"],
+        ["id"],
+    )
+
+    op.create_unique_constraint(
+        "uq_region_country_id_name",
+        TableNames.REGION,
+        ["country_id", "name"],
+    )
+    op.create_index(
+        "uq_district_region_id_name",
+        TableNames.DISTRICT,
+        [sa.text("coalesce(region_id, 0)"), "name"],
+        unique=True,
+    )
+    op.create_index(
+        "uq_city_country_id_region_id_district_id_name",
+        TableNames.CITY,
+        [
+            "country_id",
+            sa.text("coalesce(region_id, 0)"),
+            sa.text("coalesce(district_id, 0)"),
+            "name",
+        ],
+        unique=True,
+    )
+    op.create_unique_constraint(
+        "uq_street_city_id_name",
+        TableNames.STREET,
+        ["city_id", "name"],
+    )
+    op.create_index(
+        "uq_address_city_id_street_id_building_adds_office",
+        TableNames.ADDRESS,
+        [
+            "city_id",
+            sa.text("coalesce(street_id, 0)"),
+            sa.text("coalesce(building, '')"),
+            sa.text("coalesce(adds, '')"),
+            sa.text("coalesce(office, '')"),
+        ],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "uq_address_city_id_street_id_building_adds_office",
+        table_name=TableNames.ADDRESS,
+    )
+    op.drop_constraint(
+        "uq_street_city_id_name", TableNames.STREET, type_="unique"
+    )
+    op.drop_index(
+        "uq_city_country_id_region_id_district_id_name",
+        table_name=TableNames.CITY,
+    )
+    op.drop_index("uq_district_region_id_name", table_name=TableNames.DISTRICT)
+    op.drop_constraint(
+        "uq_region_country_id_name", TableNames.REGION, type_="unique"
+    )
+
+    op.drop_constraint(
+        "city_district_id_fkey", TableNames.CITY, type_="foreignkey"
+    )
+    op.create_foreign_key(
+        "city_district_id_fkey",
+        TableNames.CITY,
+        TableNames.REGION,
+        ["district_id"],
+        ["id"],
+    )
@@ -0,0 +1,106 @@
+"""002
+
+Revision ID: 9be86f65f164
+Revises: cae42bb439b8
+Create Date: 2026-10-17 11:40:05.718233
+
+"""
+from hashlib import sha256
+
+import sqlalchemy as sa
+from alembic import op
+from src.core.enums import TableNames
+
+# revision identifiers, used by Alembic.
+revision = "9be86f65f164"
+down_revision = "cae42bb439b8"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+SELECT_BATCH = sa.text(
+    """
+    SELECT address.id, country.name, region.name, district.name,
+        city.name, street.name, address.building, address.adds,
+        address.office
+    FROM address
+    JOIN city ON city.id = address.city_id
+    JOIN country ON country.id = city.country_id
+    LEFT JOIN region ON region.id = city.region_id
+    LEFT JOIN district ON district.id = city.district_id
+    LEFT JOIN street ON street.id = address.street_id
+    WHERE address.id > :last_id AND address.fingerprint IS NULL
+    ORDER BY address.id
+    LIMIT :batch_size
+    """
+)
+
+# duplicates stay without the fingerprint and are found by columns
+UPDATE_FINGERPRINT = sa.text(
+    """
+    UPDATE address SET fingerprint = :fingerprint
+    WHERE id = :id AND NOT EXISTS (
+        SELECT 1 FROM address WHERE fingerprint = :fingerprint
+    )
+    """
+)
+
+
+def make_fingerprint(*parts: str | None) -> str:
+    """Get the fingerprint of the address parts.
+
+    Frozen copy of `src.geo.utils.make_fingerprint` at this revision, the
+    migration must not change with the application code.
+
+    #### Args:
+    - parts (str | None):
+        Address parts in the `FINGERPRINT_FIELDS` order.
+
+    #### Returns:
+    - str:
+        Hex digest of `sha256`.
+    """
+    canonical = "\x1f".join(
+        " ".join(str(part).casefold().split()) if part is not None else ""
+        for part in parts
+    )
+    return sha256(canonical.encode()).hexdigest()
+
+
+def upgrade() -> None:
+    op.add_column(
+        TableNames.ADDRESS,
+        sa.Column("fingerprint", sa.String(length=64), nullable=True),
+    )
+    op.create_index(
+        op.f("ix_address_fingerprint"),
+        TableNames.ADDRESS,
+        ["fingerprint"],
+        unique=True,
+    )
+
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            SELECT_BATCH, {"last_id": last_id, "batch_size": BATCH_SIZE}
+        ).all()
+        if not rows:
+            break
+
+        conn.execute(
+            UPDATE_FINGERPRINT,
+            [
+                {"id": row[0], "fingerprint": make_fingerprint(*row[1:])}
+                for row in rows
+            ],
+        )
+        last_id = rows[-1][0]
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f("ix_address_fingerprint"), table_name=TableNames.ADDRESS
+    )
+    op.drop_column(TableNames.ADDRESS, "fingerprint")
@@ -0,0 +1,189 @@
+import asyncio
+import json
+import logging
+from random import random
+from secrets import token_urlsafe
+from time import monotonic
+from typing import Any
+from uuid import uuid4
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from src.config import Limits, RedisPrefixes
+from src.core.metrics import route_name
+from src.core.profiling import Profile, StackSampler, current_profile
+from src.db.redis import acache_db
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+
+class ProfileStore:
+    """Profiles, profiling keys and the sample rate in Redis.
+
+    #### Attrs:
+    - redis (Redis):
+        Connection to Redis.
+    - prefix (str):
+        Prefix of the keys in Redis.
+
+    #### Methods:
+    - create_key: str
+    - is_key: bool
+    - get_rate: float
+    - set_rate: None
+    - cached_rate: float
+    - save: None
+    - get: dict[str, Any] | None
+    - get_many: list[dict[str, Any]]
+    """
+
+    def __init__(self, redis: Redis, prefix: str) -> None:
+        self.redis = redis
+        self.prefix = prefix
+        self.__rate = 0.0
+        self.__rate_checked_at = float("-inf")
+
+    async def create_key(self) -> str:
+        """Create a key to profile requests with `X-Profile` header."""
+        key = token_urlsafe(16)
+        await self.redis.set(
+            self.prefix + "key:" + key, 1, ex=Limits.PROFILE_KEY_TIME
+        )
+        return key
+
+    async def is_key(self, key: str) -> bool:
+        return bool(await self.redis.exists(self.prefix + "key:" + key))
+
+    async def get_rate(self) -> float:
+        """Get the percent of the profiled requests."""
+        rate = await self.redis.get(self.prefix + "rate")
+        return 0.0 if rate is None else float(rate)
+
+    async def set_rate(self, percent: float) -> None:
+        await self.redis.set(self.prefix + "rate", percent)
+        return None
+
+    async def cached_rate(self) -> float:
+        """Get the percent, read from Redis once in a few seconds."""
+        now = monotonic()
+        if now - self.__rate_checked_at >= Limits.PROFILE_RATE_CHECK_TIME:
+            self.__rate_checked_at = now
+            try:
+                self.__rate = await self.get_rate()
+            except RedisError:
+                self.__rate = 0.0
+        return self.__rate
+
+    async def save(self, profile: Profile) -> None:
+        data = profile.to_dict()
+        summary = {
+            key: data[key]
+            for key in (
+                "id",
+                "method",
+                "path",
+                "route",
+                "status",
+                "started",
+                "seconds",
+                "samples",
+            )
+        }
+        await (
+            self.redis.pipeline(transaction=True)
+            .set(
+                self.prefix + profile.id,
+                json.dumps(data),
+                ex=Limits.PROFILE_CACHE_TIME,
+            )
+            .lpush(self.prefix + "list", json.dumps(summary))
+            .ltrim(self.prefix + "list", 0, Limits.PROFILE_LIST_SIZE - 1)
+            .execute()
+        )
+        return None
+
+    async def get(self, profile_id: str) -> dict[str, Any] | None:
+        raw = await self.redis.get(self.prefix + profile_id)
+        return None if raw is None else json.loads(raw)
+
+    async def get_many(self) -> list[dict[str, Any]]:
+        """Get summaries of the last profiles, the newest first."""
+        raw = await self.redis.lrange(self.prefix + "list", 0, -1)
+        return [json.loads(summary) for summary in raw]
+
+
+profile_store = ProfileStore(acache_db, RedisPrefixes.PROFILE)
+stack_sampler = StackSampler(
+    interval=Limits.PROFILE_SAMPLE_INTERVAL,
+    max_depth=Limits.PROFILE_MAX_DEPTH,
+)
+
+
+class ProfilingMiddleware:
+    """Profile requests with a key from an admin or by the sample rate.
+
+    The ID of the profile is sent in the `X-Profile-Id` header,
+    the profile is saved after the response.
+
+    #### Attrs:
+    - app (ASGIApp):
+        Wrapped application.
+    - store (ProfileStore): Default `profile_store`.
+        Storage of the keys and of the profiles.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        store: ProfileStore = profile_store,
+    ) -> None:
+        self.app = app
+        self.store = store
+
+    async def __must_profile(self, scope: Scope) -> bool:
+        key = Headers(scope=scope).get(PROFILE_HEADER)
+        if key is not None:
+            try:
+                return await self.store.is_key(key)
+            except RedisError:
+                return False
+
+        rate = await self.store.cached_rate()
+        return rate > 0 and random() * 100 < rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not await self.__must_profile(scope):
+            return await self.app(scope, receive, send)
+
+        profile = Profile(
+            uuid4().hex,
+            scope["method"],
+            scope["path"],
+            Limits.PROFILE_MAX_SPANS,
+        )
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append(PROFILE_ID_HEADER, profile.id)
+            await send(message)
+
+        task = asyncio.current_task()
+        token = current_profile.set(profile)
+        stack_sampler.add(task, profile)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            stack_sampler.remove(task)
+            current_profile.reset(token)
+            profile.finish(route_name(scope))
+            try:
+                await self.store.save(profile)
+            except RedisError as exc:
+                logger.error("profile is not saved: %s", exc)
@@ -1,19 +1,41 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.ext.asyncio.session import AsyncSession
-from src.authentication import AuthModel, ResponseAuthScheme, auth_crud
+from src.authentication import (
+    AuthModel,
+    ResponseAuthScheme,
+    auth_crud,
+    principal_crud,
+)
+from src.config import Limits
 from src.core.enums import AppPaths
-from src.core.exceptions import BadRequestException
-from src.db.postgres import get_db
-from src.parents import ResponseParentScheme, parent_crud
+from src.core.exceptions import (
+    BadRequestException,
+    NotFoundException,
+    UnprocessableEntityException,
+)
+from src.core.profiling import collapsed_stacks
+from src.db.postgres import SessionRoute, get_db, get_read_db, set_next_cursor
+from src.parents import ParentModel, ResponseParentScheme, parent_crud
 from src.providers import ResponseOwnerScheme, owner_crud
 
 from .dependencies import get_admin_user
+from .profiling import PROFILE_HEADER, profile_store
+from .schemes import ProfileKeyScheme, ProfileRateScheme, ProfileSummaryScheme
 
-router = APIRouter(dependencies=(Depends(get_admin_user),))
+router = APIRouter(
+    dependencies=(Depends(get_admin_user),),
+    route_class=SessionRoute,
+)
 
-auth_router = APIRouter(prefix=AppPaths.AUTH)
-parent_router = APIRouter(prefix=AppPaths.PARENTS)
-provider_router = APIRouter(prefix=AppPaths.PROVIDERS)
+auth_router = APIRouter(prefix=AppPaths.AUTH, route_class=SessionRoute)
+parent_router = APIRouter(prefix=AppPaths.PARENTS, route_class=SessionRoute)
+provider_router = APIRouter(
+    prefix=AppPaths.PROVIDERS, route_class=SessionRoute
+)
+profiling_router = APIRouter(
+    prefix=AppPaths.PROFILING, route_class=SessionRoute
+)
 
 
 NOT_IMPLEMENTED = {"This func": "Not implemented"}
@@ -26,17 +48,25 @@ NOT_IMPLEMENTED = {"This func": "Not implemented"}
     response_model=list[ResponseAuthScheme],
 )
 async def read_all_auths(
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    cursor: str | None = None,
     offset: int | None = 0,
     limit: int | None = Query(default=10, le=50),
     is_actve: bool | None = None,
 ):
-    if is_actve is None:
-        return await auth_crud.get_many(db, offset, limit)
+    expression = None
+    if is_actve is not None:
+        expression = AuthModel.is_active == is_actve
+
+    if cursor is None and offset:
+        return await auth_crud.get_many(db, offset, limit, expression)
 
-    return await auth_crud.get_many(
-        db, offset, limit, AuthModel.is_active == is_actve
+    auths, next_cursor = await auth_crud.get_page(
+        db, cursor, limit, expression
     )
+    set_next_cursor(response, next_cursor)
+    return auths
 
 
 @auth_router.get(
@@ -45,31 +75,59 @@ async def read_all_auths(
     description="Access for admin only",
     response_model=ResponseAuthScheme,
 )
-async def read_auth(*, db: AsyncSession = Depends(get_db), auth_id: int):
+async def read_auth(*, db: AsyncSession = Depends(get_read_db), auth_id: int):
     auth = await auth_crud.get(db, AuthModel.id == auth_id)
     if auth is None:
         raise BadRequestException(f"data by ID `{auth_id}` doesn't exists")
     return auth
 
 
+@auth_router.patch(
+    path="/{auth_id}/deactivate",
+    summary="Deactivate a user",
+    description="Access for admin only",
+    response_description="Successful Response returns only status code 200",
+)
+async def deactivate_auth(*, db: AsyncSession = Depends(get_db), auth_id: int):
+    auth = await auth_crud.get(db, AuthModel.id == auth_id)
+    if auth is None:
+        raise BadRequestException(f"data by ID `{auth_id}` doesn't exists")
+
+    _, err = await auth_crud.update(db, auth, {"is_active": False})
+    if err is not None:
+        raise UnprocessableEntityException(detail=err)
+
+    await principal_crud.invalidate(auth.email)
+    return None
+
+
 @parent_router.get(
     path="/all",
     response_model=list[ResponseParentScheme],
 )
 async def read_all_parents(
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    cursor: str | None = None,
     offset: int | None = 0,
     limit: int | None = Query(default=10, le=50),
 ):
-    return await parent_crud.get_many(db, offset, limit)
+    if cursor is None and offset:
+        return await parent_crud.get_many(db, offset, limit)
+
+    parents, next_cursor = await parent_crud.get_page(db, cursor, limit)
+    set_next_cursor(response, next_cursor)
+    return parents
 
 
 @parent_router.get(
     path="/{user_id}",
     response_model=ResponseParentScheme,
 )
-async def read_parent(*, db: AsyncSession = Depends(get_db), user_id: int):
-    user = await parent_crud.get(db, user_id)
+async def read_parent(
+    *, db: AsyncSession = Depends(get_read_db), user_id: int
+):
+    user = await parent_crud.get(db, ParentModel.id == user_id)
     if user is None:
         raise BadRequestException(f"user with ID `{user_id}` doesn't exists")
 
@@ -81,7 +139,9 @@ async def read_parent(*, db: AsyncSession = Depends(get_db), user_id: int):
     response_model=list[ResponseOwnerScheme],
 )
 async def read_all_owners(
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    cursor: str | None = None,
     offset: int | None = 0,
     limit: int
     | None = Query(
@@ -89,7 +149,12 @@ async def read_all_owners(
         le=50,
     ),
 ):
-    return await owner_crud.get_many(db, offset, limit)
+    if cursor is None and offset:
+        return await owner_crud.get_many(db, offset, limit)
+
+    owners, next_cursor = await owner_crud.get_page(db, cursor, limit)
+    set_next_cursor(response, next_cursor)
+    return owners
 
 
 @provider_router.get(
@@ -99,6 +164,87 @@ async def read_provider():
     return NOT_IMPLEMENTED
 
 
+@profiling_router.post(
+    path="/keys",
+    summary="Create a key to profile requests",
+    description=(
+        f"Requests with the key in the `{PROFILE_HEADER}` header "
+        "are profiled, the ID of the profile is in the `X-Profile-Id` "
+        "header of the response. Access for admin only"
+    ),
+    response_model=ProfileKeyScheme,
+)
+async def create_profile_key():
+    return ProfileKeyScheme(
+        key=await profile_store.create_key(),
+        header=PROFILE_HEADER,
+        expires_in=Limits.PROFILE_KEY_TIME,
+    )
+
+
+@profiling_router.get(
+    path="/rate",
+    summary="Get the percent of the profiled requests",
+    description="Access for admin only",
+    response_model=ProfileRateScheme,
+)
+async def read_profile_rate():
+    return ProfileRateScheme(percent=await profile_store.get_rate())
+
+
+@profiling_router.put(
+    path="/rate",
+    summary="Set the percent of the profiled requests",
+    description=(
+        "Workers read the percent once in "
+        f"{Limits.PROFILE_RATE_CHECK_TIME} seconds. Access for admin only"
+    ),
+    response_model=ProfileRateScheme,
+)
+async def update_profile_rate(rate: ProfileRateScheme):
+    await profile_store.set_rate(rate.percent)
+    return rate
+
+
+@profiling_router.get(
+    path="/profiles",
+    summary="Get the last profiles",
+    description="Access for admin only",
+    response_model=list[ProfileSummaryScheme],
+)
+async def read_profiles():
+    return await profile_store.get_many()
+
+
+@profiling_router.get(
+    path="/profiles/{profile_id}",
+    summary="Get a profile with its stacks and spans",
+    description="Access for admin only",
+)
+async def read_profile(profile_id: str):
+    profile = await profile_store.get(profile_id)
+    if profile is None:
+        raise NotFoundException(f"profile `{profile_id}` doesn't exists")
+    return profile
+
+
+@profiling_router.get(
+    path="/profiles/{profile_id}/collapsed",
+    summary="Get the stacks of a profile for a flame graph",
+    description=(
+        "Collapsed stacks for `flamegraph.pl` or speedscope. "
+        "Access for admin only"
+    ),
+    response_class=PlainTextResponse,
+)
+async def read_collapsed_profile(profile_id: str):
+    profile = await profile_store.get(profile_id)
+    if profile is None:
+        raise NotFoundException(f"profile `{profile_id}` doesn't exists")
+    return collapsed_stacks(profile["stacks"])
+
+
 router.include_router(auth_router)
 router.include_router(parent_router)
 router.include_router(provider_router)
+router.include_router(profiling_router)
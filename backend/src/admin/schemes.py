@@ -0,0 +1,71 @@
+from pydantic import BaseModel, Field
+
+
+class ProfileKeyScheme(BaseModel):
+    """Scheme of a key to profile requests.
+
+    #### Attrs:
+    - key (str):
+        Value of the header.
+    - header (str):
+        Name of the header.
+    - expires_in (int):
+        Seconds before the key expires.
+    """
+
+    key: str = Field(
+        description="Value of the header",
+    )
+    header: str = Field(
+        description="Name of the header",
+    )
+    expires_in: int = Field(
+        description="Seconds before the key expires",
+    )
+
+
+class ProfileRateScheme(BaseModel):
+    """Scheme of the percent of the profiled requests.
+
+    #### Attrs:
+    - percent (float):
+        Percent of the requests, `0` to switch off.
+    """
+
+    percent: float = Field(
+        ge=0,
+        le=100,
+        description="Percent of the requests, `0` to switch off",
+    )
+
+
+class ProfileSummaryScheme(BaseModel):
+    """Scheme of a profile in the list.
+
+    #### Attrs:
+    - id (str):
+        Identifier of the profile.
+    - method (str):
+        HTTP method of the request.
+    - path (str):
+        Path of the request.
+    - route (str | None):
+        Path template of the matched route.
+    - status (int | None):
+        Status of the response.
+    - started (float):
+        UNIX time of the start.
+    - seconds (float | None):
+        Duration of the request.
+    - samples (int):
+        Number of the stack samples.
+    """
+
+    id: str
+    method: str
+    path: str
+    route: str | None
+    status: int | None
+    started: float
+    seconds: float | None
+    samples: int
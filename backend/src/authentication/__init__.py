@@ -7,6 +7,7 @@ when extending the application.
 """
 from .crud import auth_crud
 from .models import AuthModel, TempUserModel
+from .principal import Principal, principal_crud, register_profile
 from .router import router as auth_router
 from .schemes import ResponseAuthScheme, TokenDataScheme
-from .security import get_token_data, get_token_user
+from .security import get_principal, get_token_data, get_token_user
@@ -1,33 +1,43 @@
-from typing import Any
+from struct import Struct
 from uuid import uuid4
 
+from sqlalchemy import bindparam, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.config import Limits, RedisPrefixes
+from src.core.enums import UserType
 from src.db.postgres import CRUD
-from src.db.redis import auth_db
+from src.db.postgres.prepared import PreparedQuery
+from src.db.redis import aauth_db
 
-from .models import AuthModel, TempUserModel
+from .models import AuthModel, AuthRecord, TempUserModel
 from .schemes import CreateTempUserScheme
 
 
 class TempCRUD:
     """The set of `CRUD` operations for `TempUserModel`.
 
+    Every operation is a single round trip to Redis.
+
     #### Methods:
-    - set: str
-    - pop: TempUserModel | None
+    - set_temp_user: str
+    - set_want_password: str
+    - pop_temp_user: TempUserModel | None
+    - pop_want_password: str | None
     """
 
     expiire = Limits.CONFIRM_EXPIRE_TIME
     model = TempUserModel
     prefix_temp_user = RedisPrefixes.TEMP_USER
     prefix_newpassword = RedisPrefixes.NEWPASSWORD
+    # user type (1 byte) + email + separator + hashed password
+    header = Struct("!B")
+    separator = b"\x00"
 
-    def __set_temp_data(self, data: Any, prefix: str) -> str:
+    async def __set_temp_data(self, data: bytes | str, prefix: str) -> str:
         """Put data in temporary storage.
 
         #### Args:
-        - data (Any):
+        - data (bytes | str):
             Storage data.
         - prefix (str):
             Namespace.
@@ -38,14 +48,68 @@ class TempCRUD:
         """
         uuid = uuid4().hex
         name = prefix + uuid
-        auth_db.set(
+        await aauth_db.set(
             name,
             data,
             self.expiire,
         )
         return uuid
 
-    def set_temp_user(self, user: CreateTempUserScheme) -> str:
+    async def __pop_temp_data(self, uuid: str, prefix: str) -> bytes | None:
+        """Get data from temporary storage and delete it atomically.
+
+        #### Args:
+        - uuid (str):
+            UUID key to get data.
+        - prefix (str):
+            Namespace.
+
+        #### Returns:
+        - bytes | None:
+            Data if it exists.
+        """
+        return await aauth_db.getdel(prefix + uuid)
+
+    def __dump_temp_user(self, user: CreateTempUserScheme) -> bytes:
+        """Pack user data to compact binary form.
+
+        #### Args:
+        - user (CreateTempUserScheme):
+            User data with hashed password.
+
+        #### Returns:
+        - bytes:
+            Packed user data.
+        """
+        user_type = user.user_type or UserType.PARENT
+        return self.header.pack(user_type) + self.separator.join(
+            (user.email.encode(), user.password.encode())
+        )
+
+    def __load_temp_user(self, data: bytes) -> TempUserModel:
+        """Unpack user data.
+
+        The data was validated before packing,
+        so the model is constructed without validation.
+
+        #### Args:
+        - data (bytes):
+            Packed user data.
+
+        #### Returns:
+        - TempUserModel:
+            User data.
+        """
+        (user_type,) = self.header.unpack_from(data)
+        start = self.header.size
+        email, password = data[start:].split(self.separator, 1)
+        return self.model.construct(
+            user_type=user_type,
+            email=email.decode(),
+            password=password.decode(),
+        )
+
+    async def set_temp_user(self, user: CreateTempUserScheme) -> str:
         """Put user data in temporary storage.
 
         #### Args:
@@ -56,10 +120,10 @@ class TempCRUD:
         - str:
             UUID key to get user data from temporary storage.
         """
-        value = user.json(exclude_none=True)
-        return self.__set_temp_data(value, self.prefix_temp_user)
+        value = self.__dump_temp_user(user)
+        return await self.__set_temp_data(value, self.prefix_temp_user)
 
-    def set_want_password(self, email: str) -> str:
+    async def set_want_password(self, email: str) -> str:
         """Put user data in temporary storage.
 
         #### Args:
@@ -70,9 +134,9 @@ class TempCRUD:
         - str:
             UUID key to get email address from temporary storage.
         """
-        return self.__set_temp_data(email, self.prefix_newpassword)
+        return await self.__set_temp_data(email, self.prefix_newpassword)
 
-    def pop_temp_user(self, uuid: str) -> TempUserModel | None:
+    async def pop_temp_user(self, uuid: str) -> TempUserModel | None:
         """Get user data from temporary storage and delete from storage.
 
         #### Args:
@@ -83,15 +147,13 @@ class TempCRUD:
         - TempUserModel | None:
             User data if it exists.
         """
-        name = self.prefix_temp_user + uuid
-        temp_user = auth_db.get(name)
+        temp_user = await self.__pop_temp_data(uuid, self.prefix_temp_user)
         if temp_user is None:
             return None
 
-        auth_db.delete(name)
-        return self.model.parse_raw(temp_user)
+        return self.__load_temp_user(temp_user)
 
-    def pop_want_password(self, uuid: str) -> str | None:
+    async def pop_want_password(self, uuid: str) -> str | None:
         """Get email from temporary storage and delete from storage.
 
         #### Args:
@@ -102,12 +164,10 @@ class TempCRUD:
         - str | None:
             User data if it exists.
         """
-        name = self.prefix_newpassword + uuid
-        email: bytes = auth_db.get(name)
+        email = await self.__pop_temp_data(uuid, self.prefix_newpassword)
         if email is None:
             return None
 
-        auth_db.delete(name)
         return email.decode()
 
 
@@ -121,10 +181,18 @@ class AuthCrud(CRUD):
     - get: AuthModel | None
     - update: tuple[AuthModel, None] | tuple[None, str]
     - email_exists: bool
+    - get_by_email: AuthRecord | None
     """
 
     model: AuthModel
 
+    __by_email = PreparedQuery(
+        "auth_by_email",
+        select(*(getattr(AuthModel, key) for key in AuthRecord.__slots__))
+        .where(AuthModel.email == bindparam("email"))
+        .limit(1),
+    )
+
     async def create(
         self,
         db: AsyncSession,
@@ -170,7 +238,29 @@ class AuthCrud(CRUD):
         - bool:
             Exists or not.
         """
-        return await self.get(db, self.model.email == email) is not None
+        return await self.get_by_email(db, email) is not None
+
+    async def get_by_email(
+        self,
+        db: AsyncSession,
+        email: str,
+    ) -> AuthRecord | None:
+        """Get the user by a prepared statement.
+
+        #### Args:
+        - db (AsyncSession):
+            Connecting to the database.
+        - email (str):
+            User's email.
+
+        #### Returns:
+        - AuthRecord | None:
+            The user data if it exists.
+        """
+        row = await self.__by_email.fetchrow(db, email=email)
+        if row is None:
+            return None
+        return AuthRecord(**row)
 
 
 auth_crud = AuthCrud(AuthModel)
@@ -0,0 +1,133 @@
+"""Password hashing outside the event loop.
+
+`bcrypt` is slow by design, so every hash and verification is sent
+to a dedicated process pool instead of blocking the worker's event loop.
+"""
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+
+from passlib.context import CryptContext
+from prometheus_client import Gauge, Histogram
+from src.config import settings
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+HASHING_IN_FLIGHT = Gauge(
+    "password_hashing_in_flight",
+    "Password hashing jobs submitted to the process pool.",
+    multiprocess_mode="livesum",
+)
+HASHING_QUEUE_DEPTH = Gauge(
+    "password_hashing_queue_depth",
+    "Password hashing jobs waiting for a free process.",
+    multiprocess_mode="livesum",
+)
+HASHING_SECONDS = Histogram(
+    "password_hashing_seconds",
+    "Time from submitting a password hashing job to getting its result.",
+    ("operation",),
+)
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password, "bcrypt")
+
+
+def _verify(password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(password, hashed_password)
+
+
+class PasswordHasher:
+    """Process pool for `bcrypt` operations.
+
+    #### Attrs:
+    - max_workers (int):
+        Number of processes in the pool.
+
+    #### Methods:
+    - start: None
+    - shutdown: None
+    - hash_password: str
+    - verify_password: bool
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        self.max_workers = max_workers
+        self.__executor: ProcessPoolExecutor | None = None
+        self.__in_flight = 0
+
+    def start(self) -> None:
+        """Create the process pool if it doesn't exist."""
+        if self.__executor is None:
+            self.__executor = ProcessPoolExecutor(self.max_workers)
+        return None
+
+    def shutdown(self) -> None:
+        """Stop the process pool."""
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=False, cancel_futures=True)
+            self.__executor = None
+        return None
+
+    def __set_in_flight(self, delta: int) -> None:
+        self.__in_flight += delta
+        HASHING_IN_FLIGHT.set(self.__in_flight)
+        HASHING_QUEUE_DEPTH.set(max(0, self.__in_flight - self.max_workers))
+
+    async def __run(self, operation: str, func: Callable, *args) -> str | bool:
+        """Run the function in the process pool.
+
+        #### Args:
+        - operation (str):
+            Operation name for metrics.
+        - func (Callable):
+            Function to run.
+
+        #### Returns:
+        - str | bool:
+            Result of the function.
+        """
+        self.start()
+        loop = asyncio.get_running_loop()
+        self.__set_in_flight(1)
+        try:
+            with HASHING_SECONDS.labels(operation).time():
+                return await loop.run_in_executor(self.__executor, func, *args)
+        finally:
+            self.__set_in_flight(-1)
+
+    async def hash_password(self, password: str) -> str:
+        """Get a hash from a password.
+
+        #### Args:
+        - password (str):
+            Password for hashing.
+
+        #### Returns:
+        - str:
+            The hash of the password.
+        """
+        return await self.__run("hash", _hash, password)
+
+    async def verify_password(
+        self,
+        password: str,
+        hashed_password: str,
+    ) -> bool:
+        """Check that the password matches the hash.
+
+        #### Args:
+        - password (str):
+            Password to check.
+        - hashed_password (str):
+            Hash from the database.
+
+        #### Returns:
+        - bool:
+            Matches or not.
+        """
+        return await self.__run("verify", _verify, password, hashed_password)
+
+
+password_hasher = PasswordHasher(settings.password_hash_workers)
@@ -57,3 +57,38 @@ class AuthModel(Base, EmailModel):
         nullable=False,
     )
     password = Column(String(Limits.MAX_LEN_HASH_PASSWORD), nullable=False)
+
+
+class AuthRecord:
+    """Read-only authentication data without the ORM state.
+
+    Returned by the fast lookups, use `AuthModel` to change the data.
+
+    #### Attrs:
+    - id (int):
+        Iidentifier.
+    - email (str):
+        User's email.
+    - is_active (bool):
+        Is the user activated.
+    - user_type (int):
+        User's type.
+    - password (str):
+        Hashed pasword.
+    """
+
+    __slots__ = ("id", "email", "is_active", "user_type", "password")
+
+    def __init__(
+        self,
+        id: int,
+        email: str,
+        is_active: bool,
+        user_type: int,
+        password: str,
+    ) -> None:
+        self.id = id
+        self.email = email
+        self.is_active = is_active
+        self.user_type = user_type
+        self.password = password
@@ -0,0 +1,234 @@
+import json
+from typing import Any, Mapping
+
+from redis.exceptions import RedisError
+from sqlalchemy import bindparam, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.config import Limits, RedisPrefixes
+from src.core.enums import UserType
+from src.db.postgres import Base
+from src.db.postgres.prepared import PreparedQuery
+from src.db.redis import acache_db
+
+from .models import AuthModel
+
+# Profile tables with `auth_id` are registered by other modules,
+# so this module does not import them.
+profile_models: dict[int, Base] = {}
+
+
+def register_profile(user_type: UserType, model: Base) -> None:
+    """Register the profile table for the user type.
+
+    #### Args:
+    - user_type (UserType):
+        Type of user.
+    - model (Base):
+        Table with `auth_id` column.
+    """
+    profile_models[user_type] = model
+    return None
+
+
+class Principal:
+    """Authenticated user with the profile.
+
+    #### Attrs:
+    - auth (AuthModel):
+        Authentication data.
+    - profile (Base | None):
+        Profile for the user type if it exists.
+    """
+
+    __slots__ = ("auth", "profile")
+
+    def __init__(self, auth: AuthModel, profile: Base | None) -> None:
+        self.auth = auth
+        self.profile = profile
+
+
+class PrincipalCRUD:
+    """Resolving of the authenticated user with the short-term cache.
+
+    #### Methods:
+    - get: Principal | None
+    - invalidate: None
+    """
+
+    expire = Limits.PRINCIPAL_CACHE_TIME
+    prefix = RedisPrefixes.PRINCIPAL
+    # not needed for authorized requests and should not leave the database
+    exclude_auth = {"password"}
+
+    def __init__(self) -> None:
+        self.__query: PreparedQuery | None = None
+        self.__models: dict[int, Base] = {}
+
+    @staticmethod
+    def __to_dict(obj: Base, exclude: set[str] | None = None) -> dict:
+        exclude = exclude or set()
+        return {
+            col.key: getattr(obj, col.key)
+            for col in obj.__table__.columns
+            if col.key not in exclude
+        }
+
+    async def __get_cached(self, email: str) -> Principal | None:
+        """Get the principal from the cache.
+
+        #### Args:
+        - email (str):
+            User's email.
+
+        #### Returns:
+        - Principal | None:
+            The principal if it is in the cache.
+        """
+        try:
+            raw = await acache_db.get(self.prefix + email)
+        except RedisError:
+            return None
+
+        if raw is None:
+            return None
+
+        data = json.loads(raw)
+        auth = AuthModel(**data["auth"])
+        profile = None
+        if data["profile"] is not None:
+            profile = profile_models[auth.user_type](**data["profile"])
+        return Principal(auth, profile)
+
+    async def __set_cached(self, principal: Principal) -> None:
+        """Put the principal in the cache.
+
+        #### Args:
+        - principal (Principal):
+            Principal for caching.
+        """
+        profile = None
+        if principal.profile is not None:
+            profile = self.__to_dict(principal.profile)
+        data = {
+            "auth": self.__to_dict(principal.auth, self.exclude_auth),
+            "profile": profile,
+        }
+        try:
+            await acache_db.set(
+                self.prefix + principal.auth.email,
+                json.dumps(data),
+                self.expire,
+            )
+        except RedisError:
+            pass
+        return None
+
+    def __lookup(self) -> PreparedQuery:
+        """Get the query of the user with the profiles.
+
+        The query is rebuilt when a profile table is registered.
+
+        #### Returns:
+        - PreparedQuery:
+            Query with the `email` parameter.
+        """
+        if self.__query is not None and self.__models == profile_models:
+            return self.__query
+
+        self.__models = profile_models.copy()
+        columns = [
+            col.label(f"auth_{col.key}")
+            for col in AuthModel.__table__.columns
+            if col.key not in self.exclude_auth
+        ]
+        stmt = select(*columns)
+        for user_type, model in self.__models.items():
+            columns = [
+                col.label(f"p{user_type}_{col.key}")
+                for col in model.__table__.columns
+            ]
+            stmt = stmt.add_columns(*columns).outerjoin(
+                model, model.auth_id == AuthModel.id
+            )
+        stmt = stmt.where(
+            AuthModel.email == bindparam("email"),
+            AuthModel.is_active == True,  # noqa E712
+        ).limit(1)
+
+        self.__query = PreparedQuery("principal", stmt)
+        return self.__query
+
+    def __from_row(self, row: Mapping[str, Any]) -> Principal:
+        auth = AuthModel(
+            **{
+                col.key: row[f"auth_{col.key}"]
+                for col in AuthModel.__table__.columns
+                if col.key not in self.exclude_auth
+            }
+        )
+        profile = None
+        for user_type, model in self.__models.items():
+            if row[f"p{user_type}_id"] is not None:
+                profile = model(
+                    **{
+                        col.key: row[f"p{user_type}_{col.key}"]
+                        for col in model.__table__.columns
+                    }
+                )
+                break
+        return Principal(auth, profile)
+
+    async def get(
+        self,
+        db: AsyncSession,
+        email: str,
+        cached: bool = True,
+    ) -> Principal | None:
+        """Get the active user with the profile.
+
+        The auth row and the profile are loaded by one prepared
+        statement, without ORM compilation.
+
+        #### Args:
+        - db (AsyncSession):
+            Connecting to the database.
+        - email (str):
+            User's email.
+        - cached (bool): Default True.
+            Whether to use the cache.
+
+        #### Returns:
+        - Principal | None:
+            The principal if the user exists and is active.
+        """
+        if cached:
+            principal = await self.__get_cached(email)
+            if principal is not None:
+                return principal
+
+        row = await self.__lookup().fetchrow(db, email=email)
+        if row is None:
+            return None
+
+        principal = self.__from_row(row)
+        if cached:
+            await self.__set_cached(principal)
+        return principal
+
+    async def invalidate(self, email: str) -> None:
+        """Remove the principal from the cache.
+
+        Must be called after any change of the user or the profile.
+
+        #### Args:
+        - email (str):
+            User's email.
+        """
+        try:
+            await acache_db.delete(self.prefix + email)
+        except RedisError:
+            pass
+        return None
+
+
+principal_crud = PrincipalCRUD()
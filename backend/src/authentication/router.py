@@ -12,21 +12,23 @@ from src.core.exceptions import (
     UnprocessableEntityException,
 )
 from src.core.utils import random_string
-from src.db.postgres import get_db
+from src.core.validators import email_domain_checker
+from src.db.postgres import SessionRoute, get_db
 from src.mail import get_send_confirm_link
 
 from .crud import auth_crud, temp_crud
 from .forms import EmailForm, Oauth2EmailForm, PasswordForm
+from .hashing import password_hasher
 from .models import AuthModel
+from .principal import principal_crud
 from .schemes import CreateTempUserScheme, PasswordScheme, TokenScheme
-from .security import (
-    authenticate_user,
-    create_JWT_token,
-    get_hash_password,
-    get_token_user,
-)
+from .security import authenticate_user, create_JWT_token, get_token_user
 
-router = APIRouter(prefix=AppPaths.AUTH, tags=[RouteTags.AUTH])
+router = APIRouter(
+    prefix=AppPaths.AUTH,
+    tags=[RouteTags.AUTH],
+    route_class=SessionRoute,
+)
 
 
 @router.post(
@@ -50,9 +52,11 @@ async def registration(
         raise UnprocessableEntityException(
             f"user with email `{new_user.email}` alredy exists"
         )
+    # only new emails are checked, login doesn't touch DNS
+    await email_domain_checker.check(new_user.email)
 
-    new_user.password = get_hash_password(new_user.password)
-    uuid = temp_crud.set_temp_user(new_user)
+    new_user.password = await password_hasher.hash_password(new_user.password)
+    uuid = await temp_crud.set_temp_user(new_user)
     link = request.url_for("confirm_registration", uuid=uuid)._url
     backgrond_task.add_task(send_mail, new_user.email, link)
     return link  # for development. return None
@@ -77,7 +81,7 @@ async def confirm_registration(
         max_length=32,
     ),
 ) -> None:
-    temp_user = temp_crud.pop_temp_user(uuid)
+    temp_user = await temp_crud.pop_temp_user(uuid)
     if not temp_user:
         raise NotFoundException("start again please")
 
@@ -99,7 +103,6 @@ async def login(
     db: AsyncSession = Depends(get_db),
     form: Oauth2EmailForm = Depends(),
 ):
-    print(form)
     user = await authenticate_user(db, form.email, form.password)
     data = {"sub": user.email, "ut": user.user_type}
     return TokenScheme(access_token=create_JWT_token(data))
@@ -118,11 +121,12 @@ async def request_change_password(
     user: AuthModel = Depends(get_token_user),
     form: PasswordForm = Depends(),
 ):
-    user.password = get_hash_password(form.password)
-    _, err = await auth_crud.save(db, user)
+    password = await password_hasher.hash_password(form.password)
+    _, err = await auth_crud.update(db, user, {"password": password})
     if err is not None:
         raise UnprocessableEntityException(detail=err)
 
+    await principal_crud.invalidate(user.email)
     return None
 
 
@@ -141,14 +145,14 @@ async def forget_password(
     send_mail: Callable = Depends(get_send_confirm_link),
     backgrond_task: BackgroundTasks,
 ):
-    user: AuthModel = await auth_crud.get(db, AuthModel.email == form.email)
+    user = await auth_crud.get_by_email(db, form.email)
     if user is None:
         raise BadRequestException(f"user with email `{form.email}` not exists")
 
     if not user.is_active:
         raise ForbiddenException
 
-    uuid = temp_crud.set_want_password(form.email)
+    uuid = await temp_crud.set_want_password(form.email)
     link = request.url_for("get_new_password", uuid=uuid)._url
     backgrond_task.add_task(send_mail, form.email, link)
     return link  # for development. return None
@@ -172,7 +176,7 @@ async def get_new_password(
         max_length=32,
     ),
 ) -> None:
-    temp_email = temp_crud.pop_want_password(uuid)
+    temp_email = await temp_crud.pop_want_password(uuid)
     if not temp_email:
         raise NotFoundException("start again please")
 
@@ -187,9 +191,11 @@ async def get_new_password(
 
     # WARNING: There is a chance to create a password that is too simple.
     new_password = random_string(Limits.MIN_LEN_PASSWORD)
-    user.password = get_hash_password(new_password)
+    user.password = await password_hasher.hash_password(new_password)
     _, err = await auth_crud.save(db, user)
     if err is not None:
         raise UnprocessableEntityException("please try again")
 
+    await principal_crud.invalidate(user.email)
+
     return {"password": new_password}
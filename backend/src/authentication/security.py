@@ -3,7 +3,6 @@ from time import time
 from fastapi import Depends
 from fastapi.security.oauth2 import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.config import Limits, settings
@@ -12,19 +11,20 @@ from src.core.exceptions import BadRequestException, CredentialsException
 from src.db.postgres.database import ASessionMaker, get_db
 
 from .crud import auth_crud
-from .models import AuthModel
+from .hashing import password_hasher
+from .models import AuthModel, AuthRecord
+from .principal import Principal, principal_crud
 from .schemes import TokenDataScheme
 
 token_url = f"{AppPaths.API}{AppPaths.AUTH}{AppPaths.TOKEN}"
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=token_url)
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 async def authenticate_user(
     db: AsyncSession,
     email: str,
     password: str,
-) -> AuthModel | None:
+) -> AuthRecord:
     """Get the active user from the database if the password matches.
 
     #### Args:
@@ -40,15 +40,14 @@ async def authenticate_user(
         Bad authentication data.
 
     #### Returns:
-    - AuthModel | None:
-        The user object from the database if the password matches else None.
+    - AuthRecord:
+        The user data from the database if the password matches.
     """
-    user: AuthModel = await auth_crud.get(db, AuthModel.email == email)
-    print(email, user)
+    user = await auth_crud.get_by_email(db, email)
     if user is None or not user.is_active:
         raise BadRequestException(f"user with email: {email} not found")
 
-    if not pwd_context.verify(password, user.password):
+    if not await password_hasher.verify_password(password, user.password):
         raise BadRequestException("invalid password")
 
     return user
@@ -70,11 +69,13 @@ def create_JWT_token(claims: dict) -> str:
     return token
 
 
-def get_token_data(
+async def get_token_data(
     token: str = Depends(oauth2_scheme),
 ) -> TokenDataScheme:
     """Get data from `JWT` token.
 
+    Decoding is cheap, so it runs on the event loop instead of the threadpool.
+
     #### Args:
     - token (str):
         JWT token.
@@ -100,11 +101,14 @@ def get_token_data(
     return token_data
 
 
-async def get_token_user(
+async def get_principal(
     db: AsyncSession = Depends(get_db),
     token_data: TokenDataScheme = Depends(get_token_data),
-) -> AuthModel:
-    """Get a user by `JWT` token.
+) -> Principal:
+    """Get the user with the profile by `JWT` token.
+
+    The result is cached for a short time,
+    so most authorized requests don't query the database.
 
     #### Args:
     - db (AsyncSession):
@@ -114,33 +118,33 @@ async def get_token_user(
 
     #### Raises:
     - CredentialsException:
-        The token is invalid.
+        The token is invalid or the user is not active.
 
     #### Returns:
-    - AuthModel:
-        The user object from the database.
+    - Principal:
+        The user and the profile.
     """
-    user: AuthModel = await auth_crud.get(
-        db, AuthModel.email == token_data.email
-    )
-    if user is None or not user.is_active:
+    principal = await principal_crud.get(db, token_data.email)
+    if principal is None:
         raise CredentialsException
 
-    return user
+    return principal
 
 
-def get_hash_password(password: str) -> str:
-    """Get a hash from a password.
+async def get_token_user(
+    principal: Principal = Depends(get_principal),
+) -> AuthModel:
+    """Get a user by `JWT` token.
 
     #### Args:
-    - password (str):
-        Password for hashing.
+    - principal (Principal):
+        The user and the profile.
 
     #### Returns:
-    - str:
-        The hash of the password.
+    - AuthModel:
+        The user object.
     """
-    return pwd_context.hash(password, "bcrypt")
+    return principal.auth
 
 
 async def admin_always_exists() -> None:
@@ -154,7 +158,7 @@ async def admin_always_exists() -> None:
         ):
             return None
 
-        password = get_hash_password(
+        password = await password_hasher.hash_password(
             settings.admin_password.get_secret_value()
         )
         admin = AuthModel(
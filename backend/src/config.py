@@ -1,9 +1,10 @@
 import os
 from pathlib import Path
+from typing import Any, Literal
 
 from dotenv import load_dotenv
 from email_validator import EMAIL_MAX_LENGTH
-from pydantic import BaseSettings, EmailStr, SecretStr
+from pydantic import BaseSettings, EmailStr, SecretStr, validator
 
 load_dotenv()
 
@@ -21,6 +22,11 @@ YEAR = DAY * 365
 class RedisPrefixes:
     TEMP_USER = "tempuser:"
     NEWPASSWORD = "newpassword:"
+    PRINCIPAL = "principal:"
+    GEOCODER = "geocoder:"
+    READ_CACHE = "readcache:"
+    STARTUP = "startup:"
+    PROFILE = "profile:"
 
 
 class AppSettings(BaseSettings):
@@ -35,14 +41,47 @@ class AppSettings(BaseSettings):
     app_version: str = "0.0.0"
     app_description: str = "FastAPI app"
 
+    # `python -m src.server`
+    server_host: str = "0.0.0.0"
+    server_port: int = 8000
+    server_workers: int | None = None  # processes, the number of CPUs
+    server_max_requests: int = 10000  # restart a worker after, 0 to never
+    server_max_requests_jitter: int = 1000  # not to restart all at once
+    server_graceful_timeout: int = 30  # seconds to finish the requests
+    # seconds of a blocked event loop to log its stack, empty to never
+    loop_block_threshold: float | None = 0.25
+
     secret_key: str  # salt for hashing password
     algorithm: str  # algorithm for hashing password
+    password_hash_workers: int = 2  # processes for `bcrypt`
 
     postgres_user: str
     postgres_password: str
     postgres_host: str
     postgres_port: int
     postgres_db_name: str
+    # optional read-only replica, the primary credentials are used
+    postgres_replica_host: str | None = None
+    postgres_replica_port: int | None = None
+    db_replica_max_lag: float = 5  # seconds, reads go to the primary above
+    # engine profile, the values below override the profile when set
+    db_profile: Literal["dev", "prod", "bench"] = "prod"
+    db_echo: bool | None = None
+    db_pool_size: int | None = None
+    db_max_overflow: int | None = None
+    db_pool_timeout: float | None = None  # seconds to wait for a connection
+    db_pool_recycle: int | None = None  # seconds, `-1` to never recycle
+    db_pool_pre_ping: bool | None = None
+    db_command_timeout: float | None = None  # seconds for a statement
+    db_statement_cache_size: int | None = None  # per connection
+    db_prepared_statements: bool = True  # disable behind pgbouncer
+    db_pool_prewarm: int | None = None  # connections on startup, pool size
+    # connections of all workers of `src.server` with the replica ones,
+    # 100 of Postgres by default without a few for migrations and `psql`
+    db_max_connections: int = 90
+    # fail requests with more statements, for debugging and tests
+    sql_max_queries: int | None = None
+    sql_max_repeats: int | None = None  # executions of the same statement
 
     redis_host: str
     redis_port: int
@@ -53,12 +92,25 @@ class AppSettings(BaseSettings):
     google_smtp_port: int = 465
     google_email: EmailStr = "example@gmail.com"
     google_smtp_password: SecretStr = "app_key"
+    smtp_use_ssl: bool = True
+    mail_workers: int = 2  # SMTP connections kept by the dispatcher
+    mail_queue_size: int = 1000
+    mail_batch_size: int = 10
+    mail_timeout: int = 10  # seconds
 
     ya_map_api_key: str
+    geocoder_timeout: float = 5  # seconds for the whole request
+    geocoder_connections: int = 10  # keep-alive connections to the API
 
     admin_email: EmailStr = "admin@yahoo.com"
     admin_password: SecretStr = "12345678"
 
+    @validator("loop_block_threshold", pre=True)
+    def threshold_validator(cls, value: str | float | None) -> Any:
+        if isinstance(value, str) and value.strip().lower() in ("", "none"):
+            return None
+        return value
+
     class Config:
         if os.getenv("TESTING"):
             env_file = ".envdev"
@@ -75,8 +127,42 @@ class Limits:
     # auth
     CONFIRM_EXPIRE_TIME = MINUTE * 13
     TOKEN_EXPIRE_TIME = DAY
+    PRINCIPAL_CACHE_TIME = 30
+    EMAIL_DOMAIN_CACHE_TIME = DAY
+    EMAIL_DOMAIN_NOT_FOUND_CACHE_TIME = MINUTE * 10
+    EMAIL_DOMAIN_CACHE_SIZE = 10000
+    EMAIL_DOMAIN_TIMEOUT = 3  # seconds for the DNS lookup
+
+    REPLICA_LAG_CHECK_TIME = 2  # seconds between replica lag checks
+    STARTUP_LOCK_TIME = MINUTE  # maximum seconds of seeding the database
+    # seconds between heartbeats of the loop, a blocking is seen when it is
+    # longer than the threshold plus up to this time
+    LOOP_LAG_CHECK_TIME = 0.1
+
+    # request profiling
+    PROFILE_KEY_TIME = MINUTE * 60
+    PROFILE_CACHE_TIME = DAY
+    PROFILE_LIST_SIZE = 100  # last profiles listed for admins
+    PROFILE_RATE_CHECK_TIME = 5  # seconds to keep the sample rate in memory
+    PROFILE_SAMPLE_INTERVAL = 0.005  # seconds between stack samples
+    PROFILE_MAX_DEPTH = 64  # frames of a stack sample
+    PROFILE_MAX_SPANS = 1000  # SQL, Redis and HTTP calls of a profile
+
+    # read-through cache of `CRUD`
+    READ_CACHE_TIME = MINUTE
+    READ_CACHE_LOCAL_TIME = 5  # seconds in the memory of the worker
+    READ_CACHE_SIZE = 1000  # objects in the memory of the worker
+    READ_CACHE_RECONNECT_TIME = 30  # maximum seconds between resubscribes
 
     DEFAULT_PAGINATION_SIZE = 10
+    BULK_CHUNK_SIZE = 1000
+    MAX_BIND_PARAMS = 32767  # from asyncpg
+
+    # geo
+    GEOCODER_CACHE_TIME = DAY * 30
+    GEOCODER_NOT_FOUND_CACHE_TIME = MINUTE * 10
+    GEOCODER_BREAKER_FAILURES = 5
+    GEOCODER_BREAKER_RESET_TIME = 30
 
     # parent
     ADULT_AGE = 18 * YEAR + 5 * DAY
@@ -103,6 +189,7 @@ class Limits:
     # geo
     DEFAULT_LEN_GEO_NAME = 64
     LEN_16_GEO_NAME = 16
+    LEN_FINGERPRINT = 64  # sha256 hex digest
 
 
 settings = AppSettings()
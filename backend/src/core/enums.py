@@ -93,6 +93,8 @@ class AppPaths(StrEnum):
     - AUTH (str): "/auth"
     - PROVIDERS (str): "/providers"
     - PARENTS (str): "/parents"
+    - METRICS (str): "/metrics"
+    - PROFILING (str): "/profiling"
     """
 
     API = "/api"
@@ -102,6 +104,8 @@ class AppPaths(StrEnum):
     AUTH = "/auth"
     PROVIDERS = "/providers"
     PARENTS = "/parents"
+    METRICS = "/metrics"
+    PROFILING = "/profiling"
 
 
 class RouteTags(StrEnum):
@@ -53,3 +53,10 @@ class ServerError(BadRequestException):
 
     status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
     detail = ""
+
+
+class ServiceUnavailableException(BadRequestException):
+    """Status 503."""
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    detail = "service is unavailable"
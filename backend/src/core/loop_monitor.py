@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import sys
+import threading
+import traceback
+from time import monotonic
+
+from prometheus_client import Counter, Histogram
+from src.config import Limits, settings
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG_SECONDS = Histogram(
+    "event_loop_lag_seconds",
+    "Delay of the event loop heartbeat after its planned time.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+LOOP_BLOCKS = Counter(
+    "event_loop_blocks_total",
+    "Times the event loop was blocked longer than the threshold.",
+)
+
+
+class LoopMonitor:
+    """Measure the lag of the event loop and catch blocking calls.
+
+    A task of the loop sleeps for `interval` and records how late it
+    wakes up. A thread checks the time of the last wake up, and if the
+    loop doesn't run longer than `threshold`, logs the stack of the
+    loop thread: the blocking call and the coroutine calling it.
+
+    #### Attrs:
+    - interval (float):
+        Seconds between the heartbeats, much less than `threshold`.
+    - threshold (float | None):
+        Lag in seconds to log the stack, `None` to measure the lag only.
+    - max_frames (int): Default `30`.
+        Maximum frames of the logged stack.
+
+    #### Methods:
+    - start: None
+    - stop: None
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        threshold: float | None,
+        max_frames: int = 30,
+    ) -> None:
+        self.interval = interval
+        self.threshold = threshold
+        self.max_frames = max_frames
+        self.__beat = monotonic()
+        self.__heartbeat: asyncio.Task | None = None
+        self.__watchdog: threading.Thread | None = None
+        self.__stopped = threading.Event()
+
+    async def start(self) -> None:
+        """Start measuring the lag of the running loop."""
+        if self.__heartbeat is not None:
+            return None
+
+        loop = asyncio.get_running_loop()
+        self.__beat = monotonic()
+        self.__stopped.clear()
+        self.__heartbeat = asyncio.create_task(
+            self.__beating(), name="loop_monitor_heartbeat"
+        )
+        if self.threshold is not None:
+            self.__watchdog = threading.Thread(
+                target=self.__watching,
+                args=(loop, threading.get_ident()),
+                name="loop_monitor_watchdog",
+                daemon=True,
+            )
+            self.__watchdog.start()
+        return None
+
+    async def stop(self) -> None:
+        """Stop the heartbeat and the watchdog."""
+        if self.__heartbeat is None:
+            return None
+
+        self.__stopped.set()
+        self.__heartbeat.cancel()
+        await asyncio.gather(self.__heartbeat, return_exceptions=True)
+        self.__heartbeat = None
+        if self.__watchdog is not None:
+            self.__watchdog.join()
+            self.__watchdog = None
+        return None
+
+    async def __beating(self) -> None:
+        while True:
+            planned = monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            self.__beat = now = monotonic()
+            LOOP_LAG_SECONDS.observe(max(now - planned, 0))
+
+    def __watching(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        thread_id: int,
+    ) -> None:
+        """Log the stack of the loop thread once per blocking."""
+        reported_beat = None
+        while not self.__stopped.wait(self.threshold / 4):
+            beat = self.__beat
+            lag = monotonic() - beat - self.interval
+            if lag < self.threshold or beat == reported_beat:
+                continue
+
+            reported_beat = beat
+            LOOP_BLOCKS.inc()
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                continue
+
+            task = asyncio.current_task(loop)
+            stack = "".join(
+                traceback.format_stack(frame, limit=self.max_frames)
+            )
+            logger.warning(
+                "event loop is blocked for %.3f s in task %s:\n%s",
+                lag,
+                None if task is None else task.get_name(),
+                stack,
+            )
+
+
+loop_monitor = LoopMonitor(
+    interval=Limits.LOOP_LAG_CHECK_TIME,
+    threshold=settings.loop_block_threshold,
+)
@@ -0,0 +1,139 @@
+import os
+from time import perf_counter
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.registry import Collector
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# set by `src.server` before the workers import `prometheus_client`
+MULTIPROCESS_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "Handled HTTP requests.",
+    ("method", "route", "status"),
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time to handle an HTTP request.",
+    ("method", "route"),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+HTTP_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests being handled.",
+    ("method",),
+    multiprocess_mode="livesum",
+)
+
+_scrape_collectors: list[Collector] = []
+
+
+def is_multiprocess() -> bool:
+    """Check that the metrics are shared by the worker processes."""
+    return MULTIPROCESS_DIR_ENV in os.environ
+
+
+def register_collector(collector: Collector) -> None:
+    """Add a collector of values computed on every scrape.
+
+    Use it for values which can't be kept by the metrics, e.g. sizes
+    of in-memory structures. With many workers the collector is called
+    in the worker serving the scrape only.
+
+    #### Args:
+    - collector (Collector):
+        Collector with the `collect` method.
+    """
+    if is_multiprocess():
+        _scrape_collectors.append(collector)
+    else:
+        REGISTRY.register(collector)
+    return None
+
+
+def collect_metrics() -> bytes:
+    """Get all metrics in the text exposition format.
+
+    #### Returns:
+    - bytes:
+        Metrics of all workers with many workers,
+        else the metrics of the process.
+    """
+    if not is_multiprocess():
+        return generate_latest(REGISTRY)
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    for collector in _scrape_collectors:
+        registry.register(collector)
+    return generate_latest(registry)
+
+
+def metrics_endpoint(request: Request) -> Response:
+    """Serve the metrics, sync to read the files in the thread pool."""
+    return Response(collect_metrics(), media_type=CONTENT_TYPE_LATEST)
+
+
+def route_name(scope: Scope) -> str:
+    """Get the path template of the matched route.
+
+    Paths of unmatched requests are not used as labels,
+    so scans of random paths don't create new series.
+    """
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    if "endpoint" in scope:
+        # routes of the docs and of the metrics without parameters
+        return scope["path"]
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """Count requests, their statuses and time by routes.
+
+    #### Attrs:
+    - app (ASGIApp):
+        Wrapped application.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        status = 500  # the app failed before the response
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_progress = HTTP_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = route_name(scope)
+            HTTP_REQUEST_SECONDS.labels(method, route).observe(
+                perf_counter() - start
+            )
+            HTTP_REQUESTS.labels(method, route, status).inc()
+            in_progress.dec()
@@ -0,0 +1,159 @@
+import json
+import sys
+from hashlib import sha256
+
+from fastapi import FastAPI, Request, Response, status
+from fastapi.openapi.docs import (
+    get_redoc_html,
+    get_swagger_ui_html,
+    get_swagger_ui_oauth2_redirect_html,
+)
+
+
+def encode_schema(schema: dict) -> bytes:
+    """Encode the schema as `JSONResponse` does.
+
+    #### Args:
+    - schema (dict):
+        OpenAPI schema.
+
+    #### Returns:
+    - bytes:
+        Compact UTF-8 JSON.
+    """
+    return json.dumps(
+        schema,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class OpenAPIDocument:
+    """OpenAPI schema and docs pages served from memory.
+
+    The schema is built by `app.openapi` once, encoded once and sent
+    with an `ETag`, so the clients revalidate it with `304` responses.
+    Create the application with `openapi_url`, `docs_url` and
+    `redoc_url` set to `None` and call `setup` to add the routes.
+
+    #### Attrs:
+    - app (FastAPI):
+        Application to describe.
+    - openapi_url (str): Default `/openapi.json`.
+        Path of the schema.
+    - docs_url (str): Default `/docs`.
+        Path of Swagger UI.
+    - redoc_url (str): Default `/redoc`.
+        Path of ReDoc.
+
+    #### Methods:
+    - build: None
+    - response: Response
+    - setup: None
+    """
+
+    media_type = "application/json"
+    cache_control = "no-cache"  # always revalidate by the ETag
+
+    def __init__(
+        self,
+        app: FastAPI,
+        openapi_url: str = "/openapi.json",
+        docs_url: str = "/docs",
+        redoc_url: str = "/redoc",
+    ) -> None:
+        self.app = app
+        self.openapi_url = openapi_url
+        self.docs_url = docs_url
+        self.redoc_url = redoc_url
+        self.body: bytes | None = None
+        self.etag: str | None = None
+
+    def build(self) -> None:
+        """Build and encode the schema, call it when all routes are added."""
+        if self.body is None:
+            self.body = encode_schema(self.app.openapi())
+            self.etag = f'"{sha256(self.body).hexdigest()[:32]}"'
+        return None
+
+    def __is_fresh(self, request: Request) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is None:
+            return False
+
+        for etag in if_none_match.split(","):
+            etag = etag.strip().removeprefix("W/")
+            if etag == self.etag or etag == "*":
+                return True
+        return False
+
+    def response(self, request: Request) -> Response:
+        """Get the schema, or `304` if the client has the same one.
+
+        #### Args:
+        - request (Request):
+            Request for the schema.
+
+        #### Returns:
+        - Response:
+            Response with the encoded schema.
+        """
+        self.build()
+        headers = {"ETag": self.etag, "Cache-Control": self.cache_control}
+        if self.__is_fresh(request):
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers=headers,
+            )
+        return Response(self.body, media_type=self.media_type, headers=headers)
+
+    def setup(self) -> None:
+        """Add the routes of the schema and of the docs pages."""
+        docs = get_swagger_ui_html(
+            openapi_url=self.openapi_url,
+            title=self.app.title + " - Swagger UI",
+            oauth2_redirect_url=self.app.swagger_ui_oauth2_redirect_url,
+            init_oauth=self.app.swagger_ui_init_oauth,
+            swagger_ui_parameters=self.app.swagger_ui_parameters,
+        ).body
+        redirect = get_swagger_ui_oauth2_redirect_html().body
+        redoc = get_redoc_html(
+            openapi_url=self.openapi_url,
+            title=self.app.title + " - ReDoc",
+        ).body
+
+        def html(body: bytes):
+            async def page(request: Request) -> Response:
+                return Response(body, media_type="text/html")
+
+            return page
+
+        async def openapi(request: Request) -> Response:
+            return self.response(request)
+
+        self.app.add_route(self.openapi_url, openapi, include_in_schema=False)
+        self.app.add_route(self.docs_url, html(docs), include_in_schema=False)
+        if self.app.swagger_ui_oauth2_redirect_url:
+            self.app.add_route(
+                self.app.swagger_ui_oauth2_redirect_url,
+                html(redirect),
+                include_in_schema=False,
+            )
+        self.app.add_route(
+            self.redoc_url, html(redoc), include_in_schema=False
+        )
+        return None
+
+
+if __name__ == "__main__":
+    # python -m src.core.openapi [path], print the schema without path
+    from src.main import openapi_document
+
+    openapi_document.build()
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "wb") as file:
+            file.write(openapi_document.body)
+    else:
+        sys.stdout.buffer.write(openapi_document.body)
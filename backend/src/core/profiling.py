@@ -0,0 +1,244 @@
+import asyncio
+import sys
+import threading
+from collections import Counter
+from contextvars import ContextVar
+from time import perf_counter, sleep, time
+from types import FrameType, SimpleNamespace
+from typing import Any
+
+from aiohttp import TraceConfig, TraceRequestEndParams, TraceRequestStartParams
+
+
+class Profile:
+    """Stack samples and timings of external calls of one request.
+
+    #### Attrs:
+    - id (str):
+        Identifier of the profile.
+    - method (str):
+        HTTP method of the request.
+    - path (str):
+        Path of the request.
+    - route (str | None):
+        Path template of the matched route.
+    - status (int | None):
+        Status of the response.
+    - started (float):
+        UNIX time of the start.
+    - seconds (float | None):
+        Duration of the request.
+    - stacks (Counter[str]):
+        Number of samples of every collapsed stack.
+    - spans (list[tuple[str, str, float, float]]):
+        (kind, name, start offset, seconds) of SQL, Redis and HTTP calls.
+
+    #### Methods:
+    - add_span: None
+    - finish: None
+    - to_dict: dict[str, Any]
+    """
+
+    __slots__ = (
+        "id",
+        "method",
+        "path",
+        "route",
+        "status",
+        "started",
+        "seconds",
+        "stacks",
+        "spans",
+        "max_spans",
+        "dropped_spans",
+        "__start",
+    )
+
+    def __init__(
+        self,
+        id: str,
+        method: str,
+        path: str,
+        max_spans: int,
+    ) -> None:
+        self.id = id
+        self.method = method
+        self.path = path
+        self.route: str | None = None
+        self.status: int | None = None
+        self.started = time()
+        self.seconds: float | None = None
+        self.stacks: Counter[str] = Counter()
+        self.spans: list[tuple[str, str, float, float]] = []
+        self.max_spans = max_spans
+        self.dropped_spans = 0
+        self.__start = perf_counter()
+
+    def add_span(self, kind: str, name: str, seconds: float) -> None:
+        """Add an external call which has just finished.
+
+        #### Args:
+        - kind (str):
+            `sql`, `redis` or `http`.
+        - name (str):
+            Statement, command or URL.
+        - seconds (float):
+            Duration of the call.
+        """
+        if len(self.spans) >= self.max_spans:
+            self.dropped_spans += 1
+            return None
+
+        offset = perf_counter() - self.__start - seconds
+        self.spans.append((kind, name, round(offset, 6), round(seconds, 6)))
+        return None
+
+    def finish(self, route: str) -> None:
+        self.route = route
+        self.seconds = perf_counter() - self.__start
+        return None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "started": self.started,
+            "seconds": self.seconds,
+            "samples": sum(self.stacks.values()),
+            "stacks": dict(self.stacks),
+            "spans": [
+                {"kind": kind, "name": name, "start": start, "seconds": sec}
+                for kind, name, start, sec in self.spans
+            ],
+            "dropped_spans": self.dropped_spans,
+        }
+
+
+def collapsed_stacks(stacks: dict[str, int]) -> str:
+    """Get the stacks in the format of `flamegraph.pl` and speedscope.
+
+    #### Args:
+    - stacks (dict[str, int]):
+        Number of samples of every collapsed stack.
+
+    #### Returns:
+    - str:
+        Line `frame;frame;frame count` for every stack.
+    """
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.items())
+
+
+current_profile: ContextVar[Profile | None] = ContextVar(
+    "current_profile", default=None
+)
+
+
+def record_span(kind: str, name: str, seconds: float) -> None:
+    """Add the call to the profile of the current request if it exists."""
+    profile = current_profile.get()
+    if profile is not None:
+        profile.add_span(kind, name, seconds)
+    return None
+
+
+def collapse_stack(frame: FrameType, max_depth: int) -> str:
+    """Get the stack as `module:function` names from the root."""
+    names = []
+    while frame is not None and len(names) < max_depth:
+        module = frame.f_globals.get("__name__", "?")
+        names.append(f"{module}:{frame.f_code.co_qualname}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class StackSampler:
+    """Sample the stack of the loop thread for the profiled tasks.
+
+    A thread takes the stack every `interval` seconds while there are
+    profiled requests and adds it to the profile of the task running
+    at that moment. Time of a request waiting for I/O is not sampled,
+    it is in the spans of the profile.
+
+    #### Attrs:
+    - interval (float):
+        Seconds between the samples.
+    - max_depth (int):
+        Maximum frames of a stack.
+
+    #### Methods:
+    - add: None
+    - remove: None
+    """
+
+    def __init__(self, interval: float, max_depth: int) -> None:
+        self.interval = interval
+        self.max_depth = max_depth
+        self.__profiles: dict[asyncio.Task, Profile] = {}
+        self.__active = threading.Event()
+        self.__lock = threading.Lock()
+        self.__thread: threading.Thread | None = None
+
+    def add(self, task: asyncio.Task, profile: Profile) -> None:
+        """Start sampling the task, call it from the loop thread."""
+        if self.__thread is None:
+            self.__thread = threading.Thread(
+                target=self.__run,
+                args=(asyncio.get_running_loop(), threading.get_ident()),
+                name="stack_sampler",
+                daemon=True,
+            )
+            self.__thread.start()
+
+        with self.__lock:
+            self.__profiles[task] = profile
+            self.__active.set()
+        return None
+
+    def remove(self, task: asyncio.Task) -> None:
+        """Stop sampling the task, the profile is not changed after it."""
+        with self.__lock:
+            self.__profiles.pop(task, None)
+            if not self.__profiles:
+                self.__active.clear()
+        return None
+
+    def __run(self, loop: asyncio.AbstractEventLoop, thread_id: int) -> None:
+        while self.__active.wait():
+            sleep(self.interval)
+            with self.__lock:
+                profile = self.__profiles.get(asyncio.current_task(loop))
+                frame = sys._current_frames().get(thread_id)
+                if profile is not None and frame is not None:
+                    stack = collapse_stack(frame, self.max_depth)
+                    profile.stacks[stack] += 1
+
+
+async def _on_request_start(
+    session: Any,
+    context: SimpleNamespace,
+    params: TraceRequestStartParams,
+) -> None:
+    context.start = perf_counter()
+
+
+async def _on_request_end(
+    session: Any,
+    context: SimpleNamespace,
+    params: TraceRequestEndParams,
+) -> None:
+    record_span(
+        "http",
+        f"{params.method} {params.url.host}{params.url.path}",
+        perf_counter() - context.start,
+    )
+
+
+def http_trace_config() -> TraceConfig:
+    """Get the config of `aiohttp.ClientSession` to profile requests."""
+    trace_config = TraceConfig()
+    trace_config.on_request_start.append(_on_request_start)
+    trace_config.on_request_end.append(_on_request_end)
+    return trace_config
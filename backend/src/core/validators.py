@@ -1,18 +1,32 @@
-from time import time
+import asyncio
+from time import monotonic, time
 
+from dns.asyncresolver import Resolver
+from dns.exception import DNSException
+from dns.resolver import NXDOMAIN, NoAnswer
 from email_validator import (
     EmailNotValidError,
     EmailUndeliverableError,
     validate_email,
 )
+from prometheus_client import Counter
 from src.config import Limits
 
 from .exceptions import BadRequestException
 
+EMAIL_DOMAIN_CHECKS = Counter(
+    "email_domain_checks_total",
+    "Deliverability checks of email domains.",
+    ("result",),
+)
+
 
 def email_validator(email: str) -> str:
     """Validate and normalize email address.
 
+    Only the syntax is checked, see `EmailDomainChecker`
+    for the deliverability.
+
     #### Args:
     - email (str):
         Email address for validation.
@@ -26,13 +40,143 @@ def email_validator(email: str) -> str:
         Valid email addres.
     """
     try:
-        email = validate_email(email).email.lower()
+        email = validate_email(email, check_deliverability=False)
+        email = email.email.lower()
     except (EmailNotValidError, EmailUndeliverableError) as exc:
         raise BadRequestException(exc.args)
 
     return email
 
 
+class EmailDomainChecker:
+    """Asynchronous check that the email domain can receive mail.
+
+    Results are cached per domain, concurrent checks of the same domain
+    wait for one DNS lookup. Resolver failures don't reject the email
+    and are not cached.
+
+    #### Attrs:
+    - expire (int):
+        Seconds to keep a deliverable domain.
+    - expire_not_found (int):
+        Seconds to keep an undeliverable domain.
+    - max_size (int):
+        Maximum number of cached domains.
+    - timeout (float):
+        Seconds for the DNS lookup.
+
+    #### Methods:
+    - is_deliverable: bool
+    - check: None
+    """
+
+    expire = Limits.EMAIL_DOMAIN_CACHE_TIME
+    expire_not_found = Limits.EMAIL_DOMAIN_NOT_FOUND_CACHE_TIME
+    max_size = Limits.EMAIL_DOMAIN_CACHE_SIZE
+    timeout = Limits.EMAIL_DOMAIN_TIMEOUT
+
+    def __init__(self) -> None:
+        self.__cache: dict[str, tuple[bool, float]] = {}
+        self.__in_flight: dict[str, asyncio.Task] = {}
+        self.__resolver: Resolver | None = None
+
+    async def __resolve(self, domain: str) -> bool | None:
+        """Find the mail servers of the domain.
+
+        #### Args:
+        - domain (str):
+            Domain of the email.
+
+        #### Returns:
+        - bool | None:
+            Whether the domain has `MX` or address records,
+            `None` if the resolver failed.
+        """
+        for rdtype in ("MX", "A", "AAAA"):
+            try:
+                if self.__resolver is None:
+                    self.__resolver = Resolver()
+                    self.__resolver.lifetime = self.timeout
+                answer = await self.__resolver.resolve(domain, rdtype)
+            except NoAnswer:
+                continue
+            except NXDOMAIN:
+                return False
+            except DNSException:
+                # timeouts, failed servers and missing configuration
+                return None
+
+            if rdtype != "MX":
+                return True
+            # "0 ." is a null MX, the domain doesn't accept mail
+            return any(str(mx.exchange) != "." for mx in answer)
+        return False
+
+    async def __lookup(self, domain: str) -> bool:
+        try:
+            result = await self.__resolve(domain)
+        finally:
+            self.__in_flight.pop(domain, None)
+
+        if result is None:
+            EMAIL_DOMAIN_CHECKS.labels("error").inc()
+            return True
+
+        EMAIL_DOMAIN_CHECKS.labels("found" if result else "not_found").inc()
+        expire = self.expire if result else self.expire_not_found
+        if len(self.__cache) >= self.max_size:
+            # the oldest domain is the first one
+            self.__cache.pop(next(iter(self.__cache)))
+        self.__cache[domain] = (result, monotonic() + expire)
+        return result
+
+    async def is_deliverable(self, email: str) -> bool:
+        """Check that the email domain can receive mail.
+
+        #### Args:
+        - email (str):
+            Normalized email address.
+
+        #### Returns:
+        - bool:
+            Deliverable or not.
+        """
+        domain = email.rpartition("@")[2]
+        cached = self.__cache.get(domain)
+        if cached is not None:
+            result, expires_at = cached
+            if expires_at > monotonic():
+                EMAIL_DOMAIN_CHECKS.labels("cached").inc()
+                return result
+            del self.__cache[domain]
+
+        task = self.__in_flight.get(domain)
+        if task is None:
+            task = asyncio.create_task(self.__lookup(domain))
+            self.__in_flight[domain] = task
+        return await asyncio.shield(task)
+
+    async def check(self, email: str) -> None:
+        """Reject the email if its domain can't receive mail.
+
+        #### Args:
+        - email (str):
+            Normalized email address.
+
+        #### Raises:
+        - BadRequestException:
+            The domain doesn't accept email.
+        """
+        if not await self.is_deliverable(email):
+            raise BadRequestException(
+                f"the domain of `{email}` does not accept email"
+            )
+        return None
+
+
+email_domain_checker = EmailDomainChecker()
+
+
 def password_validator(password: str) -> str:
     """Check password for complexity.
 
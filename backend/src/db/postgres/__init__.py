@@ -1,2 +1,5 @@
 from .crud import CRUD
 from .database import Base, get_db, postgres_url
+from .pagination import NEXT_CURSOR_HEADER, set_next_cursor
+from .replica import get_read_db
+from .routing import SessionRoute
@@ -1,26 +1,111 @@
-from sqlalchemy import select, update
+import json
+from datetime import date, datetime
+from hashlib import sha1
+from typing import Any, Iterable
+
+from sqlalchemy import inspect, literal, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio.session import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.sql import Select
 from sqlalchemy.sql.elements import BinaryExpression
 from src.config import Limits
-from src.db.postgres.database import Base
+from src.db.postgres.database import Base, areplica_engine
+from src.db.redis.cache import ReadThroughCache
+
+from .pagination import decode_cursor, encode_cursor
 
 
 class CRUD:
     """The set of `CRUD` operations.
 
+    With `cache` the results of `get` and `get_many` read from the
+    primary are cached. A cached object is merged to the session
+    without a query, as if it was loaded. The writes of the class
+    invalidate the cache, other writes to the table must call
+    `invalidate`.
+
+    #### Attrs:
+    - model (Base):
+        Table of the operations.
+    - cache (ReadThroughCache | None): Default `None`.
+        Cache of the reads, `None` to read from the database only.
+
     #### Methods:
     - save: tuple[Base, None] | tuple[None, str]
     - create: tuple[Base, None] | tuple[None, str]
+    - create_many: list[tuple[Base, None] | tuple[None, str]]
+    - upsert_many: list[Base]
     - get_many: list[Base]
+    - get_page: tuple[list[Base], str | None]
     - get: Base | None
     - update: tuple[Base, None] | tuple[None, str]
+    - invalidate: None
     """
 
     model: Base
 
-    def __init__(self, model: Base) -> None:
+    def __init__(
+        self,
+        model: Base,
+        cache: ReadThroughCache | None = None,
+    ) -> None:
         self.model = model
+        self.cache = cache
+
+    def __tags(self, *ids: int) -> list[str]:
+        """Get the tags of the objects and of the queries by filters."""
+        table = self.model.__tablename__
+        return [f"{table}:all", *(f"{table}:{id}" for id in ids)]
+
+    async def invalidate(self, *ids: int) -> None:
+        """Remove the cached objects and the cached filter results.
+
+        #### Args:
+        - ids (int):
+            IDs of the changed or deleted objects.
+        """
+        if self.cache is not None:
+            await self.cache.invalidate(*self.__tags(*ids))
+        return None
+
+    def __dump(self, obj: Base) -> dict[str, Any]:
+        data = {}
+        for column in self.model.__table__.columns:
+            value = getattr(obj, column.key)
+            if isinstance(value, (date, datetime)):
+                value = value.isoformat()
+            data[column.key] = value
+        return data
+
+    async def __load(self, db: AsyncSession, data: dict[str, Any]) -> Base:
+        for column in self.model.__table__.columns:
+            value = data.get(column.key)
+            if isinstance(value, str) and column.type.python_type in (
+                date,
+                datetime,
+            ):
+                data[column.key] = column.type.python_type.fromisoformat(value)
+        obj = self.model(**data)
+        # persistent like a loaded object, `save` must not insert it again
+        make_transient_to_detached(obj)
+        return await db.merge(obj, load=False)
+
+    def __cache_key(self, db: AsyncSession, stmt: Select) -> str | None:
+        """Get the key of the statement if its result can be cached.
+
+        Reads from the replica are not cached, they can be older than
+        the last invalidation.
+        """
+        if self.cache is None or db.bind is areplica_engine:
+            return None
+
+        compiled = stmt.compile(dialect=db.bind.dialect)
+        params = sorted(compiled.params.items())
+        digest = sha1(f"{compiled.string}{params!r}".encode()).hexdigest()
+        return f"{self.model.__tablename__}:{digest}"
 
     async def save(
         self,
@@ -49,6 +134,7 @@ class CRUD:
         except IntegrityError as err:
             return None, err.args[0].split(":")[1]
 
+        await self.invalidate(obj.id)
         if need_refresh:
             await db.refresh(obj)
         return obj, None
@@ -77,6 +163,161 @@ class CRUD:
         db_obj = self.model(**new_obj)
         return await self.save(db, db_obj, need_refresh)
 
+    def __chunks(
+        self,
+        rows: list[dict],
+        chunk_size: int,
+    ) -> Iterable[list[dict]]:
+        """Split rows to fit the limit of bind parameters.
+
+        #### Args:
+        - rows (list[dict]):
+            Rows with the same keys.
+        - chunk_size (int):
+            Maximum number of rows in the statement.
+
+        #### Yields:
+        - list[dict]:
+            Chunk of the rows.
+        """
+        columns = max(len(rows[0]), 1)
+        size = max(min(chunk_size, Limits.MAX_BIND_PARAMS // columns), 1)
+        for start in range(0, len(rows), size):
+            end = start + size
+            yield rows[start:end]
+
+    @staticmethod
+    def __key(obj: Base | dict, columns: Iterable[str]) -> tuple[Any, ...]:
+        if isinstance(obj, dict):
+            return tuple(obj.get(col) for col in columns)
+        return tuple(getattr(obj, col) for col in columns)
+
+    async def create_many(
+        self,
+        db: AsyncSession,
+        new_objs: Iterable[dict],
+        unique: tuple[str, ...] = (),
+        chunk_size: int = Limits.BULK_CHUNK_SIZE,
+    ) -> list[tuple[Base, None] | tuple[None, str]]:
+        """Create new objects in the database by batches.
+
+        Every chunk is one `INSERT ... ON CONFLICT DO NOTHING RETURNING`
+        statement, all chunks are committed together.
+
+        #### Args:
+        - db (AsyncSession):
+            Connecting to the database.
+        - new_objs (Iterable[dict]):
+            Data to save to the database, all dicts with the same keys
+            and the values of the column types.
+        - unique (tuple[str, ...]): Default all keys of the data.
+            Columns to match the created objects with the data.
+        - chunk_size (int): Default from ` app settings`.
+            Maximum number of objects in one statement.
+
+        #### Returns:
+        - list[tuple[Base, None] | tuple[None, str]]:
+            Outcome for every dict in the same order:
+            (Base, None) if the object is created.
+            (None, error description) if the object is not created.
+        """
+        rows = list(new_objs)
+        if not rows:
+            return []
+
+        unique = unique or tuple(rows[0])
+        created: dict[tuple, Base] = {}
+        try:
+            for chunk in self.__chunks(rows, chunk_size):
+                stmt = (
+                    insert(self.model)
+                    .values(chunk)
+                    .on_conflict_do_nothing()
+                    .returning(self.model)
+                )
+                for obj in await db.scalars(stmt):
+                    created[self.__key(obj, unique)] = obj
+            await db.commit()
+        except IntegrityError as err:
+            await db.rollback()
+            return [(None, err.args[0].split(":")[1])] * len(rows)
+
+        await self.invalidate(*(obj.id for obj in created.values()))
+
+        result = []
+        for row in rows:
+            obj = created.pop(self.__key(row, unique), None)
+            if obj is None:
+                result.append((None, "already exists"))
+            else:
+                result.append((obj, None))
+        return result
+
+    async def upsert_many(
+        self,
+        db: AsyncSession,
+        objs: Iterable[dict],
+        index_elements: tuple[str, ...],
+        chunk_size: int = Limits.BULK_CHUNK_SIZE,
+    ) -> list[Base]:
+        """Create new objects or update the existing ones by batches.
+
+        Every chunk is one `INSERT ... ON CONFLICT DO UPDATE RETURNING`
+        statement, all chunks are committed together.
+
+        #### Args:
+        - db (AsyncSession):
+            Connecting to the database.
+        - objs (Iterable[dict]):
+            Data to save to the database, all dicts with the same keys
+            and the values of the column types.
+        - index_elements (tuple[str, ...]):
+            Columns of the unique index to find the existing objects.
+        - chunk_size (int): Default from ` app settings`.
+            Maximum number of objects in one statement.
+
+        #### Raises:
+        - IntegrityError:
+            The data breaks another constraint.
+
+        #### Returns:
+        - list[Base]:
+            Saved object for every dict in the same order.
+        """
+        objs = list(objs)
+        keys = [self.__key(row, index_elements) for row in objs]
+        # a statement can't update one row twice, the last data wins
+        rows = dict(zip(keys, objs))
+        if not rows:
+            return []
+
+        saved: dict[tuple, Base] = {}
+        try:
+            for chunk in self.__chunks(list(rows.values()), chunk_size):
+                stmt = insert(self.model).values(chunk)
+                update_columns = [
+                    col for col in chunk[0] if col not in index_elements
+                ] or index_elements[:1]
+                stmt = (
+                    stmt.on_conflict_do_update(
+                        index_elements=index_elements,
+                        set_={
+                            col: stmt.excluded[col] for col in update_columns
+                        },
+                    )
+                    .returning(self.model)
+                    .execution_options(populate_existing=True)
+                )
+                for obj in await db.scalars(stmt):
+                    saved[self.__key(obj, index_elements)] = obj
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            raise
+
+        await self.invalidate(*(obj.id for obj in saved.values()))
+        return [saved[key] for key in keys]
+
     async def get_many(
         self,
         db: AsyncSession,
@@ -101,10 +342,100 @@ class CRUD:
             List of objects.
         """
         limit = min(limit, Limits.DEFAULT_PAGINATION_SIZE)
-        stmt = select(self.model).offset(offset).limit(limit)
+        stmt = (
+            select(self.model)
+            .order_by(self.model.id)
+            .offset(offset)
+            .limit(limit)
+        )
+        if expression is not None:
+            stmt = stmt.where(expression)
+
+        key = self.__cache_key(db, stmt)
+        if key is None:
+            return (await db.scalars(stmt)).all()
+
+        cached = await self.cache.get(key)
+        if cached is not None:
+            return [await self.__load(db, data) for data in json.loads(cached)]
+
+        version = await self.cache.version()
+        objs = (await db.scalars(stmt)).all()
+        if version is not None:
+            await self.cache.set(
+                key,
+                json.dumps([self.__dump(obj) for obj in objs]),
+                self.__tags(),
+                Limits.READ_CACHE_TIME,
+                version,
+            )
+        return objs
+
+    async def get_page(
+        self,
+        db: AsyncSession,
+        cursor: str | None = None,
+        limit: int | None = Limits.DEFAULT_PAGINATION_SIZE,
+        expression: BinaryExpression | None = None,
+        order_by: str = "id",
+    ) -> tuple[list[Base], str | None]:
+        """Get a page of objects after the cursor.
+
+        Unlike `get_many` the page is found by the index,
+        so the deep pages are as fast as the first one.
+        The sort column must be indexed and not nullable.
+
+        #### Args:
+        - db (AsyncSession):
+            Connecting to the database.
+        - cursor (str | None): Default `None`.
+            Cursor from the previous page, `None` for the first page.
+        - limit (int): Default and maximum from ` app settings`.
+            Limit the number of objects returned from a query.
+        - expression (BinaryExpression): Default `None`.
+            Filter expression.
+        - order_by (str): Default `id`.
+            Name of the sort column.
+
+        #### Raises:
+        - BadRequestException:
+            Invalid cursor.
+
+        #### Returns:
+        - tuple[list[Base], str | None]:
+            (List of objects, cursor for the next page or `None`).
+        """
+        limit = min(limit, Limits.DEFAULT_PAGINATION_SIZE)
+        column = getattr(self.model, order_by)
+        stmt = select(self.model)
+        if order_by == "id":
+            stmt = stmt.order_by(self.model.id)
+        else:
+            stmt = stmt.order_by(column, self.model.id)
+
+        if cursor is not None:
+            value, last_id = decode_cursor(
+                cursor, order_by, column.type.python_type
+            )
+            if order_by == "id":
+                stmt = stmt.where(self.model.id > last_id)
+            else:
+                stmt = stmt.where(
+                    tuple_(column, self.model.id)
+                    > tuple_(literal(value, column.type), last_id)
+                )
+
         if expression is not None:
             stmt = stmt.where(expression)
-        return (await db.scalars(stmt)).all()
+
+        # one more object shows that the next page exists
+        objs = (await db.scalars(stmt.limit(limit + 1))).all()
+        if len(objs) <= limit:
+            return objs, None
+
+        objs = objs[:limit]
+        last = objs[-1]
+        return objs, encode_cursor(order_by, getattr(last, order_by), last.id)
 
     async def get(
         self,
@@ -123,7 +454,30 @@ class CRUD:
         - Base | None:
             An object if it exists in the database else None.
         """
-        return await db.scalar(select(self.model).where(expression).limit(1))
+        stmt = select(self.model).where(expression).limit(1)
+        key = self.__cache_key(db, stmt)
+        if key is None:
+            return await db.scalar(stmt)
+
+        cached = await self.cache.get(key)
+        if cached is not None:
+            data = json.loads(cached)
+            return None if data is None else await self.__load(db, data)
+
+        version = await self.cache.version()
+        obj = await db.scalar(stmt)
+        if version is None:
+            return obj
+
+        if obj is None:
+            # any new object can match the filter
+            value, tags = None, self.__tags()
+        else:
+            value, tags = self.__dump(obj), self.__tags(obj.id)[1:]
+        await self.cache.set(
+            key, json.dumps(value), tags, Limits.READ_CACHE_TIME, version
+        )
+        return obj
 
     async def update(
         self,
@@ -134,6 +488,13 @@ class CRUD:
     ) -> tuple[Base, None] | tuple[None, str]:
         """Update object in the database.
 
+        Values of the mapped columns equal to the loaded ones are not
+        written, and nothing is sent to the database if all of them are
+        equal. Expired or not loaded columns are always written. The
+        changed values are set to the object, with `need_refresh` the
+        whole row is read back by `UPDATE ... RETURNING` in the same
+        statement.
+
         #### Args:
         - db (AsyncSession):
             Connecting to the database.
@@ -149,14 +510,40 @@ class CRUD:
             (Base, None) if the save is successful.
             (None, error description) if the save is not successful.
         """
-        await db.execute(
+        state = inspect(obj)
+        column_attrs = state.mapper.column_attrs.keys()
+        changes = {}
+        for key, value in update_data.items():
+            if key in column_attrs and key not in state.unloaded:
+                # an unflushed value of the attribute is not in the database
+                if [value] == list(state.attrs[key].history.unchanged):
+                    continue
+            changes[key] = value
+        if not changes:
+            return obj, None
+
+        columns = changes.keys()
+        if need_refresh:
+            columns = [col.key for col in self.model.__table__.columns]
+
+        stmt = (
             update(self.model)
             .where(self.model.id == obj.id)
-            .values(update_data)
+            .values(changes)
+            .returning(*(getattr(self.model, key) for key in columns))
+            .execution_options(synchronize_session=False)
         )
-        await db.commit()
-        if not need_refresh:
-            return obj, None
+        try:
+            row = (await db.execute(stmt)).first()
+            await db.commit()
+        except IntegrityError as err:
+            await db.rollback()
+            return None, err.args[0].split(":")[1]
+
+        await self.invalidate(obj.id)
+        if row is None:
+            return None, f"object with ID `{obj.id}` doesn't exists"
 
-        await db.refresh(obj)
+        for key, value in row._mapping.items():
+            set_committed_value(obj, key, value)
         return obj, None
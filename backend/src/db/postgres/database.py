@@ -1,9 +1,14 @@
+import asyncio
+from contextlib import AsyncExitStack
 from typing import Generator
 
-import asyncpg
-from asyncpg.connection import Connection
-from sqlalchemy import Integer
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from fastapi import Request
+from sqlalchemy import Integer, text
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    create_async_engine,
+)
 from sqlalchemy.orm import (
     Mapped,
     declarative_base,
@@ -13,6 +18,9 @@ from sqlalchemy.orm import (
 from src.config import settings
 from src.core.utils import postgres_dsn
 
+from .pool import engine_options, instrument_pool
+from .stats import record_queries
+
 
 class IDTable:
     """Mixin to add `id` field to table with integer type as primary key.
@@ -36,12 +44,43 @@ postgres_url = postgres_dsn(
 Base = declarative_base(cls=IDTable)
 
 
-aengine = create_async_engine(
-    url=postgres_url,
-    echo=settings.debug,
-)
+def create_engine(url: str, label: str) -> AsyncEngine:
+    """Create the engine with the profile from settings.
 
-aengine.echo = True
+    #### Args:
+    - url (str):
+        Database URL.
+    - label (str):
+        Name of the engine in the metrics.
+
+    #### Returns:
+    - AsyncEngine:
+        Engine with the instrumented pool.
+    """
+    engine = create_async_engine(
+        url=url,
+        **engine_options(
+            settings.db_profile,
+            label,
+            echo=settings.db_echo,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+            pool_pre_ping=settings.db_pool_pre_ping,
+            command_timeout=settings.db_command_timeout,
+            statement_cache_size=settings.db_statement_cache_size,
+        ),
+    )
+    instrument_pool(engine.sync_engine)
+    record_queries(engine.sync_engine)
+    return engine
+
+
+aengine = create_engine(postgres_url, "primary")
+
+# key of the ASGI scope for the sessions opened by `get_db`
+SESSIONS_SCOPE_KEY = "db_sessions"
 
 ASessionMaker = sessionmaker(
     bind=aengine,
@@ -51,25 +90,81 @@ ASessionMaker = sessionmaker(
     expire_on_commit=False,
 )
 
-
-async def get_db() -> Generator[AsyncSession, None, None]:
-    """Get connection to the Postgres."""
+areplica_engine: AsyncEngine | None = None
+AReadSessionMaker = ASessionMaker
+if settings.postgres_replica_host:
+    areplica_engine = create_engine(
+        postgres_dsn(
+            user=settings.postgres_user,
+            password=settings.postgres_password,
+            host=settings.postgres_replica_host,
+            port=settings.postgres_replica_port or settings.postgres_port,
+            db_name=settings.postgres_db_name,
+        ),
+        "replica",
+    )
+    AReadSessionMaker = sessionmaker(
+        bind=areplica_engine,
+        class_=AsyncSession,
+        autoflush=False,
+        autocommit=False,
+        expire_on_commit=False,
+    )
+
+
+async def get_db(request: Request) -> Generator[AsyncSession, None, None]:
+    """Get connection to the Postgres.
+
+    The session is closed by `SessionRoute` as soon as the endpoint
+    returns, so background tasks don't hold the pooled connection.
+    """
     async with ASessionMaker() as session:
+        request.scope.setdefault(SESSIONS_SCOPE_KEY, []).append(session)
         yield session
 
 
-async def check_postgres() -> None:
-    """Check connection to the PostgresSQL.
+async def release_sessions(request: Request) -> None:
+    """Return connections of the request sessions to the pool.
+
+    #### Args:
+    - request (Request):
+        Request of the endpoint.
+    """
+    for session in request.scope.pop(SESSIONS_SCOPE_KEY, ()):
+        await session.close()
+    return None
+
+
+async def check_postgres(connections: int | None = None) -> None:
+    """Check connection to the PostgresSQL and fill the pool.
+
+    The connections are opened concurrently and returned to the pool,
+    so the first requests of the worker don't wait for them.
+
+    #### Args:
+    - connections (int | None): Default `None`.
+        Number of connections to open, the pool size if `None`.
+        It is limited by the pool size, the overflow is not kept.
 
     #### Raises:
     - ConnectionError:
         No connection to PostgreSQL.
     """
+    size = aengine.pool.size()
+    count = max(size if connections is None else min(connections, size), 1)
     try:
-        dsn = postgres_url.replace("+asyncpg", "")
-        conn: Connection = await asyncpg.connect(dsn)
-        await conn.execute("SELECT 1;")
-        await conn.close()
+        async with AsyncExitStack() as stack:
+            conns = await asyncio.gather(
+                *(
+                    stack.enter_async_context(aengine.connect())
+                    for _ in range(count)
+                ),
+                return_exceptions=True,
+            )
+            for conn in conns:
+                if isinstance(conn, BaseException):
+                    raise conn
+            await conns[0].execute(text("SELECT 1;"))
     except Exception as exc:
         raise ConnectionError(
             f"\n\n\033[101mNo connection to PostgreSQL!\n{exc}\033[0m"
@@ -0,0 +1,80 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from datetime import date, datetime
+from typing import Any
+
+from fastapi import Response
+from src.core.exceptions import BadRequestException
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(order_by: str, value: Any, last_id: int) -> str:
+    """Create an opaque cursor pointing after the object.
+
+    #### Args:
+    - order_by (str):
+        Name of the sort column.
+    - value (Any):
+        Value of the sort column of the last object.
+    - last_id (int):
+        Identifier of the last object.
+
+    #### Returns:
+    - str:
+        Cursor for the next page.
+    """
+    if isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    raw = json.dumps((order_by, value, last_id), separators=(",", ":"))
+    return urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(
+    cursor: str,
+    order_by: str,
+    python_type: type,
+) -> tuple[Any, int]:
+    """Get the position from the cursor.
+
+    #### Args:
+    - cursor (str):
+        Cursor from the previous page.
+    - order_by (str):
+        Name of the sort column.
+    - python_type (type):
+        Type of the sort column.
+
+    #### Raises:
+    - BadRequestException:
+        The cursor is invalid or created for another sort column.
+
+    #### Returns:
+    - tuple[Any, int]:
+        (value of the sort column, identifier) of the last object.
+    """
+    try:
+        raw = urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        column, value, last_id = json.loads(raw)
+        if column != order_by or not isinstance(last_id, int):
+            raise ValueError
+        if value is not None and python_type in (date, datetime):
+            value = python_type.fromisoformat(value)
+    except (BinasciiError, UnicodeDecodeError, TypeError, ValueError):
+        raise BadRequestException("invalid cursor")
+    return value, last_id
+
+
+def set_next_cursor(response: Response, cursor: str | None) -> None:
+    """Pass the cursor of the next page in the response header.
+
+    #### Args:
+    - response (Response):
+        Response of the endpoint.
+    - cursor (str | None):
+        Cursor for the next page, `None` for the last page.
+    """
+    if cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+    return None
@@ -0,0 +1,95 @@
+from time import perf_counter
+from typing import Any
+
+from prometheus_client import Gauge, Histogram
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
+from src.db.profiles import ENGINE_PROFILES
+
+POOL_WAIT_SECONDS = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time to get a connection from the pool.",
+    ("engine",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30),
+)
+POOL_IN_USE = Gauge(
+    "db_pool_connections_in_use",
+    "Connections checked out from the pool.",
+    ("engine",),
+    multiprocess_mode="livesum",
+)
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool which measures the time of waiting for a connection."""
+
+    metric_label = "primary"
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        start = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_WAIT_SECONDS.labels(self.metric_label).observe(
+                perf_counter() - start
+            )
+
+
+def engine_options(
+    profile: str,
+    label: str = "primary",
+    **overrides: Any,
+) -> dict[str, Any]:
+    """Get keyword arguments of `create_async_engine` for the profile.
+
+    #### Args:
+    - profile (str):
+        Name of the profile from `ENGINE_PROFILES`.
+    - label (str): Default `primary`.
+        Name of the engine in the metrics.
+    - overrides (Any):
+        Values to replace the profile ones, `None` is skipped.
+
+    #### Returns:
+    - dict[str, Any]:
+        Arguments for the engine.
+    """
+    options = ENGINE_PROFILES[profile].copy()
+    options.update((k, v) for k, v in overrides.items() if v is not None)
+
+    connect_args = {
+        "prepared_statement_cache_size": options.pop("statement_cache_size")
+    }
+    command_timeout = options.pop("command_timeout")
+    if command_timeout is not None:
+        connect_args["command_timeout"] = command_timeout
+
+    options["connect_args"] = connect_args
+    # the label is kept by the class, because `dispose` recreates the pool
+    options["poolclass"] = type(
+        InstrumentedPool.__name__,
+        (InstrumentedPool,),
+        {"metric_label": label},
+    )
+    return options
+
+
+def instrument_pool(engine: Engine) -> None:
+    """Count connections checked out from the pool of the engine.
+
+    #### Args:
+    - engine (Engine):
+        Sync engine of the async engine with `InstrumentedPool`.
+    """
+    in_use = POOL_IN_USE.labels(engine.pool.metric_label)
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(*args: Any) -> None:
+        in_use.inc()
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(*args: Any) -> None:
+        in_use.dec()
+
+    return None
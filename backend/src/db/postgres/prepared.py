@@ -0,0 +1,135 @@
+from itertools import count
+from time import perf_counter
+from typing import Any, Mapping
+from weakref import WeakKeyDictionary
+
+from asyncpg import Connection
+from asyncpg.exceptions import (
+    InvalidCachedStatementError,
+    InvalidSQLStatementNameError,
+)
+from asyncpg.prepared_stmt import PreparedStatement
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+from src.config import settings
+
+from .stats import record_query
+
+_serial = count(1)
+
+
+class PreparedQuery:
+    """Select executed as a named prepared statement of `asyncpg`.
+
+    The statement is compiled by SQLAlchemy once, prepared once on every
+    connection and executed without ORM compilation and hydration.
+    Use it only for hot read paths, writes must go through the ORM.
+    Without prepared statements, e.g. behind a transaction pooler,
+    the statement is executed by the session. The driver doesn't emit
+    the events of the engine, so the statement is recorded for the
+    stats of the request here.
+
+    #### Attrs:
+    - name (str):
+        Prefix of the names of the prepared statements.
+    - stmt (Select):
+        Statement with named bind parameters.
+
+    #### Methods:
+    - fetchrow: Mapping[str, Any] | None
+    """
+
+    enabled = settings.db_prepared_statements
+
+    def __init__(self, name: str, stmt: Select) -> None:
+        # a rebuilt query must not collide with the prepared old one
+        self.name = f"{name}_{next(_serial)}"
+        self.stmt = stmt
+        self.__sql: str | None = None
+        self.__params: tuple[str, ...] = ()
+        self.__defaults: dict[str, Any] = {}
+        self.__prepared: WeakKeyDictionary[
+            Connection, PreparedStatement
+        ] = WeakKeyDictionary()
+
+    def __compile(self, db: AsyncSession) -> str:
+        if self.__sql is None:
+            compiled = self.stmt.compile(dialect=db.bind.dialect)
+            self.__params = tuple(compiled.positiontup)
+            self.__defaults = compiled.params
+            self.__sql = compiled.string
+        return self.__sql
+
+    async def __get_statement(
+        self,
+        db: AsyncSession,
+        conn: Connection,
+    ) -> PreparedStatement:
+        statement = self.__prepared.get(conn)
+        if statement is None:
+            # the driver closes a dropped statement later, a new name
+            # doesn't collide with it
+            statement = await conn.prepare(
+                self.__compile(db), name=f"{self.name}_{next(_serial)}"
+            )
+            self.__prepared[conn] = statement
+        return statement
+
+    async def fetchrow(
+        self,
+        db: AsyncSession,
+        **values: Any,
+    ) -> Mapping[str, Any] | None:
+        """Execute the statement on the connection of the session.
+
+        #### Args:
+        - db (AsyncSession):
+            Connecting to the database.
+        - values (Any):
+            Values of the bind parameters.
+
+        #### Raises:
+        - InvalidCachedStatementError:
+            The schema was changed in the transaction of the session.
+        - InvalidSQLStatementNameError:
+            The statement was dropped from the connection.
+
+        #### Returns:
+        - Mapping[str, Any] | None:
+            The first row if it exists.
+        """
+        if not self.enabled:
+            row = (await db.execute(self.stmt, values)).first()
+            return None if row is None else row._mapping
+
+        raw = await (await db.connection()).get_raw_connection()
+        conn: Connection = raw.driver_connection
+        start = perf_counter()
+        try:
+            return await self.__fetchrow(db, conn, values)
+        finally:
+            record_query(self.__sql or self.name, perf_counter() - start)
+
+    async def __fetchrow(
+        self,
+        db: AsyncSession,
+        conn: Connection,
+        values: dict[str, Any],
+    ) -> Mapping[str, Any] | None:
+        statement = await self.__get_statement(db, conn)
+        args = [values.get(key, self.__defaults[key]) for key in self.__params]
+        try:
+            return await statement.fetchrow(*args)
+        except InvalidSQLStatementNameError:
+            # the statement was dropped from the connection
+            del self.__prepared[conn]
+            raise
+        except InvalidCachedStatementError:
+            # the schema was changed
+            del self.__prepared[conn]
+            if conn.is_in_transaction():
+                # the error failed the transaction, nothing can run in it
+                raise
+
+        statement = await self.__get_statement(db, conn)
+        return await statement.fetchrow(*args)
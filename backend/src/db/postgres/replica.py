@@ -0,0 +1,137 @@
+import asyncio
+import logging
+from time import monotonic
+from typing import Generator
+
+from fastapi import Request
+from prometheus_client import Counter, Gauge
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from src.config import Limits, settings
+
+from .database import (
+    SESSIONS_SCOPE_KEY,
+    AReadSessionMaker,
+    ASessionMaker,
+    areplica_engine,
+)
+
+logger = logging.getLogger(__name__)
+
+REPLICA_LAG_SECONDS = Gauge(
+    "db_replica_lag_seconds",
+    "Replication lag of the read replica, -1 if it is unavailable.",
+    multiprocess_mode="livemax",
+)
+READ_SESSIONS = Counter(
+    "db_read_sessions_total",
+    "Sessions opened for read-only endpoints.",
+    ("target",),
+)
+
+# a replica without WAL to replay is up to date even if the primary is idle
+LAG_QUERY = text(
+    "SELECT CASE"
+    " WHEN NOT pg_is_in_recovery()"
+    " OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE COALESCE("
+    "EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+    " END"
+)
+
+
+class ReplicaMonitor:
+    """Periodic check of the replica lag.
+
+    The lag is measured at most once in `check_time` seconds,
+    concurrent requests wait for the same check.
+
+    #### Attrs:
+    - engine (AsyncEngine | None):
+        Engine of the replica, `None` if there is no replica.
+    - max_lag (float):
+        Maximum lag in seconds to read from the replica.
+    - check_time (float):
+        Seconds between the checks.
+
+    #### Methods:
+    - is_usable: bool
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine | None,
+        max_lag: float,
+        check_time: float,
+    ) -> None:
+        self.engine = engine
+        self.max_lag = max_lag
+        self.check_time = check_time
+        self.lag: float | None = None
+        self.__checked_at = float("-inf")
+        self.__lock = asyncio.Lock()
+
+    async def __query(self) -> float:
+        async with self.engine.connect() as conn:
+            return await conn.scalar(LAG_QUERY)
+
+    async def __measure(self) -> float | None:
+        """Get the lag of the replica.
+
+        #### Returns:
+        - float | None:
+            Lag in seconds, `None` if the replica is unavailable.
+        """
+        try:
+            lag = await asyncio.wait_for(self.__query(), self.check_time)
+        except (DBAPIError, OSError, asyncio.TimeoutError) as exc:
+            logger.warning("replica is unavailable: %s", exc)
+            return None
+        return float(lag)
+
+    async def is_usable(self) -> bool:
+        """Check that reads can go to the replica.
+
+        #### Returns:
+        - bool:
+            The replica exists and its lag is not more than `max_lag`.
+        """
+        if self.engine is None:
+            return False
+
+        if monotonic() - self.__checked_at >= self.check_time:
+            async with self.__lock:
+                if monotonic() - self.__checked_at >= self.check_time:
+                    self.lag = await self.__measure()
+                    self.__checked_at = monotonic()
+                    REPLICA_LAG_SECONDS.set(
+                        -1 if self.lag is None else self.lag
+                    )
+
+        return self.lag is not None and self.lag <= self.max_lag
+
+
+replica_monitor = ReplicaMonitor(
+    engine=areplica_engine,
+    max_lag=settings.db_replica_max_lag,
+    check_time=Limits.REPLICA_LAG_CHECK_TIME,
+)
+
+
+async def get_read_db(request: Request) -> Generator[AsyncSession, None, None]:
+    """Get connection for reading only.
+
+    The replica is used if it is configured and not lagging,
+    otherwise the primary. Data written by the request itself
+    must be read with `get_db`.
+    """
+    if await replica_monitor.is_usable():
+        session_maker, target = AReadSessionMaker, "replica"
+    else:
+        session_maker, target = ASessionMaker, "primary"
+    READ_SESSIONS.labels(target).inc()
+
+    async with session_maker() as session:
+        request.scope.setdefault(SESSIONS_SCOPE_KEY, []).append(session)
+        yield session
@@ -0,0 +1,63 @@
+from typing import AsyncIterator, Callable, Coroutine
+
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.routing import APIRoute
+
+from .database import release_sessions
+
+
+async def release_after(
+    body: AsyncIterator[bytes | str],
+    request: Request,
+) -> AsyncIterator[bytes | str]:
+    """Stream the body and then close the sessions of the request.
+
+    #### Args:
+    - body (AsyncIterator[bytes | str]):
+        Body of the streaming response.
+    - request (Request):
+        Request of the endpoint.
+
+    #### Yields:
+    - bytes | str:
+        Chunk of the body.
+    """
+    try:
+        async for chunk in body:
+            yield chunk
+    finally:
+        await release_sessions(request)
+
+
+class SessionRoute(APIRoute):
+    """Route which closes the database sessions before the response is sent.
+
+    Cleanup of the yield dependencies runs after the background tasks
+    of the response, so without this route a slow background task
+    keeps the connection checked out from the pool. The body of
+    a streaming response can read the database, its sessions are
+    closed when the body is sent.
+    """
+
+    def get_route_handler(
+        self,
+    ) -> Callable[[Request], Coroutine[None, None, Response]]:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            try:
+                response = await handler(request)
+            except BaseException:
+                await release_sessions(request)
+                raise
+
+            if isinstance(response, StreamingResponse):
+                response.body_iterator = release_after(
+                    response.body_iterator, request
+                )
+            else:
+                await release_sessions(request)
+            return response
+
+        return route_handler
@@ -0,0 +1,185 @@
+from collections import Counter as StatementCounter
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any
+
+from prometheus_client import Histogram
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+from src.core.profiling import record_span
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+REQUEST_QUERIES = Histogram(
+    "db_queries_per_request",
+    "SQL statements executed by a request.",
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55),
+)
+REQUEST_DB_SECONDS = Histogram(
+    "db_seconds_per_request",
+    "Time of SQL statements executed by a request.",
+)
+
+
+class QueryLimitError(AssertionError):
+    """The request executed too many statements."""
+
+
+class QueryStats:
+    """Statements executed while handling one request.
+
+    #### Attrs:
+    - count (int):
+        Number of statements.
+    - seconds (float):
+        Total time of the statements.
+    - statements (Counter[str]):
+        Number of executions of every statement.
+    """
+
+    __slots__ = ("count", "seconds", "statements")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: StatementCounter[str] = StatementCounter()
+
+    def add(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.statements[statement] += 1
+        return None
+
+    def check(
+        self,
+        max_queries: int | None,
+        max_repeats: int | None,
+    ) -> None:
+        """Check that the request did not execute too many statements.
+
+        #### Args:
+        - max_queries (int | None):
+            Maximum number of statements, `None` for no limit.
+        - max_repeats (int | None):
+            Maximum number of executions of the same statement,
+            `None` for no limit.
+
+        #### Raises:
+        - QueryLimitError:
+            One of the limits is exceeded.
+        """
+        if max_queries is not None and self.count > max_queries:
+            raise QueryLimitError(
+                f"{self.count} queries, the limit is {max_queries}"
+            )
+
+        if max_repeats is None or not self.statements:
+            return None
+
+        statement, repeats = self.statements.most_common(1)[0]
+        if repeats > max_repeats:
+            raise QueryLimitError(
+                f"the query is repeated {repeats} times:\n{statement}"
+            )
+        return None
+
+
+query_stats: ContextVar[QueryStats | None] = ContextVar(
+    "query_stats", default=None
+)
+
+
+def record_query(statement: str, seconds: float) -> None:
+    """Add the statement to the stats and the profile of the request.
+
+    Statements executed by the driver without the engine, e.g. prepared
+    ones, must be recorded by this function.
+
+    #### Args:
+    - statement (str):
+        SQL of the statement.
+    - seconds (float):
+        Time of the statement.
+    """
+    stats = query_stats.get()
+    if stats is not None:
+        stats.add(statement, seconds)
+    record_span("sql", statement, seconds)
+    return None
+
+
+def _before_cursor_execute(conn: Connection, *args: Any) -> None:
+    conn.info.setdefault("query_start", []).append(perf_counter())
+
+
+def _after_cursor_execute(
+    conn: Connection,
+    cursor: Any,
+    statement: str,
+    *args: Any,
+) -> None:
+    record_query(statement, perf_counter() - conn.info["query_start"].pop())
+
+
+def record_queries(engine: Engine) -> None:
+    """Count statements of the engine for the current request.
+
+    #### Args:
+    - engine (Engine):
+        Sync engine of the async engine.
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    return None
+
+
+class SQLStatsMiddleware:
+    """Report statements of the request.
+
+    Number and time of the statements executed before the response
+    are sent in the `Server-Timing` header. The statements of the
+    background tasks are added to the metrics only.
+
+    #### Attrs:
+    - app (ASGIApp):
+        Wrapped application.
+    - max_queries (int | None): Default `None`.
+        Fail the request with more statements.
+    - max_repeats (int | None): Default `None`.
+        Fail the request with more executions of the same statement.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_queries: int | None = None,
+        max_repeats: int | None = None,
+    ) -> None:
+        self.app = app
+        self.max_queries = max_queries
+        self.max_repeats = max_repeats
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = QueryStats()
+        token = query_stats.set(stats)
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                stats.check(self.max_queries, self.max_repeats)
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f"db;dur={stats.seconds * 1000:.1f}"
+                    f';desc="{stats.count} queries"',
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            query_stats.reset(token)
+            REQUEST_QUERIES.observe(stats.count)
+            REQUEST_DB_SECONDS.observe(stats.seconds)
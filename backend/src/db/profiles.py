@@ -0,0 +1,74 @@
+from typing import Any
+
+# apart from the engine, `src.server` reads them before it is created
+ENGINE_PROFILES: dict[str, dict[str, Any]] = {
+    # small pool, statements are logged
+    "dev": {
+        "echo": True,
+        "pool_size": 5,
+        "max_overflow": 5,
+        "pool_timeout": 30,
+        "pool_recycle": -1,
+        "pool_pre_ping": True,
+        "command_timeout": None,
+        "statement_cache_size": 100,
+    },
+    # connections are checked and recycled before the server drops them
+    "prod": {
+        "echo": False,
+        "pool_size": 10,
+        "max_overflow": 10,
+        "pool_timeout": 10,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+        "command_timeout": 30,
+        "statement_cache_size": 1024,
+    },
+    # fixed pool without extra round trips on checkout
+    "bench": {
+        "echo": False,
+        "pool_size": 20,
+        "max_overflow": 0,
+        "pool_timeout": 5,
+        "pool_recycle": -1,
+        "pool_pre_ping": False,
+        "command_timeout": None,
+        "statement_cache_size": 1024,
+    },
+}
+
+
+def split_pool(
+    profile: str,
+    pools: int,
+    max_connections: int,
+    pool_size: int | None = None,
+    max_overflow: int | None = None,
+) -> tuple[int, int]:
+    """Get one pool to keep the connections of all pools in the limit.
+
+    #### Args:
+    - profile (str):
+        Name of the profile from `ENGINE_PROFILES`.
+    - pools (int):
+        Number of the pools, an engine of every process has one.
+    - max_connections (int):
+        Maximum connections of all pools.
+    - pool_size (int | None): Default from the profile.
+        Wanted size of one pool.
+    - max_overflow (int | None): Default from the profile.
+        Wanted overflow of one pool.
+
+    #### Returns:
+    - tuple[int, int]:
+        (pool size, overflow) of one pool, at least one connection.
+    """
+    options = ENGINE_PROFILES[profile]
+    per_pool = max(max_connections // pools, 1)
+    if pool_size is None:
+        pool_size = options["pool_size"]
+    if max_overflow is None:
+        max_overflow = options["max_overflow"]
+
+    pool_size = min(pool_size, per_pool)
+    return pool_size, min(max_overflow, per_pool - pool_size)
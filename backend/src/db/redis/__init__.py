@@ -1 +1 @@
-from .database import auth_db
+from .database import aauth_db, acache_db, auth_db
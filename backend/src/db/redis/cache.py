@@ -0,0 +1,338 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from time import monotonic
+from typing import Iterable
+
+from prometheus_client import Counter
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from src.config import Limits, RedisPrefixes
+
+from .database import acache_db
+
+logger = logging.getLogger(__name__)
+
+CACHE_REQUESTS = Counter(
+    "read_cache_requests_total",
+    "Lookups in the read-through cache.",
+    ("tier", "result"),
+)
+CACHE_EVICTIONS = Counter(
+    "read_cache_evictions_total",
+    "Entries removed from the in-process cache.",
+    ("reason",),
+)
+
+
+class LocalEntry:
+    __slots__ = ("value", "tags", "expires_at")
+
+    def __init__(
+        self,
+        value: str,
+        tags: frozenset[str],
+        expires_at: float,
+    ) -> None:
+        self.value = value
+        self.tags = tags
+        self.expires_at = expires_at
+
+
+class ReadThroughCache:
+    """Two-tier cache: in-process LRU in front of Redis.
+
+    Every value has tags. Invalidation of a tag removes the values
+    from Redis and publishes the tag, so every worker drops its local
+    copies. While the worker is not subscribed the local tier is not
+    used, because it could miss an invalidation. Every invalidation
+    increments the version in Redis, a value read from the database
+    is not cached if any worker invalidated something since.
+
+    #### Attrs:
+    - redis (Redis):
+        Redis for the shared tier and the messages.
+    - prefix (str):
+        Prefix of the keys in Redis.
+    - max_size (int):
+        Maximum number of values in the local tier.
+    - local_ttl (float):
+        Maximum seconds to keep a value in the local tier.
+
+    #### Methods:
+    - start: None
+    - stop: None
+    - get: str | None
+    - set: None
+    - invalidate: None
+    - version: tuple[int, int] | None
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        prefix: str,
+        max_size: int,
+        local_ttl: float,
+    ) -> None:
+        self.redis = redis
+        self.prefix = prefix
+        self.channel = prefix + "invalidate"
+        self.version_key = prefix + "version"
+        self.max_size = max_size
+        self.local_ttl = local_ttl
+        self.__local: OrderedDict[str, LocalEntry] = OrderedDict()
+        self.__tags: dict[str, set[str]] = {}
+        self.__generation = 0
+        self.__subscribed = False
+        self.__listener: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        """Subscribe to the invalidations of other workers."""
+        if self.__listener is None:
+            self.__listener = asyncio.create_task(
+                self.__listen(), name="read_cache_listener"
+            )
+        return None
+
+    async def stop(self) -> None:
+        """Unsubscribe and clear the local tier."""
+        if self.__listener is not None:
+            self.__listener.cancel()
+            await asyncio.gather(self.__listener, return_exceptions=True)
+            self.__listener = None
+        self.__clear_local()
+        return None
+
+    async def __listen(self) -> None:
+        """Drop local values of the published tags, reconnect on errors."""
+        delay = 1
+        while True:
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                # values set before the subscription could be stale
+                self.__clear_local()
+                self.__subscribed = True
+                delay = 1
+                async for message in pubsub.listen():
+                    self.__drop_local(message["data"].decode().split())
+            except (RedisError, OSError) as exc:
+                logger.warning("read cache is not subscribed: %s", exc)
+            finally:
+                self.__subscribed = False
+                try:
+                    await pubsub.close()
+                except (RedisError, OSError):
+                    pass
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, Limits.READ_CACHE_RECONNECT_TIME)
+
+    def __clear_local(self) -> None:
+        self.__local.clear()
+        self.__tags.clear()
+        self.__generation += 1
+        return None
+
+    def __remove_local(self, key: str, reason: str) -> None:
+        entry = self.__local.pop(key, None)
+        if entry is None:
+            return None
+
+        for tag in entry.tags:
+            keys = self.__tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.__tags[tag]
+        CACHE_EVICTIONS.labels(reason).inc()
+        return None
+
+    def __drop_local(self, tags: Iterable[str]) -> None:
+        self.__generation += 1
+        for tag in tags:
+            for key in tuple(self.__tags.get(tag, ())):
+                self.__remove_local(key, "invalidated")
+        return None
+
+    def __set_local(
+        self,
+        key: str,
+        value: str,
+        tags: frozenset[str],
+        ttl: float,
+    ) -> None:
+        self.__remove_local(key, "replaced")
+        self.__local[key] = LocalEntry(
+            value, tags, monotonic() + min(ttl, self.local_ttl)
+        )
+        for tag in tags:
+            self.__tags.setdefault(tag, set()).add(key)
+
+        while len(self.__local) > self.max_size:
+            self.__remove_local(next(iter(self.__local)), "size")
+        return None
+
+    def __get_local(self, key: str) -> str | None:
+        entry = self.__local.get(key)
+        if entry is None:
+            return None
+
+        if entry.expires_at <= monotonic():
+            self.__remove_local(key, "expired")
+            return None
+
+        self.__local.move_to_end(key)
+        return entry.value
+
+    async def get(self, key: str) -> str | None:
+        """Get the value from the local tier or from Redis.
+
+        #### Args:
+        - key (str):
+            Key of the value.
+
+        #### Returns:
+        - str | None:
+            The value if it is cached.
+        """
+        if self.__subscribed:
+            value = self.__get_local(key)
+            if value is not None:
+                CACHE_REQUESTS.labels("local", "hit").inc()
+                return value
+            CACHE_REQUESTS.labels("local", "miss").inc()
+
+        try:
+            raw, ttl, tags = await (
+                self.redis.pipeline(transaction=False)
+                .get(self.prefix + key)
+                .ttl(self.prefix + key)
+                .smembers(self.prefix + "keytags:" + key)
+                .execute()
+            )
+        except RedisError:
+            return None
+
+        if raw is None:
+            CACHE_REQUESTS.labels("redis", "miss").inc()
+            return None
+
+        CACHE_REQUESTS.labels("redis", "hit").inc()
+        value = raw.decode()
+        if self.__subscribed and ttl > 0:
+            tags = frozenset(tag.decode() for tag in tags)
+            self.__set_local(key, value, tags, ttl)
+        return value
+
+    async def version(self) -> tuple[int, int] | None:
+        """Get the version to pass to `set`, before reading the database.
+
+        #### Returns:
+        - tuple[int, int] | None:
+            (local invalidations, invalidations of all workers),
+            `None` if Redis is not available.
+        """
+        generation = self.__generation
+        try:
+            raw = await self.redis.get(self.version_key)
+        except RedisError:
+            return None
+        return generation, int(raw or 0)
+
+    async def set(
+        self,
+        key: str,
+        value: str,
+        tags: Iterable[str],
+        ttl: int,
+        version: tuple[int, int] | None = None,
+    ) -> None:
+        """Put the value to both tiers.
+
+        #### Args:
+        - key (str):
+            Key of the value.
+        - value (str):
+            Value to cache.
+        - tags (Iterable[str]):
+            Tags to invalidate the value.
+        - ttl (int):
+            Seconds to keep the value.
+        - version (tuple[int, int] | None): Default `None`.
+            `version` before the value was read from the database,
+            the value is not cached if there was an invalidation since.
+        """
+        generation = self.__generation
+        if version is not None and version[0] != generation:
+            return None
+
+        tags = frozenset(tags)
+        keytags = self.prefix + "keytags:" + key
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                if version is not None:
+                    # `execute` fails if another worker invalidates now
+                    await pipe.watch(self.version_key)
+                    raw = await pipe.get(self.version_key)
+                    if int(raw or 0) != version[1]:
+                        return None
+                    pipe.multi()
+
+                pipe.set(self.prefix + key, value, ex=ttl)
+                pipe.delete(keytags)
+                if tags:
+                    pipe.sadd(keytags, *tags)
+                    pipe.expire(keytags, ttl)
+                for tag in tags:
+                    pipe.sadd(self.prefix + "tag:" + tag, key)
+                    pipe.expire(self.prefix + "tag:" + tag, ttl)
+                await pipe.execute()
+        except RedisError:
+            return None
+
+        if self.__subscribed and generation == self.__generation:
+            self.__set_local(key, value, tags, ttl)
+        return None
+
+    async def invalidate(self, *tags: str) -> None:
+        """Remove the values with any of the tags from all workers.
+
+        #### Args:
+        - tags (str):
+            Tags to invalidate.
+        """
+        if not tags:
+            return None
+
+        self.__drop_local(tags)
+        tag_keys = [self.prefix + "tag:" + tag for tag in tags]
+        try:
+            # a value read before it fails the version check of `set`,
+            # a value set after it stays in the tag to be invalidated
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.incr(self.version_key)
+            for tag_key in tag_keys:
+                pipe.smembers(tag_key)
+            _, *members = await pipe.execute()
+
+            pipe = self.redis.pipeline(transaction=True)
+            for tag_key, keys in zip(tag_keys, members):
+                if keys:
+                    pipe.srem(tag_key, *keys)
+            for key in {key.decode() for keys in members for key in keys}:
+                pipe.delete(self.prefix + key, self.prefix + "keytags:" + key)
+            pipe.publish(self.channel, " ".join(tags))
+            await pipe.execute()
+        except RedisError as exc:
+            logger.error("read cache invalidation failed: %s", exc)
+        return None
+
+
+read_cache = ReadThroughCache(
+    redis=acache_db,
+    prefix=RedisPrefixes.READ_CACHE,
+    max_size=Limits.READ_CACHE_SIZE,
+    local_ttl=Limits.READ_CACHE_LOCAL_TIME,
+)
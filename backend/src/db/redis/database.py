@@ -1,6 +1,56 @@
+from contextlib import asynccontextmanager
+from time import perf_counter
+from typing import Any, AsyncGenerator
+
 from redis import Redis
-from redis.exceptions import ConnectionError
+from redis.asyncio import Redis as AsyncRedis
+from redis.asyncio.client import Pipeline
+from redis.exceptions import ConnectionError, LockError
 from src.config import settings
+from src.core.profiling import current_profile, record_span
+
+
+class ProfiledPipeline(Pipeline):
+    """Pipeline reporting its execution to the request profile."""
+
+    async def execute(self, raise_on_error: bool = True) -> list[Any]:
+        if current_profile.get() is None:
+            return await super().execute(raise_on_error)
+
+        commands = len(self.command_stack)
+        start = perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            record_span(
+                "redis", f"PIPELINE {commands}", perf_counter() - start
+            )
+
+
+class ProfiledRedis(AsyncRedis):
+    """Client reporting its commands to the request profile."""
+
+    async def execute_command(self, *args: Any, **options: Any) -> Any:
+        if current_profile.get() is None:
+            return await super().execute_command(*args, **options)
+
+        start = perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            record_span("redis", str(args[0]), perf_counter() - start)
+
+    def pipeline(
+        self,
+        transaction: bool = True,
+        shard_hint: str | None = None,
+    ) -> ProfiledPipeline:
+        return ProfiledPipeline(
+            self.connection_pool,
+            self.response_callbacks,
+            transaction,
+            shard_hint,
+        )
 
 
 class RedisDB:
@@ -27,10 +77,30 @@ class RedisDB:
             db=db,
         )
 
+    @classmethod
+    def get_async_db(cls, db: int | None = 0) -> AsyncRedis:
+        """Get asyncio connection to Redis database.
+
+        #### Args:
+        - db (int | None): Default `0`.
+            Database number to connect to.
+
+        #### Returns:
+        - AsyncRedis:
+            Asyncio connection to Redis database.
+        """
+        return ProfiledRedis(
+            host=cls.__host,
+            port=cls.__port,
+            db=db,
+        )
+
 
 default_db = RedisDB.get_db()
 auth_db = RedisDB.get_db(settings.redis_auth_db)
+aauth_db = RedisDB.get_async_db(settings.redis_auth_db)
 cache_db = RedisDB.get_db(settings.redis_cache_db)
+acache_db = RedisDB.get_async_db(settings.redis_cache_db)
 
 
 def check_redis() -> None:
@@ -47,3 +117,47 @@ def check_redis() -> None:
     if not cache_db.ping():
         raise ConnectionError("\n\n\033[101mNo connection to Redis!\033[0m\n")
     return None
+
+
+@asynccontextmanager
+async def single_runner(
+    name: str,
+    timeout: float,
+) -> AsyncGenerator[bool, None]:
+    """Run the block in one process of all workers at a time.
+
+    The process holding the lock gets `True`. Other processes wait
+    until the block of the holder ends and get `False`, so they can
+    skip the work but see its results.
+
+    #### Args:
+    - name (str):
+        Key of the lock in Redis.
+    - timeout (float):
+        Maximum seconds of the block, the lock expires after it.
+
+    #### Yields:
+    - bool:
+        Whether the block must do the work.
+    """
+    lock = acache_db.lock(name, timeout=timeout)
+    if await lock.acquire(blocking=False):
+        try:
+            yield True
+        finally:
+            try:
+                await lock.release()
+            except LockError:  # expired
+                pass
+        return
+
+    if await lock.acquire(blocking_timeout=timeout):
+        await lock.release()
+    yield False
+
+
+async def close_redis() -> None:
+    """Close asyncio connection pools to Redis."""
+    await aauth_db.close(close_connection_pool=True)
+    await acache_db.close(close_connection_pool=True)
+    return None
@@ -1,4 +1,5 @@
 from .crud import address_crud, phone_crud
+from .gazetteer import gazetteer
 from .models import (
     AddressModel,
     CityModel,
@@ -0,0 +1,230 @@
+import asyncio
+from math import ceil
+from time import monotonic, perf_counter
+
+from aiohttp import ClientError, ClientSession, ClientTimeout, TCPConnector
+from prometheus_client import Gauge, Histogram
+from src.config import Limits, settings
+from src.core.exceptions import ServiceUnavailableException
+from src.core.profiling import http_trace_config
+
+GEOCODER_SECONDS = Histogram(
+    "geocoder_request_seconds",
+    "Time of requests to the geocoder API.",
+    ("outcome",),
+)
+GEOCODER_BREAKER_STATE = Gauge(
+    "geocoder_breaker_state",
+    "State of the geocoder circuit breaker: 0 closed, 1 half-open, 2 open.",
+    multiprocess_mode="livemax",
+)
+
+
+class CircuitBreaker:
+    """Stop calling a service that keeps failing.
+
+    After `failures` failures in a row the breaker opens and calls are
+    rejected at once. After `reset_time` seconds one trial call is let
+    through: its success closes the breaker, its failure opens it again.
+    A trial call without an outcome is replaced after `reset_time`,
+    a cancelled trial call at once.
+
+    #### Attrs:
+    - failures (int):
+        Failures in a row to open the breaker.
+    - reset_time (int):
+        Seconds to wait before the trial call.
+
+    #### Methods:
+    - before_call: None
+    - success: None
+    - failure: None
+    - cancel: None
+    """
+
+    CLOSED = 0
+    HALF_OPEN = 1
+    OPEN = 2
+
+    def __init__(self, failures: int, reset_time: int) -> None:
+        self.failures = failures
+        self.reset_time = reset_time
+        self.__failed = 0
+        self.__opened_at = 0.0
+        self.__set_state(self.CLOSED)
+
+    @property
+    def state(self) -> int:
+        return self.__state
+
+    def __set_state(self, state: int) -> None:
+        self.__state = state
+        GEOCODER_BREAKER_STATE.set(state)
+
+    def before_call(self) -> None:
+        """Check that the call is allowed.
+
+        #### Raises:
+        - ServiceUnavailableException:
+            The breaker is open.
+        """
+        if self.__state == self.CLOSED:
+            return None
+
+        now = monotonic()
+        retry_after = self.__opened_at + self.reset_time - now
+        if retry_after <= 0:
+            self.__opened_at = now  # start of the trial call
+            self.__set_state(self.HALF_OPEN)
+            return None
+
+        raise ServiceUnavailableException(
+            "geocoder is unavailable, try later",
+            headers={"Retry-After": str(max(1, ceil(retry_after)))},
+        )
+
+    def success(self) -> None:
+        """Register a successful call."""
+        self.__failed = 0
+        if self.__state != self.CLOSED:
+            self.__set_state(self.CLOSED)
+        return None
+
+    def failure(self) -> None:
+        """Register a failed call."""
+        self.__failed += 1
+        if self.__state == self.HALF_OPEN or self.__failed >= self.failures:
+            self.__opened_at = monotonic()
+            self.__set_state(self.OPEN)
+        return None
+
+    def cancel(self) -> None:
+        """Register a call cancelled by the caller, it isn't a failure."""
+        if self.__state == self.HALF_OPEN:
+            # the next call is the trial one
+            self.__opened_at = monotonic() - self.reset_time
+        return None
+
+
+class GeocoderClient:
+    """HTTP client for the geocoder API.
+
+    One session with keep-alive connections is used for all requests
+    of the application.
+
+    #### Attrs:
+    - timeout (float):
+        Seconds for the whole request.
+    - connections (int):
+        Maximum number of connections to the API host.
+    - breaker (CircuitBreaker):
+        Circuit breaker for the API.
+
+    #### Methods:
+    - close: None
+    - get_json: tuple[int, dict | None]
+    """
+
+    def __init__(
+        self,
+        timeout: float,
+        connections: int,
+        breaker: CircuitBreaker,
+    ) -> None:
+        self.timeout = timeout
+        self.connections = connections
+        self.breaker = breaker
+        self.__session: ClientSession | None = None
+        self.__loop: asyncio.AbstractEventLoop | None = None
+
+    def __get_session(self) -> ClientSession:
+        """Get the session, create it for the running loop if needed.
+
+        #### Returns:
+        - ClientSession:
+            Session with the connection pool.
+        """
+        loop = asyncio.get_running_loop()
+        if (
+            self.__session is None
+            or self.__session.closed
+            or self.__loop is not loop
+        ):
+            self.__session = ClientSession(
+                connector=TCPConnector(
+                    limit_per_host=self.connections,
+                    keepalive_timeout=30,
+                    ttl_dns_cache=300,
+                ),
+                timeout=ClientTimeout(total=self.timeout),
+                trace_configs=[http_trace_config()],
+            )
+            self.__loop = loop
+        return self.__session
+
+    async def close(self) -> None:
+        """Close the session and its connections."""
+        if self.__session is not None and not self.__session.closed:
+            await self.__session.close()
+        self.__session = None
+        return None
+
+    async def get_json(self, url: str) -> tuple[int, dict | None]:
+        """Make the `GET` request.
+
+        Timeouts, connection errors, `429` and `5xx` answers and broken
+        bodies are failures for the circuit breaker, cancelled calls
+        are not.
+
+        #### Args:
+        - url (str):
+            Requested URL.
+
+        #### Raises:
+        - ServiceUnavailableException:
+            The API didn't answer or the breaker is open.
+
+        #### Returns:
+        - tuple[int, dict | None]:
+            Status of the response and the data if the status is `200`.
+        """
+        self.breaker.before_call()
+        session = self.__get_session()
+
+        start = perf_counter()
+        try:
+            async with session.get(url=url) as response:
+                status = response.status
+                data = await response.json() if status == 200 else None
+        except (ClientError, asyncio.TimeoutError) as exc:
+            GEOCODER_SECONDS.labels("error").observe(perf_counter() - start)
+            self.breaker.failure()
+            raise ServiceUnavailableException(
+                "geocoder didn't respond"
+            ) from exc
+        except asyncio.CancelledError:
+            # a disconnected client or a shutdown, the API is fine
+            self.breaker.cancel()
+            raise
+        except BaseException:
+            # a broken body must not keep the trial
+            self.breaker.failure()
+            raise
+
+        GEOCODER_SECONDS.labels(str(status)).observe(perf_counter() - start)
+        if status == 429 or status >= 500:
+            self.breaker.failure()
+            raise ServiceUnavailableException("geocoder didn't respond")
+
+        self.breaker.success()
+        return status, data
+
+
+geocoder_client = GeocoderClient(
+    timeout=settings.geocoder_timeout,
+    connections=settings.geocoder_connections,
+    breaker=CircuitBreaker(
+        failures=Limits.GEOCODER_BREAKER_FAILURES,
+        reset_time=Limits.GEOCODER_BREAKER_RESET_TIME,
+    ),
+)
@@ -1,7 +1,24 @@
-from sqlalchemy import and_, select
+from typing import Any
+
+from sqlalchemy import (
+    BigInteger,
+    Integer,
+    ScalarSelect,
+    Select,
+    and_,
+    cast,
+    func,
+    literal,
+    or_,
+    select,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.db.postgres import CRUD
+from src.core.exceptions import BadRequestException, ServerError
+from src.db.postgres import CRUD, Base
+from src.db.redis.cache import read_cache
 
+from .gazetteer import gazetteer
 from .models import (
     AddressModel,
     CityModel,
@@ -12,7 +29,7 @@ from .models import (
     StreetModel,
 )
 from .shemes import AddressScheme
-from .utils import FullAddress, get_valid_address
+from .utils import FullAddress, get_fingerprint, get_valid_address
 
 
 class PhoneCRUD(CRUD):
@@ -42,105 +59,236 @@ class AddressCRUD(CRUD):
 
     model: AddressModel
 
-    async def __set_region(
-        self,
-        db: AsyncSession,
-        exist_address: FullAddress,
-        valid_address: AddressScheme,
-    ) -> None:
-        """Set valid region to `FullAddress` and flush it to the database.
+    @staticmethod
+    def __get_or_insert(
+        model: Base,
+        values: dict[str, Any],
+        unique: tuple[str, ...] = (),
+    ) -> ScalarSelect:
+        """Get the identifier of the row, insert the row if it doesn't exist.
+
+        The row is not inserted if any of the parents is not found.
 
         #### Args:
-        - db (AsyncSession):
-            Connecting to the database.
-        - exist_address (FullAddress):
-            Address from the database with all related data.
-        - valid_address (AddressScheme):
-            Valid address from another API.
+        - model (Base):
+            Geo table.
+        - values (dict[str, Any]):
+            Values of the row: literals, `None`
+            or identifiers of the parents from other statements.
+        - unique (tuple[str, ...]): Default `()`.
+            Columns with own unique index. The existing row is found
+            by any of them or by all the other values.
+
+        #### Returns:
+        - ScalarSelect:
+            Subquery returning the identifier or `NULL`.
         """
-        if not exist_address.region and valid_address.region:
-            exist_address.region: RegionModel = RegionModel(
-                name=valid_address.region,
-                country_id=exist_address.country.id,
+        columns = [getattr(model, key) for key in values]
+        exprs = [
+            value
+            if isinstance(value, ScalarSelect)
+            else literal(value, column.type)
+            for column, value in zip(columns, values.values())
+        ]
+        inserted = (
+            insert(model)
+            .from_select(
+                list(values),
+                select(*exprs).where(
+                    *(
+                        expr.is_not(None)
+                        for expr in exprs
+                        if isinstance(expr, ScalarSelect)
+                    )
+                ),
             )
-            db.add(exist_address.region)
-            await db.flush((exist_address.region,))
+            .on_conflict_do_nothing()
+            .returning(model.id)
+            .cte(f"{model.__tablename__}_inserted")
+        )
+        key, unique_key = [], []
+        for column, value, expr in zip(columns, values.values(), exprs):
+            if column.key in unique:
+                unique_key.append(column == expr)
+            elif value is None:
+                key.append(column.is_(None))
+            else:
+                key.append(column == expr)
+        existing = select(model.id).where(or_(and_(*key), *unique_key))
+        found = (
+            select(inserted.c.id)
+            .union_all(existing)
+            .limit(1)
+            .cte(f"{model.__tablename__}_found")
+        )
+        return select(found.c.id).scalar_subquery()
 
-    async def __set_district(
+    def __upsert_statement(
         self,
-        db: AsyncSession,
-        exist_address: FullAddress,
+        new_address: AddressScheme,
         valid_address: AddressScheme,
-    ) -> None:
-        """Set valid district to `FullAddress` and flush it to the database.
+        exist_address: FullAddress,
+        fingerprint: str,
+    ) -> Select:
+        """Create one statement to save the address with all related data.
+
+        Already found objects are used as is.
 
         #### Args:
-        - db (AsyncSession):
-            Connecting to the database.
-        - exist_address (FullAddress):
-            Address from the database with all related data.
+        - new_address (AddressScheme):
+            User-entered data.
         - valid_address (AddressScheme):
             Valid address from another API.
+        - exist_address (FullAddress):
+            Data retrieved from database.
+        - fingerprint (str):
+            Fingerprint of the saved address.
+
+        #### Returns:
+        - Select:
+            Statement returning identifiers of all objects.
         """
-        if not exist_address.district and valid_address.district:
-            exist_address.district: DistrictModel = DistrictModel(
-                name=valid_address.district
+        country_id = exist_address.country.id
+
+        region_id = None
+        if exist_address.region:
+            region_id = exist_address.region.id
+        elif valid_address.region:
+            region_id = self.__get_or_insert(
+                RegionModel,
+                {"country_id": country_id, "name": valid_address.region},
             )
-            if exist_address.region:
-                exist_address.district.region_id = exist_address.region.id
-            db.add(exist_address.district)
-            await db.flush((exist_address.district,))
 
-    async def __set_city(
-        self,
-        db: AsyncSession,
-        exist_address: FullAddress,
-        valid_address: AddressScheme,
-    ) -> None:
-        """Set valid city to `FullAddress` and flush it to the database.
+        district_id = None
+        if exist_address.district:
+            district_id = exist_address.district.id
+        elif valid_address.district:
+            district_id = self.__get_or_insert(
+                DistrictModel,
+                {"region_id": region_id, "name": valid_address.district},
+            )
 
-        #### Args:
-        - db (AsyncSession):
-            Connecting to the database.
-        - exist_address (FullAddress):
-            Address from the database with all related data.
-        - valid_address (AddressScheme):
-            Valid address from another API.
-        """
-        if not exist_address.city and valid_address.city:
-            exist_address.city: CityModel = CityModel(
-                name=valid_address.city, country_id=exist_address.country.id
+        if exist_address.city:
+            city_id = exist_address.city.id
+        else:
+            city_id = self.__get_or_insert(
+                CityModel,
+                {
+                    "country_id": country_id,
+                    "region_id": region_id,
+                    "district_id": district_id,
+                    "name": valid_address.city,
+                },
+            )
+
+        street_id = None
+        if exist_address.street:
+            street_id = exist_address.street.id
+        elif valid_address.street:
+            street_id = self.__get_or_insert(
+                StreetModel,
+                {"city_id": city_id, "name": valid_address.street},
             )
-            if exist_address.region:
-                exist_address.city.region_id = exist_address.region.id
-            if exist_address.district:
-                exist_address.city.district_id = exist_address.district.id
-            db.add(exist_address.city)
-            await db.flush((exist_address.city,))
-
-    async def __set_street(
+
+        address_id = self.__get_or_insert(
+            AddressModel,
+            {
+                "city_id": city_id,
+                "street_id": street_id,
+                "building": new_address.building,
+                "adds": new_address.adds,
+                "office": new_address.office,
+                "fingerprint": fingerprint,
+            },
+            unique=("fingerprint",),
+        )
+
+        columns = []
+        for name, value in (
+            ("region_id", region_id),
+            ("district_id", district_id),
+            ("city_id", city_id),
+            ("street_id", street_id),
+            ("address_id", address_id),
+        ):
+            if not isinstance(value, ScalarSelect):
+                value = literal(value, Integer)
+            columns.append(value.label(name))
+
+        if new_address.phones:
+            phones = (
+                insert(PhoneModel)
+                .from_select(
+                    ["number", "address_id"],
+                    select(
+                        func.unnest(
+                            cast(new_address.phones, ARRAY(BigInteger))
+                        ),
+                        address_id,
+                    ).where(address_id.is_not(None)),
+                )
+                .on_conflict_do_nothing()
+                .returning(PhoneModel.id)
+                .cte(f"{PhoneModel.__tablename__}_inserted")
+            )
+            columns.append(
+                select(func.count())
+                .select_from(phones)
+                .scalar_subquery()
+                .label("phones")
+            )
+
+        return select(*columns)
+
+    async def __get_address(
         self,
         db: AsyncSession,
-        exist_address: FullAddress,
-        valid_address: AddressScheme,
-    ) -> None:
-        """Set valid street to `FullAddress` and flush it to the database.
+        address: AddressScheme,
+        full_address: FullAddress,
+    ) -> AddressModel | None:
+        """Get the address row for the found geo objects.
+
+        The address is found by the fingerprint with one index probe,
+        by the columns if the fingerprint can't be built.
 
         #### Args:
         - db (AsyncSession):
             Connecting to the database.
-        - exist_address (FullAddress):
-            Address from the database with all related data.
-        - valid_address (AddressScheme):
-            Valid address from another API.
+        - address (AddressScheme):
+            Data to search.
+        - full_address (FullAddress):
+            Found geo objects.
+
+        #### Returns:
+        - AddressModel | None:
+            The address if it exists.
         """
-        if not exist_address.street and valid_address.street:
-            exist_address.street: StreetModel = StreetModel(
-                name=valid_address.street,
-                city_id=exist_address.city.id,
+        if not (address.building or address.adds) or not full_address.city:
+            return None
+        if address.street and not full_address.street:
+            return None
+
+        columns = [
+            AddressModel.city_id == full_address.city.id,
+            AddressModel.building == address.building,
+            AddressModel.adds == address.adds,
+            AddressModel.office == address.office,
+        ]
+        if address.street:
+            columns.append(AddressModel.street_id == full_address.street.id)
+
+        fingerprint = get_fingerprint(full_address, address)
+        if fingerprint is None:
+            stmt = select(AddressModel).where(*columns)
+        else:
+            # rows without the fingerprint are matched by columns
+            stmt = select(AddressModel).where(
+                or_(
+                    AddressModel.fingerprint == fingerprint,
+                    and_(AddressModel.fingerprint.is_(None), *columns),
+                )
             )
-            db.add(exist_address.street)
-            await db.flush((exist_address.street,))
+        return await db.scalar(stmt.limit(1))
 
     async def get_full_address(
         self,
@@ -149,6 +297,10 @@ class AddressCRUD(CRUD):
     ) -> FullAddress:
         """Get an address with all related data.
 
+        Geo objects are taken from the gazetteer, so only the address row
+        is requested from the database. If some of them are not
+        in the gazetteer, they are requested from the database first.
+
         If the address is not found,
         all response instance attributes will be empty.
         If no larger objects are found,
@@ -166,13 +318,37 @@ class AddressCRUD(CRUD):
         - FullAddress:
             Address with all related data.
         """
+        full_address = gazetteer.resolve(address)
+        if full_address is None:
+            full_address = await self.__get_geo_objects(db, address)
+        full_address.address = await self.__get_address(
+            db, address, full_address
+        )
+        return full_address
+
+    async def __get_geo_objects(
+        self,
+        db: AsyncSession,
+        address: AddressScheme,
+    ) -> FullAddress:
+        """Get the geo objects of the address from the database.
+
+        #### Args:
+        - db (AsyncSession):
+            Connecting to the database.
+        - address (AddressScheme):
+            Data to search.
+
+        #### Returns:
+        - FullAddress:
+            Found geo objects without the address row.
+        """
         select_tables = (
             CountryModel,
             RegionModel if address.region else None,
             DistrictModel if address.district else None,
             CityModel if address.city else None,
             StreetModel if address.street else None,
-            AddressModel if address.building or address.adds else None,
         )
         stmt = select(*select_tables).select_from(CountryModel)
 
@@ -215,29 +391,18 @@ class AddressCRUD(CRUD):
                     StreetModel.city_id == CityModel.id,
                     StreetModel.name == address.street,
                 ),
-            ).outerjoin(
-                AddressModel,
-                and_(
-                    AddressModel.city_id == CityModel.id,
-                    AddressModel.street_id == StreetModel.id,
-                    AddressModel.building == address.building,
-                    AddressModel.adds == address.adds,
-                    AddressModel.office == address.office,
-                ),
-            )
-        else:
-            stmt = stmt.outerjoin(
-                AddressModel,
-                and_(
-                    AddressModel.city_id == CityModel.id,
-                    AddressModel.building == address.building,
-                    AddressModel.adds == address.adds,
-                    AddressModel.office == address.office,
-                ),
             )
 
         stmt = stmt.where(CountryModel.name == address.country)
-        return FullAddress(*(await db.execute(stmt)).first())
+        full_address = FullAddress(*(await db.execute(stmt)).first(), None)
+        gazetteer.add(
+            full_address.country,
+            full_address.region,
+            full_address.district,
+            full_address.city,
+            full_address.street,
+        )
+        return full_address
 
     async def flush_new_address(
         self,
@@ -258,6 +423,12 @@ class AddressCRUD(CRUD):
         - exist_address (FullAddress):
             Data retrieved from database.
 
+        #### Raises:
+        - BadRequestException:
+            Some of the phones belong to another address.
+        - ServerError:
+            The address is not saved after the retry.
+
         #### Returns:
         - FullAddress:
             Data flushed into the database.
@@ -269,29 +440,79 @@ class AddressCRUD(CRUD):
             if exist_address.address:
                 return exist_address
 
-        await self.__set_region(db, exist_address, valid_address)
-        await self.__set_district(db, exist_address, valid_address)
-        await self.__set_city(db, exist_address, valid_address)
-        await self.__set_street(db, exist_address, valid_address)
-
-        exist_address.address = AddressModel(
-            city_id=exist_address.city.id,
-            street_id=exist_address.street.id,
-            building=new_address.building,
-            adds=new_address.adds,
-            office=new_address.office,
-        )
-        db.add(exist_address.address)
-        await db.flush((exist_address.address,))
-        db.add_all(
-            (
-                PhoneModel(number=number, address_id=exist_address.address.id)
-                for number in new_address.phones
+        # new objects get the validated names and the identifiers later
+        country = exist_address.country
+        region = exist_address.region
+        if region is None and valid_address.region:
+            region = RegionModel(
+                name=valid_address.region, country_id=country.id
             )
+        district = exist_address.district
+        if district is None and valid_address.district:
+            district = DistrictModel(name=valid_address.district)
+        city = exist_address.city or CityModel(
+            name=valid_address.city, country_id=country.id
+        )
+        street = exist_address.street
+        if street is None and valid_address.street:
+            street = StreetModel(name=valid_address.street)
+
+        fingerprint = get_fingerprint(
+            FullAddress(country, region, district, city, street, None),
+            new_address,
+        )
+        stmt = self.__upsert_statement(
+            new_address, valid_address, exist_address, fingerprint
+        )
+        # The statement doesn't see rows committed by concurrent requests
+        # after it started, then the new statement will find them.
+        for _ in range(2):
+            ids = (await db.execute(stmt)).one()
+            if ids.address_id is not None:
+                break
+        else:
+            raise ServerError("failed to save the address, try again")
+
+        # conflicting phones are skipped by the statement
+        if new_address.phones and ids.phones < len(set(new_address.phones)):
+            busy = (
+                await db.scalars(
+                    select(PhoneModel.number).where(
+                        PhoneModel.number.in_(new_address.phones),
+                        PhoneModel.address_id != ids.address_id,
+                    )
+                )
+            ).all()
+            if busy:
+                raise BadRequestException(f"numbers {busy} are busy")
+
+        if region is not None and exist_address.region is None:
+            region.id = ids.region_id
+        if district is not None and exist_address.district is None:
+            district.id = ids.district_id
+            district.region_id = region.id if region else None
+        if exist_address.city is None:
+            city.id = ids.city_id
+            city.region_id = region.id if region else None
+            city.district_id = district.id if district else None
+        if street is not None and exist_address.street is None:
+            street.id = ids.street_id
+            street.city_id = city.id
+
+        for obj in (region, district, city, street):
+            if obj is not None:
+                gazetteer.stage(db, obj)
+
+        return FullAddress(
+            country=country,
+            region=region,
+            district=district,
+            city=city,
+            street=street,
+            # the existing row may differ in case and spaces
+            address=await db.get(AddressModel, ids.address_id),
         )
-        await db.flush()
-        return exist_address
 
 
 address_crud = AddressCRUD(AddressModel)
-phone_crud = PhoneCRUD(PhoneModel)
+phone_crud = PhoneCRUD(PhoneModel, cache=read_cache)
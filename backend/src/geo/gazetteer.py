@@ -0,0 +1,309 @@
+from sys import getsizeof
+from typing import Any
+
+from prometheus_client import Counter
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, SessionTransaction
+from src.core.metrics import register_collector
+from src.db.postgres import Base
+from src.db.postgres.database import ASessionMaker
+
+from .models import (
+    CityModel,
+    CountryModel,
+    DistrictModel,
+    RegionModel,
+    StreetModel,
+)
+from .shemes import AddressScheme
+from .utils import FullAddress
+
+# key of `Session.info` for entries waiting for the commit
+STAGED_KEY = "gazetteer_staged"
+
+GAZETTEER_LOOKUPS = Counter(
+    "gazetteer_lookups_total",
+    "Address lookups in the in-memory gazetteer.",
+    ("result",),
+)
+
+Entry = tuple[str, tuple, Any]
+
+
+class Gazetteer:
+    """In-memory index of geo names for the current process.
+
+    Maps a name to the identifier for every parent:
+    - country: `name` -> `id`
+    - region: `(country_id, name)` -> `id`
+    - district: `(region_id, name)` -> `id`
+    - city: `(country_id, name)` -> `[(id, region_id, district_id)]`
+    - street: `(city_id, name)` -> `id`
+
+    Geo data is never deleted by the application, so a found identifier
+    is always valid. Not found names must be checked in the database,
+    because they could be added by another process.
+
+    #### Methods:
+    - clear: None
+    - load: None
+    - add: None
+    - stage: None
+    - resolve: FullAddress | None
+    - memory_usage: int
+    - stats: dict
+    """
+
+    levels = {
+        CountryModel: "country",
+        RegionModel: "region",
+        DistrictModel: "district",
+        CityModel: "city",
+        StreetModel: "street",
+    }
+
+    def __init__(self) -> None:
+        self.__index: dict[str, dict] = {}
+        self.clear()
+
+    def clear(self) -> None:
+        """Remove all names from the index."""
+        self.__index = {level: {} for level in self.levels.values()}
+        self.__bytes = 0
+        self.hits = 0
+        self.misses = 0
+        return None
+
+    @classmethod
+    def __entry(cls, obj: Base) -> Entry:
+        """Get the index entry for the geo object.
+
+        #### Args:
+        - obj (Base):
+            Geo object with identifier.
+
+        #### Returns:
+        - Entry:
+            (level, key, value)
+        """
+        match obj:
+            case CountryModel():
+                return "country", (obj.name,), obj.id
+            case RegionModel():
+                return "region", (obj.country_id, obj.name), obj.id
+            case DistrictModel():
+                return "district", (obj.region_id, obj.name), obj.id
+            case CityModel():
+                return (
+                    "city",
+                    (obj.country_id, obj.name),
+                    (obj.id, obj.region_id, obj.district_id),
+                )
+            case StreetModel():
+                return "street", (obj.city_id, obj.name), obj.id
+        raise TypeError(f"{obj.__class__} is not a geo model")
+
+    def __add_entry(self, level: str, key: tuple, value: Any) -> None:
+        index = self.__index[level]
+        if level == "city":
+            cities = index.setdefault(key, [])
+            if value in cities:
+                return None
+            cities.append(value)
+        elif key in index:
+            return None
+        else:
+            index[key] = value
+
+        self.__bytes += getsizeof(key) + getsizeof(key[-1]) + getsizeof(value)
+        return None
+
+    def add(self, *objs: Base | None) -> None:
+        """Add committed geo objects to the index.
+
+        #### Args:
+        - objs (Base | None):
+            Geo objects, `None` is skipped.
+        """
+        for obj in objs:
+            if obj is not None:
+                self.__add_entry(*self.__entry(obj))
+        return None
+
+    def stage(self, db: AsyncSession, obj: Base) -> None:
+        """Add the flushed geo object to the index after the commit.
+
+        #### Args:
+        - db (AsyncSession):
+            Session which flushed the object.
+        - obj (Base):
+            Flushed geo object.
+        """
+        db.info.setdefault(STAGED_KEY, []).append(self.__entry(obj))
+        return None
+
+    def apply_staged(self, session: Session) -> None:
+        for entry in session.info.pop(STAGED_KEY, ()):
+            self.__add_entry(*entry)
+        return None
+
+    async def load(self) -> None:
+        """Fill the index from the database."""
+        self.clear()
+        async with ASessionMaker() as db:
+            db: AsyncSession
+            for model in self.levels:
+                columns = [col for col in model.__table__.columns]
+                for row in await db.execute(select(*columns)):
+                    self.add(model(**row._asdict()))
+        return None
+
+    def resolve(self, address: AddressScheme) -> FullAddress | None:
+        """Find identifiers of all levels of the address.
+
+        Matching rules are the same as in `AddressCRUD.get_full_address`.
+        The `address` attribute of the result is always `None`.
+
+        #### Args:
+        - address (AddressScheme):
+            Data to search.
+
+        #### Returns:
+        - FullAddress | None:
+            Address with transient objects, or `None`
+            if any of the requested levels is not in the index.
+        """
+        full_address = self.__resolve(address)
+        if full_address is None:
+            self.misses += 1
+            GAZETTEER_LOOKUPS.labels("miss").inc()
+        else:
+            self.hits += 1
+            GAZETTEER_LOOKUPS.labels("hit").inc()
+        return full_address
+
+    def __resolve(self, address: AddressScheme) -> FullAddress | None:
+        country_id = self.__index["country"].get((address.country,))
+        if country_id is None:
+            return None
+        country = CountryModel(id=country_id, name=address.country)
+
+        region = None
+        if address.region:
+            region_id = self.__index["region"].get(
+                (country_id, address.region)
+            )
+            if region_id is None:
+                return None
+            region = RegionModel(
+                id=region_id, name=address.region, country_id=country_id
+            )
+
+        district = None
+        if address.district:
+            parent_id = region.id if region else None
+            district_id = self.__index["district"].get(
+                (parent_id, address.district)
+            )
+            if district_id is None:
+                return None
+            district = DistrictModel(
+                id=district_id, name=address.district, region_id=parent_id
+            )
+
+        city = None
+        cities = self.__index["city"].get((country_id, address.city), ())
+        for city_id, region_id, district_id in cities:
+            if region and region_id != region.id:
+                continue
+            if district and district_id != district.id:
+                continue
+            city = CityModel(
+                id=city_id,
+                name=address.city,
+                country_id=country_id,
+                region_id=region_id,
+                district_id=district_id,
+            )
+            break
+        if city is None:
+            return None
+
+        street = None
+        if address.street:
+            street_id = self.__index["street"].get((city.id, address.street))
+            if street_id is None:
+                return None
+            street = StreetModel(
+                id=street_id, name=address.street, city_id=city.id
+            )
+
+        return FullAddress(country, region, district, city, street, None)
+
+    def entries(self, level: str) -> int:
+        index = self.__index[level]
+        if level == "city":
+            return sum(len(cities) for cities in index.values())
+        return len(index)
+
+    def memory_usage(self) -> int:
+        """Get approximate size of the index in bytes."""
+        return self.__bytes + sum(getsizeof(i) for i in self.__index.values())
+
+    def stats(self) -> dict[str, Any]:
+        """Get statistics of the index.
+
+        #### Returns:
+        - dict[str, Any]:
+            Lookups, hit rate, number of names and memory usage.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": {
+                level: self.entries(level) for level in self.levels.values()
+            },
+            "memory_bytes": self.memory_usage(),
+        }
+
+
+gazetteer = Gazetteer()
+
+
+class GazetteerCollector(Collector):
+    """Size of the gazetteer, computed on scrape."""
+
+    def collect(self):
+        entries = GaugeMetricFamily(
+            "gazetteer_entries",
+            "Names in the in-memory gazetteer.",
+            labels=("level",),
+        )
+        for level in Gazetteer.levels.values():
+            entries.add_metric((level,), gazetteer.entries(level))
+        yield entries
+        yield GaugeMetricFamily(
+            "gazetteer_memory_bytes",
+            "Approximate memory used by the in-memory gazetteer.",
+            value=gazetteer.memory_usage(),
+        )
+
+
+register_collector(GazetteerCollector())
+
+
+@event.listens_for(Session, "after_commit")
+def apply_staged_geo(session: Session) -> None:
+    gazetteer.apply_staged(session)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def drop_staged_geo(session: Session, transaction: SessionTransaction) -> None:
+    # not committed entries are dropped when the root transaction ends
+    if transaction.parent is None:
+        session.info.pop(STAGED_KEY, None)
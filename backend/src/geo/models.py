@@ -1,4 +1,11 @@
-from sqlalchemy import ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy import (
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+    func,
+)
 from sqlalchemy.orm import Mapped, mapped_column
 from src.config import Limits
 from src.core.enums import TableNames
@@ -48,10 +55,12 @@ class RegionModel(Base, NameGeo):
     """
 
     __tablename__ = TableNames.REGION
-    __tableargs__ = UniqueConstraint(
-        "country_id",
-        "id",
-        name="unique region for a country",
+    __table_args__ = (
+        UniqueConstraint(
+            "country_id",
+            "name",
+            name="uq_region_country_id_name",
+        ),
     )
 
     country_id: Mapped[int | None] = mapped_column(
@@ -74,11 +83,6 @@ class DistrictModel(Base, NameGeo):
     """
 
     __tablename__ = TableNames.DISTRICT
-    __tableargs__ = UniqueConstraint(
-        "region_id",
-        "id",
-        name="unique district for a region_country",
-    )
 
     region_id: Mapped[int | None] = mapped_column(
         Integer,
@@ -87,6 +91,15 @@ class DistrictModel(Base, NameGeo):
     )
 
 
+# `NULL` parents must not be distinct
+Index(
+    "uq_district_region_id_name",
+    func.coalesce(DistrictModel.region_id, 0),
+    DistrictModel.name,
+    unique=True,
+)
+
+
 class CityModel(Base, NameGeo):
     """Table for city data (and towns, villages etc).
     There are may be countries without regions.
@@ -105,13 +118,6 @@ class CityModel(Base, NameGeo):
     """
 
     __tablename__ = TableNames.CITY
-    __tableargs__ = UniqueConstraint(
-        "country_id",
-        "region_id",
-        "id",
-        name="unique city for a region_country",
-    )
-
     country_id: Mapped[int | None] = mapped_column(
         Integer, ForeignKey(TableNames.COUNTRY + ".id"), default=None
     )
@@ -122,11 +128,21 @@ class CityModel(Base, NameGeo):
     )
     district_id: Mapped[int | None] = mapped_column(
         Integer,
-        ForeignKey(TableNames.REGION + ".id"),
+        ForeignKey(TableNames.DISTRICT + ".id"),
         default=None,
     )
 
 
+Index(
+    "uq_city_country_id_region_id_district_id_name",
+    CityModel.country_id,
+    func.coalesce(CityModel.region_id, 0),
+    func.coalesce(CityModel.district_id, 0),
+    CityModel.name,
+    unique=True,
+)
+
+
 class StreetModel(Base, NameGeo):
     """Table for street data (avenues, roads, squares etc).
 
@@ -140,11 +156,14 @@ class StreetModel(Base, NameGeo):
     """
 
     __tablename__ = TableNames.STREET
-    __tableargs__ = UniqueConstraint(
-        "city_id",
-        "id",
-        name="unique street for city",
+    __table_args__ = (
+        UniqueConstraint(
+            "city_id",
+            "name",
+            name="uq_street_city_id_name",
+        ),
     )
+
     city_id: Mapped[int | None] = mapped_column(
         Integer,
         ForeignKey(TableNames.CITY + ".id"),
@@ -169,6 +188,8 @@ class AddressModel(Base):
         Additional info such as letter, building, entrance etc.
     - office (str| None): Default None.
         Office (room, appartment) number.
+    - fingerprint (str | None): Default None.
+        Hash of the full validated address.
     """
 
     __tablename__ = TableNames.ADDRESS
@@ -193,6 +214,23 @@ class AddressModel(Base):
         String(Limits.LEN_16_GEO_NAME),
         default=None,
     )
+    fingerprint: Mapped[str | None] = mapped_column(
+        String(Limits.LEN_FINGERPRINT),
+        unique=True,
+        index=True,
+        default=None,
+    )
+
+
+Index(
+    "uq_address_city_id_street_id_building_adds_office",
+    AddressModel.city_id,
+    func.coalesce(AddressModel.street_id, 0),
+    func.coalesce(AddressModel.building, ""),
+    func.coalesce(AddressModel.adds, ""),
+    func.coalesce(AddressModel.office, ""),
+    unique=True,
+)
 
 
 class PhoneModel(Base, PhoneNumberModel):
@@ -1,13 +1,19 @@
+import asyncio
+import json
 import re
+from hashlib import sha256
 
-from aiohttp import ClientSession
+from redis.exceptions import RedisError
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.config import settings
+from src.config import Limits, RedisPrefixes, settings
 from src.core.enums import Countries
 from src.core.exceptions import BadRequestException
+from src.db.postgres import CRUD
 from src.db.postgres.database import ASessionMaker
+from src.db.redis import acache_db
 
+from .client import geocoder_client
 from .models import (
     AddressModel,
     CityModel,
@@ -23,6 +29,37 @@ STREET_REGEX = (
     r"|тупик|микрорайон|квартал|дорога|переулок|микрорайон)\b"
 )
 DISTRICT_REGEX = r"\b(?:район)"
+# order of the address parts in the fingerprint, must never be changed
+FINGERPRINT_FIELDS = (
+    "country",
+    "region",
+    "district",
+    "city",
+    "street",
+    "building",
+    "adds",
+    "office",
+)
+
+
+def make_fingerprint(*parts: str | None) -> str:
+    """Get the fingerprint of the address parts.
+
+    Parts are compared without case and extra whitespaces.
+
+    #### Args:
+    - parts (str | None):
+        Address parts in the `FINGERPRINT_FIELDS` order.
+
+    #### Returns:
+    - str:
+        Hex digest of `sha256`.
+    """
+    canonical = "\x1f".join(
+        " ".join(str(part).casefold().split()) if part is not None else ""
+        for part in parts
+    )
+    return sha256(canonical.encode()).hexdigest()
 
 
 class FullAddress:
@@ -54,29 +91,132 @@ class FullAddress:
         self.address = address
 
 
+def get_fingerprint(
+    full_address: FullAddress,
+    address: AddressScheme,
+) -> str | None:
+    """Get the fingerprint of the address in the resolved hierarchy.
+
+    Names are taken from the found geo objects, not from the request,
+    so the stored and the searched fingerprints match. The region and
+    the district are the ones of the city, as in the backfill.
+
+    #### Args:
+    - full_address (FullAddress):
+        Found geo objects, new ones may be without identifiers.
+    - address (AddressScheme):
+        Data with the building, adds and office.
+
+    #### Returns:
+    - str | None:
+        Hex digest of `sha256`, or `None` if the region or the district
+        of the city is unknown.
+    """
+    city, region, district = (
+        full_address.city,
+        full_address.region,
+        full_address.district,
+    )
+    if (
+        city is None
+        or (region is None and city.region_id is not None)
+        or (district is None and city.district_id is not None)
+    ):
+        return None
+
+    street = full_address.street
+    return make_fingerprint(
+        full_address.country.name,
+        region.name if region else None,
+        district.name if district else None,
+        city.name,
+        street.name if street else None,
+        address.building,
+        address.adds,
+        address.office,
+    )
+
+
 class YaMapAPI:
-    """Connection to the `Yandex.Maps` API."""
+    """Connection to the `Yandex.Maps` API.
+
+    Responses are cached by the search text. Unknown addresses are cached
+    for a short time, and concurrent identical lookups share one request.
+    """
 
     pre_url = (
         f"https://search-maps.yandex.ru/v1/?apikey={settings.ya_map_api_key}"
         "&type=geo&lang=ru_RU&results=1&text="
     )
+    prefix = RedisPrefixes.GEOCODER
+    expire = Limits.GEOCODER_CACHE_TIME
+    not_found_expire = Limits.GEOCODER_NOT_FOUND_CACHE_TIME
+    __in_flight: dict[str, asyncio.Task] = {}
 
     @classmethod
-    async def __get_data(cls, address: AddressScheme) -> tuple[str, dict]:
-        """Get data from the Yandex.Maps API.
+    async def __request(cls, text: str) -> list[str] | None:
+        """Request the Yandex.Maps API.
 
         #### Args:
-        - address (AddressScheme):
-            Data to search.
+        - text (str):
+            Address to search.
+
+        #### Raises:
+        - ServiceUnavailableException:
+            The API is unavailable.
+
+        #### Returns:
+        - list[str] | None:
+            Parts of the found address, empty if the address not found
+            or `None` if the API didn't answer properly.
+        """
+        status, data = await geocoder_client.get_json(cls.pre_url + text)
+        if status != 200:
+            return None
+
+        try:
+            return data["features"][0]["properties"]["GeocoderMetaData"][
+                "text"
+            ].split(", ")[1:]
+        except (IndexError, KeyError):
+            return []
+
+    @classmethod
+    async def __fetch(cls, key: str, text: str) -> list[str]:
+        """Request the API and put the result in the cache.
+
+        #### Args:
+        - key (str):
+            Key in the cache.
+        - text (str):
+            Address to search.
 
         #### Returns:
-        - tuple[str, dict]:
-            Get data from the Yandex.Maps API.
+        - list[str]:
+            Parts of the found address.
+        """
+        raw_address = await cls.__request(text)
+        if raw_address is None:
+            return []
+
+        expire = cls.expire if raw_address else cls.not_found_expire
+        try:
+            await acache_db.set(key, json.dumps(raw_address), expire)
+        except RedisError:
+            pass
+        return raw_address
+
+    @classmethod
+    async def __get_data(cls, address: AddressScheme) -> tuple[str, list]:
+        """Get data from the cache or from the Yandex.Maps API.
 
         #### Args:
         - address (AddressScheme):
-            [Data to search as string, result from API].
+            Data to search.
+
+        #### Returns:
+        - tuple[str, list]:
+            [Data to search as string, parts of the found address].
         """
         text = " ".join(
             str(i)
@@ -84,10 +224,21 @@ class YaMapAPI:
                 exclude_none=True, exclude={"additional", "office", "phones"}
             ).values()
         )
+        key = cls.prefix + " ".join(text.lower().split())
 
-        async with ClientSession() as session:
-            async with session.get(url=cls.pre_url + text) as response:
-                return text, await response.json()
+        try:
+            cached = await acache_db.get(key)
+        except RedisError:
+            cached = None
+        if cached is not None:
+            return text, json.loads(cached)
+
+        task = cls.__in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(cls.__fetch(key, text))
+            cls.__in_flight[key] = task
+            task.add_done_callback(lambda _: cls.__in_flight.pop(key, None))
+        return text, await asyncio.shield(task)
 
     @classmethod
     async def get_valid_address(cls, address: AddressScheme) -> AddressScheme:
@@ -105,12 +256,8 @@ class YaMapAPI:
         - AddressScheme:
             Valid data from Yandex.Maps API.
         """
-        str_address, data = await cls.__get_data(address)
+        str_address, raw_address = await cls.__get_data(address)
         try:
-            raw_address = data["features"][0]["properties"][
-                "GeocoderMetaData"
-            ]["text"].split(", ")[1:]
-
             valid_address = AddressScheme.from_orm(address)
 
             valid_address.region = raw_address[0]
@@ -168,13 +315,12 @@ async def countries_always_exists() -> None:
     """Set countries to the database if they don't exist."""
     async with ASessionMaker() as db:
         db: AsyncSession
-        if await db.scalar(select(CountryModel.id).limit(1)):
-            return None
-
-        countries = (
-            CountryModel(name=name)
+        exists = set(await db.scalars(select(CountryModel.name)))
+        countries = [
+            {"name": name}
             for name in Countries._value2member_map_.keys()
-        )
-        db.add_all(countries)
-        await db.commit()
+            if name not in exists
+        ]
+        if countries:
+            await CRUD(CountryModel).create_many(db, countries)
     return None
@@ -1,8 +1,7 @@
 from typing import Callable
 
-from .mailing import Mailing
+from .mailing import MailDispatcher, mail_dispatcher  # noqa F401
 
 
 async def get_send_confirm_link() -> Callable:
-    mailing = Mailing()
-    return mailing.send_confirm_email
+    return mail_dispatcher.send_confirm_email
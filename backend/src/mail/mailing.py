@@ -1,45 +1,87 @@
-import socket
+import asyncio
+import logging
 from email.header import Header
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-from smtplib import SMTP_SSL, SMTPAuthenticationError, SMTPSenderRefused
+from smtplib import (
+    SMTP,
+    SMTP_SSL,
+    SMTPAuthenticationError,
+    SMTPException,
+    SMTPRecipientsRefused,
+    SMTPSenderRefused,
+)
 
 from fastapi.templating import Jinja2Templates
 from jinja2 import Template
+from prometheus_client import Counter, Gauge
+from pydantic import SecretStr
 from src.config import CONFIRM_REG_HTML, MAIL_TEMPLATES_DIR, settings
 from src.core.enums import SendEmailFrom
 
+logger = logging.getLogger(__name__)
+
 templates = Jinja2Templates(MAIL_TEMPLATES_DIR)
 
+MAIL_QUEUE_DEPTH = Gauge(
+    "mail_queue_depth",
+    "Emails waiting to be sent.",
+    multiprocess_mode="livesum",
+)
+MAIL_SENT = Counter(
+    "mail_sent_total",
+    "Emails processed by the dispatcher.",
+    ("result",),
+)
+
 
-class Mailing:
-    """Sending messages.
+class MailDispatcher:
+    """Sending messages in the background.
+
+    Messages are put in a bounded queue and sent by a few workers.
+    Every worker keeps its own authenticated SMTP connection
+    and reuses it for the next messages,
+    so a request never waits for the mail server.
 
     #### Attrs:
-    - connection (SMTP):
-        Connecting to a mail server.
     - smtp_host (str): Default `Google Mail`.
         Mail server host.
     - smtp_port (int): Default from settings.
         Mail server port.
     - from_addr (str): Default from settings.
         Email address on behalf of which the mailing will be carried out.
-    - smtp_password (str): Default from settings.
+    - smtp_password (SecretStr): Default from settings.
         Password to connect to mail server.
+    - use_ssl (bool): Default from settings.
+        Connect with `SMTP_SSL` or with plain `SMTP`.
+    - workers (int): Default from settings.
+        Number of SMTP connections.
+    - queue_size (int): Default from settings.
+        Maximum number of messages waiting to be sent.
+    - batch_size (int): Default from settings.
+        Maximum number of messages taken by a worker at once.
+    - timeout (int): Default from settings.
+        Timeout for SMTP operations in seconds.
     """
 
-    connection = None
     smtp_host = settings.google_smtp_host
     smtp_port = settings.google_smtp_port
     from_addr = SendEmailFrom.GOOGLE
     smtp_password = settings.google_smtp_password
+    use_ssl = settings.smtp_use_ssl
+    workers = settings.mail_workers
+    queue_size = settings.mail_queue_size
+    batch_size = settings.mail_batch_size
+    timeout = settings.mail_timeout
 
     def __init__(
         self,
         smtp_host: str | None = None,
         smtp_port: int | None = None,
         from_addr: SendEmailFrom | None = None,
-        smtp_password: str | None = None,
+        smtp_password: SecretStr | None = None,
+        use_ssl: bool | None = None,
+        workers: int | None = None,
     ) -> None:
         if smtp_host is not None:
             self.smtp_host = smtp_host
@@ -49,33 +91,55 @@ class Mailing:
             self.from_addr = from_addr
         if smtp_password is not None:
             self.smtp_password = smtp_password
+        if use_ssl is not None:
+            self.use_ssl = use_ssl
+        if workers is not None:
+            self.workers = workers
 
-        match self.from_addr:
-            case SendEmailFrom.GOOGLE:
-                self.__set_google_connection()
-            case _:
-                raise AttributeError(
-                    f"{self.__class__}: attr `from_addr` unknown value"
-                )
+        self.__queue: asyncio.Queue[MIMEMultipart] | None = None
+        self.__tasks: list[asyncio.Task] = []
 
-    def __set_google_connection(self) -> None:
-        """Create a connection to the `Google SMTP server`."""
-        try:
-            connection = SMTP_SSL(
-                host=self.smtp_host,
-                port=self.smtp_port,
-            )
-            connection.login(
-                user=self.from_addr,
-                password=self.smtp_password.get_secret_value(),
-            )
-        except socket.timeout:
-            return f"the smtp_host `{self.smtp_host}` didn`t respond"
+    @property
+    def is_running(self) -> bool:
+        """Check that a worker is alive and takes the messages."""
+        return any(not task.done() for task in self.__tasks)
 
-        except (SMTPAuthenticationError, SMTPSenderRefused):
-            return "incorrect from_addr or password."
+    async def start(self) -> None:
+        """Start the workers, messages of the failed ones are kept."""
+        if self.is_running:
+            return None
 
-        self.connection = connection
+        queue = asyncio.Queue(self.queue_size)
+        if self.__queue is not None:
+            while not self.__queue.empty():
+                queue.put_nowait(self.__queue.get_nowait())
+        self.__queue = queue
+        self.__tasks = [
+            asyncio.create_task(self.__worker(), name=f"mail_worker_{i}")
+            for i in range(self.workers)
+        ]
+        return None
+
+    async def stop(self, timeout: float = 5) -> None:
+        """Stop the workers after sending the queued messages.
+
+        #### Args:
+        - timeout (float): Default `5`.
+            How long to wait for the queue to empty in seconds.
+        """
+        if not self.is_running:
+            self.__tasks = []
+            return None
+
+        try:
+            await asyncio.wait_for(self.__queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("%s emails were not sent", self.__queue.qsize())
+
+        for task in self.__tasks:
+            task.cancel()
+        await asyncio.gather(*self.__tasks, return_exceptions=True)
+        self.__tasks = []
         return None
 
     def confirmation_message(self, recipient: str, link: str) -> MIMEMultipart:
@@ -93,15 +157,15 @@ class Mailing:
         """
         email = MIMEMultipart("alternative")
         email["Subject"] = Header("Confirmation of registration")
-        email["fROM"] = self.from_addr
+        email["From"] = self.from_addr
         email["To"] = recipient
         template: Template = templates.get_template(CONFIRM_REG_HTML)
         content = template.render({"link": link})
         email.attach(MIMEText(content, "html"))
         return email
 
-    def send_confirm_email(self, recipient: str, link: str) -> None:
-        """Send a confirmation email to the recipient.
+    async def send_confirm_email(self, recipient: str, link: str) -> None:
+        """Put a confirmation email to the sending queue.
 
         #### Args:
         - recipient (str):
@@ -109,16 +173,133 @@ class Mailing:
         - link (str):
             Link to confirm.
         """
-        if self.connection is None:
-            return None
+        if not self.is_running:
+            await self.start()
 
-        msg = self.confirmation_message(recipient, link)
         try:
-            self.connection.send_message(msg, from_addr=self.from_addr)
-        except (SMTPAuthenticationError, SMTPSenderRefused) as exc:
-            print("error:", exc.args[0])
+            self.__queue.put_nowait(self.confirmation_message(recipient, link))
+        except asyncio.QueueFull:
+            MAIL_SENT.labels("dropped").inc()
+            logger.error("mail queue is full, email to %s dropped", recipient)
             return None
 
-        finally:
-            self.connection.close()
+        MAIL_QUEUE_DEPTH.inc()
         return None
+
+    async def __worker(self) -> None:
+        """Take messages from the queue by batches and send them."""
+        connection: SMTP | None = None
+        try:
+            while True:
+                batch = [await self.__queue.get()]
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self.__queue.get_nowait())
+                    except asyncio.QueueEmpty:
+                        break
+
+                MAIL_QUEUE_DEPTH.dec(len(batch))
+                try:
+                    connection = await asyncio.to_thread(
+                        self.__send_batch, connection, batch
+                    )
+                except Exception:
+                    MAIL_SENT.labels("failed").inc(len(batch))
+                    logger.exception("%s emails were not sent", len(batch))
+                finally:
+                    for _ in batch:
+                        self.__queue.task_done()
+        finally:
+            if connection is not None:
+                await asyncio.to_thread(self.__close, connection)
+
+    def __connect(self) -> SMTP:
+        """Create an authenticated connection to the SMTP server.
+
+        #### Returns:
+        - SMTP:
+            Connection to the mail server.
+        """
+        smtp_class = SMTP_SSL if self.use_ssl else SMTP
+        connection = smtp_class(
+            host=self.smtp_host,
+            port=self.smtp_port,
+            timeout=self.timeout,
+        )
+        try:
+            connection.login(
+                user=self.from_addr,
+                password=self.smtp_password.get_secret_value(),
+            )
+        except Exception:
+            self.__close(connection)
+            raise
+        return connection
+
+    @staticmethod
+    def __close(connection: SMTP) -> None:
+        try:
+            connection.quit()
+        except (SMTPException, OSError):
+            connection.close()
+
+    def __send_batch(
+        self,
+        connection: SMTP | None,
+        batch: list[MIMEMultipart],
+    ) -> SMTP | None:
+        """Send messages through the connection.
+
+        A broken connection is reopened once for every message.
+        Runs in a thread, because `smtplib` is blocking.
+
+        #### Args:
+        - connection (SMTP | None):
+            Connection from the previous batch.
+        - batch (list[MIMEMultipart]):
+            Messages to send.
+
+        #### Returns:
+        - SMTP | None:
+            Connection for the next batch.
+        """
+        for i, msg in enumerate(batch):
+            for attempt in range(2):
+                try:
+                    if connection is None:
+                        connection = self.__connect()
+                    connection.send_message(msg, from_addr=self.from_addr)
+                    MAIL_SENT.labels("sent").inc()
+                    break
+
+                except (SMTPAuthenticationError, SMTPSenderRefused) as exc:
+                    # the rest of the batch would fail the same way
+                    MAIL_SENT.labels("failed").inc(len(batch) - i)
+                    logger.error(
+                        "incorrect from_addr or password, "
+                        "%s emails were not sent: %s",
+                        len(batch) - i,
+                        exc,
+                    )
+                    return connection
+
+                except SMTPRecipientsRefused as exc:
+                    MAIL_SENT.labels("failed").inc()
+                    logger.error("recipient refused: %s", exc.recipients)
+                    break
+
+                except (SMTPException, OSError) as exc:
+                    if connection is not None:
+                        self.__close(connection)
+                    connection = None
+                    if attempt:
+                        MAIL_SENT.labels("failed").inc()
+                        logger.error(
+                            "the smtp_host `%s` failed: %s",
+                            self.smtp_host,
+                            exc,
+                        )
+        return connection
+
+
+mail_dispatcher = MailDispatcher()
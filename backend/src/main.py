@@ -1,4 +1,8 @@
+import asyncio
+import logging
 import os
+from contextlib import contextmanager
+from time import perf_counter
 
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request, status
@@ -6,23 +10,40 @@ from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
 from fastapi.responses import JSONResponse, RedirectResponse
+from src.admin.profiling import ProfilingMiddleware
 from src.api_v1 import api_v1_router
 from src.authentication import auth_router
+from src.authentication.hashing import password_hasher
 from src.authentication.security import admin_always_exists
-from src.config import settings
+from src.config import Limits, RedisPrefixes, settings
 from src.core.enums import AppPaths
+from src.core.loop_monitor import loop_monitor
+from src.core.metrics import MetricsMiddleware, metrics_endpoint
+from src.core.openapi import OpenAPIDocument
 from src.core.utils import change_openapi_schema
+from src.db.postgres import NEXT_CURSOR_HEADER
 from src.db.postgres.database import check_postgres
-from src.db.redis.database import check_redis
+from src.db.postgres.stats import SQLStatsMiddleware
+from src.db.redis.cache import read_cache
+from src.db.redis.database import check_redis, close_redis, single_runner
+from src.geo.client import geocoder_client
+from src.geo.gazetteer import gazetteer
 from src.geo.utils import countries_always_exists
+from src.mail import mail_dispatcher
 
 load_dotenv(".env")
 
+# printed by the handlers of uvicorn
+logger = logging.getLogger("uvicorn.error")
+
 app = FastAPI(
     debug=settings.debug,
     title=settings.app_title,
     description=settings.app_description,
     version=settings.app_version,
+    openapi_url=None,  # served by `openapi_document`
+    docs_url=None,
+    redoc_url=None,
 )
 
 
@@ -51,19 +72,32 @@ def custom_openapi():
 
 
 app.openapi = custom_openapi
+openapi_document = OpenAPIDocument(app)
+openapi_document.setup()
+app.add_route(AppPaths.METRICS, metrics_endpoint, include_in_schema=False)
 
 origins = [
     "http://localhost",
     "http://localhost:8008",
 ]
 
+app.add_middleware(
+    SQLStatsMiddleware,
+    max_queries=settings.sql_max_queries,
+    max_repeats=settings.sql_max_repeats,
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # the cursor of the next page must be readable by browsers
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
+# inside of the metrics, so the time of profiling is counted
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 
 @app.exception_handler(RequestValidationError)
@@ -79,13 +113,50 @@ async def bad_request_handler(request: Request, exc: RequestValidationError):
     )
 
 
+@contextmanager
+def startup_phase(name: str):
+    start = perf_counter()
+    yield
+    logger.info("startup %s: %.0f ms", name, (perf_counter() - start) * 1000)
+
+
 @app.on_event("startup")
 async def start_up():
-    if not os.environ.get("TESTING"):
-        check_redis()
-        await check_postgres()
-        await admin_always_exists()
-        await countries_always_exists()
+    with startup_phase("total"):
+        await loop_monitor.start()
+        with startup_phase("openapi"):
+            openapi_document.build()
+        password_hasher.start()
+        await mail_dispatcher.start()
+        if os.environ.get("TESTING"):
+            return None
+
+        with startup_phase("checks"):
+            await asyncio.gather(
+                asyncio.to_thread(check_redis),
+                check_postgres(settings.db_pool_prewarm),
+            )
+        with startup_phase("seeding"):
+            async with single_runner(
+                RedisPrefixes.STARTUP + "seeding", Limits.STARTUP_LOCK_TIME
+            ) as must_seed:
+                if must_seed:
+                    await asyncio.gather(
+                        admin_always_exists(),
+                        countries_always_exists(),
+                    )
+        with startup_phase("caches"):
+            await asyncio.gather(read_cache.start(), gazetteer.load())
+
+
+@app.on_event("shutdown")
+async def shut_down():
+    await loop_monitor.stop()
+    await mail_dispatcher.stop()
+    password_hasher.shutdown()
+    await geocoder_client.close()
+    await read_cache.stop()
+    await close_redis()
 
 
 @app.get(
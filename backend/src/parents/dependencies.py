@@ -1,24 +1,21 @@
 from fastapi import Depends
-from sqlalchemy.ext.asyncio import AsyncSession
-from src.authentication import TokenDataScheme, get_token_data
+from src.authentication import Principal, get_principal, register_profile
+from src.core.enums import UserType
 from src.core.exceptions import CredentialsException
-from src.db.postgres import get_db
 
-from .parents.crud import parent_crud
 from .parents.models import ParentModel
 
+register_profile(UserType.PARENT, ParentModel)
+
 
 async def get_token_parent(
-    db: AsyncSession = Depends(get_db),
-    token_data: TokenDataScheme = Depends(get_token_data),
+    principal: Principal = Depends(get_principal),
 ) -> ParentModel:
     """Get parent by `JWT` token.
 
     #### Args:
-    - db (AsyncSession):
-        Connecting to the database.
-    - token_data (TokenDataScheme):
-        Data from JWT token.
+    - principal (Principal):
+        The user and the profile.
 
     #### Raises:
     - CredentialsException:
@@ -28,7 +25,6 @@ async def get_token_parent(
     - ParentModel:
         The parent object.
     """
-    parent = await parent_crud.get_active_parent(db, token_data.email)
-    if parent is None:
+    if not isinstance(principal.profile, ParentModel):
         raise CredentialsException
-    return parent
+    return principal.profile
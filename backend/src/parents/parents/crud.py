@@ -2,6 +2,7 @@ from sqlalchemy import delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.authentication import AuthModel
 from src.db.postgres import CRUD
+from src.db.redis.cache import read_cache
 
 from .models import ParentModel
 
@@ -52,9 +53,18 @@ class ParentCRUD(CRUD):
         - email (str):
             The email to look for the `auth` object to delete.
         """
+        # the profile stays with `auth_id` set to NULL
+        ids = (
+            await db.scalars(
+                select(self.model.id)
+                .join(AuthModel, self.model.auth_id == AuthModel.id)
+                .where(AuthModel.email == email)
+            )
+        ).all()
         await db.execute(delete(AuthModel).where(AuthModel.email == email))
         await db.commit()
+        await self.invalidate(*ids)
         return None
 
 
-parent_crud = ParentCRUD(ParentModel)
+parent_crud = ParentCRUD(ParentModel, cache=read_cache)
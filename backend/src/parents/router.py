@@ -1,15 +1,15 @@
 from fastapi import APIRouter, Depends, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.authentication import AuthModel, get_token_user
+from src.authentication import AuthModel, get_token_user, principal_crud
 from src.core.exceptions import UnprocessableEntityException
-from src.db.postgres import get_db
+from src.db.postgres import SessionRoute, get_db
 
 from .dependencies import get_token_parent
 from .parents.crud import parent_crud
 from .parents.models import ParentModel
 from .parents.schemes import ResponseParentScheme, UpdateParentScheme
 
-router = APIRouter()
+router = APIRouter(route_class=SessionRoute)
 
 
 @router.get(
@@ -31,6 +31,7 @@ async def watch_me(
 async def update_me(
     *,
     db: AsyncSession = Depends(get_db),
+    auth_user: AuthModel = Depends(get_token_user),
     parent: ParentModel = Depends(get_token_parent),
     update_data: UpdateParentScheme,
 ):
@@ -42,6 +43,7 @@ async def update_me(
     if err is not None:
         raise UnprocessableEntityException(detail=err)
 
+    await principal_crud.invalidate(auth_user.email)
     return None
 
 
@@ -56,4 +58,5 @@ async def delete_me(
     auth_user: AuthModel = Depends(get_token_user),
 ):
     await parent_crud.delete_auth(db, auth_user.email)
+    await principal_crud.invalidate(auth_user.email)
     return None
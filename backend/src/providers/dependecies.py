@@ -1,25 +1,22 @@
 from fastapi import Depends
-from sqlalchemy.ext.asyncio.session import AsyncSession
-from src.authentication.schemes import TokenDataScheme
-from src.authentication.security import get_token_data
+from src.authentication.principal import Principal, register_profile
+from src.authentication.security import get_principal
+from src.core.enums import UserType
 from src.core.exceptions import CredentialsException, ForbiddenException
-from src.db.postgres import get_db
 
-from .owners.crud import owner_crud
 from .owners.models import OwnerModel
 
+register_profile(UserType.OWNER, OwnerModel)
+
 
 async def get_token_empty_owner(
-    db: AsyncSession = Depends(get_db),
-    token_data: TokenDataScheme = Depends(get_token_data),
+    principal: Principal = Depends(get_principal),
 ) -> OwnerModel:
     """Get owner by `JWT` token.
 
     #### Args:
-    - db (AsyncSession):
-        Connecting to the database.
-    - token_data (TokenDataScheme):
-        Data from JWT token.
+    - principal (Principal):
+        The user and the profile.
 
     #### Raises:
     - CredentialsException:
@@ -29,11 +26,10 @@ async def get_token_empty_owner(
     - OwnerModel:
         The owner object.
     """
-    owner = await owner_crud.get_active_owner(db, token_data.email)
-    if owner is None:
+    if not isinstance(principal.profile, OwnerModel):
         raise CredentialsException
 
-    return owner
+    return principal.profile
 
 
 async def get_token_owner(
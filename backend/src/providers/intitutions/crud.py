@@ -1,7 +1,8 @@
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.db.postgres import CRUD
-from src.geo import address_crud
+from src.db.redis.cache import read_cache
+from src.geo import address_crud, phone_crud
 
 from .models import InstitutionModel
 from .schemes import CreateInstitutionScheme
@@ -61,9 +62,12 @@ class InstitutionCRUD(CRUD):
         except IntegrityError as err:
             return None, err.args[0].split(":")[1]
 
+        # the phones of a new address are inserted with it
+        await phone_crud.invalidate()
+        await self.invalidate(db_obj.id)
         if need_refresh:
             await db.refresh(db_obj)
         return db_obj, "None", full_address
 
 
-institution_crud = InstitutionCRUD(InstitutionModel)
+institution_crud = InstitutionCRUD(InstitutionModel, cache=read_cache)
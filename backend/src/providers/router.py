@@ -1,12 +1,13 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.authentication.models import AuthModel
+from src.authentication.principal import principal_crud
 from src.authentication.security import get_token_user
 from src.core.exceptions import (
     BadRequestException,
     UnprocessableEntityException,
 )
-from src.db.postgres import get_db
+from src.db.postgres import SessionRoute, get_db, get_read_db, set_next_cursor
 from src.geo import PhoneModel, phone_crud
 
 from .dependecies import get_token_empty_owner
@@ -17,7 +18,7 @@ from .owners.crud import owner_crud
 from .owners.models import OwnerModel
 from .owners.shemes import ResponseOwnerScheme, UpdateOwnerScheme
 
-router = APIRouter()
+router = APIRouter(route_class=SessionRoute)
 
 NOT_IMPLEMENTED = {"This func": "Not implemented"}
 
@@ -41,6 +42,7 @@ async def watch_me(
 async def update_me(
     *,
     db: AsyncSession = Depends(get_db),
+    auth_user: AuthModel = Depends(get_token_user),
     owner: OwnerModel = Depends(get_token_empty_owner),
     update_data: UpdateOwnerScheme,
 ):
@@ -52,6 +54,7 @@ async def update_me(
     if err is not None:
         raise UnprocessableEntityException(detail=err)
 
+    await principal_crud.invalidate(auth_user.email)
     return None
 
 
@@ -66,6 +69,7 @@ async def delete_me(
     auth_user: AuthModel = Depends(get_token_user),
 ):
     await owner_crud.delete_auth(db, auth_user.email)
+    await principal_crud.invalidate(auth_user.email)
     return None
 
 
@@ -74,12 +78,20 @@ async def delete_me(
     summary="Get a list of my institutions",
 )
 async def get_my_institutions(
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     owner: OwnerModel = Depends(get_token_empty_owner),
+    cursor: str | None = None,
+    limit: int | None = Query(default=10, le=50),
 ):
-    return await institution_crud.get_many(
-        db, expression=(InstitutionModel.owner_id == owner.id)
+    institutions, next_cursor = await institution_crud.get_page(
+        db,
+        cursor,
+        limit,
+        expression=(InstitutionModel.owner_id == owner.id),
     )
+    set_next_cursor(response, next_cursor)
+    return institutions
 
 
 @router.post(
@@ -0,0 +1,118 @@
+"""Production server.
+
+    python -m src.server
+
+Gunicorn keeps `server_workers` uvicorn processes with uvloop and
+httptools, restarts a worker after `server_max_requests` requests and
+lets the workers finish their requests on `SIGTERM`. The metrics of
+the workers are shared by files in `PROMETHEUS_MULTIPROC_DIR`.
+"""
+import os
+import tempfile
+from pathlib import Path
+
+from gunicorn.app.base import BaseApplication
+from gunicorn.arbiter import Arbiter
+from gunicorn.util import import_app
+from src.config import settings
+from uvicorn.workers import UvicornWorker
+
+# don't import `prometheus_client` here, it must see the directory
+MULTIPROCESS_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+
+class Worker(UvicornWorker):
+    """Uvicorn worker without fallback to the slow loop and parser."""
+
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools"}
+
+
+class Server(BaseApplication):
+    """Gunicorn application serving the app by the uvicorn workers.
+
+    #### Attrs:
+    - app_uri (str):
+        Path to the app as `module:attribute`.
+    - options (dict):
+        Gunicorn settings.
+    """
+
+    def __init__(self, app_uri: str, options: dict) -> None:
+        self.app_uri = app_uri
+        self.options = options
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        # imported by every worker after the fork
+        return import_app(self.app_uri)
+
+
+def configure_workers(workers: int) -> None:
+    """Fit the pools of all workers into `db_max_connections`.
+
+    The workers import the app after the fork, so they get the changed
+    settings of the master process. The master must not import
+    `src.db.postgres` before it, the engines would keep the old pools.
+    A worker with the replica has two pools. The default budget is for
+    the default `max_connections` of Postgres, set it for another server.
+
+    #### Args:
+    - workers (int):
+        Number of the worker processes.
+    """
+    from src.db.profiles import split_pool
+
+    engines = 2 if settings.postgres_replica_host else 1
+    settings.db_pool_size, settings.db_max_overflow = split_pool(
+        settings.db_profile,
+        workers * engines,
+        settings.db_max_connections,
+        settings.db_pool_size,
+        settings.db_max_overflow,
+    )
+    return None
+
+
+def prepare_metrics_dir() -> None:
+    """Set an empty directory for the metrics of the workers."""
+    path = os.environ.get(MULTIPROCESS_DIR_ENV)
+    if path is None:
+        path = tempfile.mkdtemp(prefix="prometheus_")
+        os.environ[MULTIPROCESS_DIR_ENV] = path
+    for file in Path(path).glob("*.db"):
+        file.unlink()
+    return None
+
+
+def child_exit(server: Arbiter, worker: Worker) -> None:
+    """Drop the live gauges of the finished worker."""
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def main() -> None:
+    workers = settings.server_workers or os.cpu_count() or 1
+    prepare_metrics_dir()
+    configure_workers(workers)
+    Server(
+        "src.main:app",
+        {
+            "bind": f"{settings.server_host}:{settings.server_port}",
+            "workers": workers,
+            "worker_class": "src.server.Worker",
+            "max_requests": settings.server_max_requests,
+            "max_requests_jitter": settings.server_max_requests_jitter,
+            "graceful_timeout": settings.server_graceful_timeout,
+            "accesslog": "-",
+            "child_exit": child_exit,
+        },
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
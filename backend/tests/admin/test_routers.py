@@ -0,0 +1,70 @@
+from typing import Generator
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.admin.dependencies import get_admin_user
+from src.authentication import AuthModel
+from src.core.enums import UserType
+from src.db.postgres import NEXT_CURSOR_HEADER, get_read_db
+
+from ..conftest import API_V1_URL, get_test_db
+
+AUTHS_URL = API_V1_URL + "/admins/auth/all"
+
+
+@pytest.fixture(name="admin_client")
+def get_admin_client(
+    http_client: TestClient, clean_db
+) -> Generator[TestClient, None, None]:
+    """HTTP client of an admin with the test database for reading.
+
+    #### Yields:
+    - TestClient
+    """
+    http_client.app.dependency_overrides[get_admin_user] = lambda: AuthModel(
+        email="admin@example.com", user_type=UserType.ADMIN
+    )
+    http_client.app.dependency_overrides[get_read_db] = get_test_db
+    yield http_client
+
+
+@pytest.mark.crud
+class TestKeysetPagination:
+    async def test_walk_two_pages(self, admin_client: TestClient):
+        db: AsyncSession = await anext(get_test_db())
+        try:
+            await db.execute(
+                insert(AuthModel),
+                [
+                    {"email": f"user_{i}@example.com", "password": "hash"}
+                    for i in range(3)
+                ],
+            )
+            await db.commit()
+        finally:
+            await db.close()
+
+        origin = {"Origin": "http://localhost"}
+        response = admin_client.get(
+            AUTHS_URL, params={"limit": 2}, headers=origin
+        )
+        assert response.status_code == 200, response.text
+        assert (
+            NEXT_CURSOR_HEADER.lower()
+            in response.headers["Access-Control-Expose-Headers"].lower()
+        )
+        first_page = [auth["email"] for auth in response.json()]
+        cursor = response.headers[NEXT_CURSOR_HEADER]
+
+        response = admin_client.get(
+            AUTHS_URL, params={"limit": 2, "cursor": cursor}, headers=origin
+        )
+        assert response.status_code == 200, response.text
+        second_page = [auth["email"] for auth in response.json()]
+        assert NEXT_CURSOR_HEADER not in response.headers
+
+        assert first_page + second_page == [
+            f"user_{i}@example.com" for i in range(3)
+        ]
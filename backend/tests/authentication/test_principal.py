@@ -0,0 +1,142 @@
+import json
+from typing import Generator
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.admin.dependencies import get_admin_user
+from src.authentication import AuthModel, principal_crud
+from src.authentication.security import create_JWT_token
+from src.core.enums import UserType
+
+from ..conftest import API_V1_URL, CHANGE_PASSWORD_URL, get_test_db
+from ..utils import Users
+
+DEACTIVATE_URL = API_V1_URL + "/admins/auth/{}/deactivate"
+EMAIL = Users.parent_1["email"]
+
+
+class FakeCache:
+    """Redis of the principal cache without expiration."""
+
+    def __init__(self) -> None:
+        self.data = {}
+
+    async def get(self, key: str) -> bytes | None:
+        return self.data.get(key)
+
+    async def set(self, key: str, value: str, ex: int) -> None:
+        self.data[key] = value.encode()
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.data.pop(key, None)
+
+
+@pytest.fixture
+def cache(monkeypatch) -> FakeCache:
+    cache = FakeCache()
+    monkeypatch.setattr("src.authentication.principal.acache_db", cache)
+    return cache
+
+
+@pytest.fixture
+async def db(clean_db) -> AsyncSession:
+    session = await anext(get_test_db())
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+@pytest.fixture
+async def user(db: AsyncSession) -> AuthModel:
+    obj = AuthModel(
+        email=EMAIL,
+        password="hash",
+        user_type=UserType.PARENT.value,
+        is_active=True,
+    )
+    db.add(obj)
+    await db.commit()
+    return obj
+
+
+@pytest.fixture
+def headers(user: AuthModel) -> dict[str, str]:
+    token = create_JWT_token({"sub": user.email, "ut": user.user_type})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture(name="admin_client")
+def get_admin_client(
+    http_client: TestClient,
+) -> Generator[TestClient, None, None]:
+    http_client.app.dependency_overrides[get_admin_user] = lambda: AuthModel(
+        email="admin@example.com", user_type=UserType.ADMIN
+    )
+    yield http_client
+
+
+async def get_cached(
+    db: AsyncSession, cache: FakeCache, email: str = EMAIL
+) -> dict:
+    """Load the principal to the cache and get the cached data."""
+    assert await principal_crud.get(db, email) is not None
+    return json.loads(cache.data[principal_crud.prefix + email])
+
+
+@pytest.mark.crud
+class TestPrincipalCache:
+    async def test_password_is_not_cached(
+        self, db: AsyncSession, cache: FakeCache, user: AuthModel
+    ):
+        data = await get_cached(db, cache)
+
+        assert data["auth"]["email"] == EMAIL
+        assert "password" not in data["auth"]
+        principal = await principal_crud.get(db, EMAIL)
+        assert principal.auth.id == user.id
+        assert "password" not in principal.auth.__dict__
+
+    async def test_deactivation_invalidates(
+        self,
+        admin_client: TestClient,
+        db: AsyncSession,
+        cache: FakeCache,
+        user: AuthModel,
+        headers: dict[str, str],
+    ):
+        await get_cached(db, cache)
+
+        response = admin_client.patch(DEACTIVATE_URL.format(user.id))
+
+        assert response.status_code == status.HTTP_200_OK, response.text
+        assert principal_crud.prefix + EMAIL not in cache.data
+        # the cached principal is not used for the next request
+        response = admin_client.post(
+            CHANGE_PASSWORD_URL,
+            data={"password": "new_password"},
+            headers=headers,
+        )
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    async def test_password_change_invalidates(
+        self,
+        http_client: TestClient,
+        db: AsyncSession,
+        cache: FakeCache,
+        user: AuthModel,
+        headers: dict[str, str],
+    ):
+        response = http_client.post(
+            CHANGE_PASSWORD_URL,
+            data={"password": "new_password"},
+            headers=headers,
+        )
+
+        assert response.status_code == status.HTTP_200_OK, response.text
+        assert principal_crud.prefix + EMAIL not in cache.data
+        await db.refresh(user)
+        assert user.password != "hash"
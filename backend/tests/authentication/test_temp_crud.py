@@ -0,0 +1,71 @@
+import pytest
+from src.authentication.crud import temp_crud
+from src.authentication.schemes import CreateTempUserScheme
+from src.core.enums import UserType
+
+
+class FakeRedis:
+    """Redis of the temporary data without expiration."""
+
+    def __init__(self) -> None:
+        self.data = {}
+
+    async def set(self, key: str, value: bytes | str, ex: int) -> None:
+        self.data[key] = value.encode() if isinstance(value, str) else value
+
+    async def getdel(self, key: str) -> bytes | None:
+        return self.data.pop(key, None)
+
+
+@pytest.fixture(autouse=True)
+def redis(monkeypatch) -> FakeRedis:
+    redis = FakeRedis()
+    monkeypatch.setattr("src.authentication.crud.aauth_db", redis)
+    return redis
+
+
+@pytest.mark.parametrize(
+    "password",
+    (
+        "$argon2id$v=19$m=65536,t=3,p=4$c2FsdA$aGFzaA",
+        "pass\x00word\x00",
+        "пароль_ü_🔑",
+        "",
+    ),
+)
+@pytest.mark.parametrize("user_type", (None, UserType.PARENT, UserType.OWNER))
+async def test_temp_user_round_trip(password, user_type):
+    user = CreateTempUserScheme.construct(
+        email="user1@mail.ru", user_type=user_type, password=password
+    )
+
+    uuid = await temp_crud.set_temp_user(user)
+    temp_user = await temp_crud.pop_temp_user(uuid)
+
+    assert temp_user.email == user.email
+    assert temp_user.password == password
+    assert temp_user.user_type == (user_type or UserType.PARENT)
+
+
+async def test_temp_user_is_read_once(redis: FakeRedis):
+    user = CreateTempUserScheme.construct(
+        email="user1@mail.ru", user_type=UserType.PARENT, password="hash"
+    )
+
+    uuid = await temp_crud.set_temp_user(user)
+
+    assert await temp_crud.pop_temp_user(uuid) is not None
+    assert await temp_crud.pop_temp_user(uuid) is None
+    assert redis.data == {}
+
+
+async def test_want_password_is_read_once():
+    uuid = await temp_crud.set_want_password("user1@mail.ru")
+
+    assert await temp_crud.pop_want_password(uuid) == "user1@mail.ru"
+    assert await temp_crud.pop_want_password(uuid) is None
+
+
+async def test_unknown_uuid():
+    assert await temp_crud.pop_temp_user("a" * 32) is None
+    assert await temp_crud.pop_want_password("a" * 32) is None
@@ -26,6 +26,8 @@ from sqlalchemy.orm import sessionmaker
 from src.core.enums import TableNames
 from src.core.utils import postgres_dsn
 from src.db.postgres import get_db
+from src.db.redis.cache import read_cache
+from src.db.redis.database import cache_db
 from src.mail import get_send_confirm_link
 from src.main import app
 
@@ -130,6 +132,16 @@ async def get_test_session_maker(
     yield TestSession
 
 
+def clear_read_cache() -> None:
+    """Remove the cached reads of the truncated tables from all tiers."""
+    for key in cache_db.scan_iter(read_cache.prefix + "*"):
+        cache_db.delete(key)
+    cache_db.publish(
+        read_cache.channel, " ".join(f"{table}:all" for table in TableNames)
+    )
+    return None
+
+
 @pytest.fixture(scope="function")
 async def clean_db(get_test_session_maker: sessionmaker) -> None:
     """Clear the database of data
@@ -145,6 +157,7 @@ async def clean_db(get_test_session_maker: sessionmaker) -> None:
                 await session.execute(
                     text(f"""TRUNCATE TABLE {table} CASCADE;""")
                 )
+    clear_read_cache()
     yield
     async with get_test_session_maker() as session:
         session: AsyncSession
@@ -153,6 +166,7 @@ async def clean_db(get_test_session_maker: sessionmaker) -> None:
                 await session.execute(
                     text(f"""TRUNCATE TABLE {table} CASCADE;""")
                 )
+    clear_read_cache()
 
 
 async def get_test_db() -> Generator[AsyncSession, None, None]:
@@ -0,0 +1,56 @@
+import asyncio
+import logging
+import time
+
+import pytest
+from prometheus_client import REGISTRY
+from src.config import AppSettings, Limits
+from src.core.loop_monitor import LoopMonitor
+
+
+def blocking_call(seconds: float = 0.3):
+    time.sleep(seconds)
+
+
+async def test_blocking_call_is_logged(caplog):
+    monitor = LoopMonitor(interval=0.02, threshold=0.1)
+    blocks = REGISTRY.get_sample_value("event_loop_blocks_total")
+    await monitor.start()
+    await asyncio.sleep(0.05)
+    with caplog.at_level(logging.WARNING, "src.core.loop_monitor"):
+        blocking_call()
+        await asyncio.sleep(0.05)
+    await monitor.stop()
+
+    assert REGISTRY.get_sample_value("event_loop_blocks_total") == blocks + 1
+    assert len(caplog.records) == 1
+    assert "in blocking_call" in caplog.text
+
+
+async def test_lag_is_measured():
+    monitor = LoopMonitor(interval=0.01, threshold=None)
+    count = REGISTRY.get_sample_value("event_loop_lag_seconds_count")
+    await monitor.start()
+    await asyncio.sleep(0.05)
+    await monitor.stop()
+
+    assert REGISTRY.get_sample_value("event_loop_lag_seconds_count") > count
+
+
+async def test_blocking_longer_than_threshold_and_beat_is_seen(caplog):
+    monitor = LoopMonitor(interval=Limits.LOOP_LAG_CHECK_TIME, threshold=0.1)
+    await monitor.start()
+    await asyncio.sleep(0.05)
+    with caplog.at_level(logging.WARNING, "src.core.loop_monitor"):
+        blocking_call(0.1 + Limits.LOOP_LAG_CHECK_TIME + 0.05)
+        await asyncio.sleep(0.05)
+    await monitor.stop()
+
+    assert "in blocking_call" in caplog.text
+
+
+@pytest.mark.parametrize("value", ["", "none", "None"])
+def test_empty_threshold_switches_watchdog_off(monkeypatch, value):
+    monkeypatch.setenv("LOOP_BLOCK_THRESHOLD", value)
+
+    assert AppSettings().loop_block_threshold is None
@@ -0,0 +1,56 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from src.core.metrics import MetricsMiddleware, metrics_endpoint
+
+
+def requests_count(route: str, status: int) -> float:
+    return (
+        REGISTRY.get_sample_value(
+            "http_requests_total",
+            {"method": "GET", "route": route, "status": str(status)},
+        )
+        or 0
+    )
+
+
+@pytest.fixture
+def client() -> TestClient:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def item(item_id: int):
+        return {"id": item_id}
+
+    @app.get("/fail")
+    def fail():
+        raise RuntimeError
+
+    app.add_route("/metrics", metrics_endpoint)
+    app.add_middleware(MetricsMiddleware)
+    return TestClient(app, raise_server_exceptions=False)
+
+
+@pytest.mark.parametrize(
+    "path,route,status",
+    [
+        ("/items/1", "/items/{item_id}", 200),
+        ("/items/x", "/items/{item_id}", 422),
+        ("/random/path", "unmatched", 404),
+        ("/fail", "/fail", 500),
+    ],
+)
+def test_requests_are_counted_by_route(client, path, route, status):
+    before = requests_count(route, status)
+    client.get(path)
+
+    assert requests_count(route, status) == before + 1
+
+
+def test_metrics_endpoint(client):
+    client.get("/items/1")
+    response = client.get("/metrics")
+
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'route="/items/{item_id}"' in response.text
@@ -0,0 +1,57 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.core.openapi import OpenAPIDocument
+
+
+@pytest.fixture
+def client() -> TestClient:
+    app = FastAPI(openapi_url=None, docs_url=None, redoc_url=None)
+
+    @app.get("/items")
+    def items():
+        return []
+
+    OpenAPIDocument(app).setup()
+    return TestClient(app)
+
+
+def test_schema_is_built_once(client):
+    response = client.get("/openapi.json")
+    calls = []
+    client.app.openapi = lambda: calls.append(1) or {}
+
+    assert response.status_code == 200
+    assert "/items" in json.loads(response.content)["paths"]
+    assert "/openapi.json" not in response.json()["paths"]
+    assert client.get("/openapi.json").content == response.content
+    assert not calls
+
+
+@pytest.mark.parametrize(
+    "if_none_match,status_code",
+    [
+        ("{etag}", 304),
+        ('W/{etag}, "other"', 304),
+        ("*", 304),
+        ('"other"', 200),
+    ],
+)
+def test_conditional_get(client, if_none_match, status_code):
+    etag = client.get("/openapi.json").headers["etag"]
+    response = client.get(
+        "/openapi.json",
+        headers={"If-None-Match": if_none_match.format(etag=etag)},
+    )
+
+    assert response.status_code == status_code
+    assert response.headers["etag"] == etag
+    assert bool(response.content) == (status_code == 200)
+
+
+def test_docs_pages(client):
+    assert "/openapi.json" in client.get("/docs").text
+    assert "/openapi.json" in client.get("/redoc").text
+    assert client.get("/docs/oauth2-redirect").status_code == 200
@@ -0,0 +1,65 @@
+import asyncio
+import sys
+import time
+
+from src.core.profiling import (
+    Profile,
+    StackSampler,
+    collapse_stack,
+    collapsed_stacks,
+    current_profile,
+    record_span,
+)
+
+
+def busy_call(seconds: float):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_spans_are_limited():
+    profile = Profile("1", "GET", "/", max_spans=2)
+    for _ in range(3):
+        profile.add_span("sql", "SELECT 1", 0.001)
+    profile.finish("/")
+
+    data = profile.to_dict()
+    assert [span["kind"] for span in data["spans"]] == ["sql", "sql"]
+    assert data["dropped_spans"] == 1
+    assert data["route"] == "/" and data["seconds"] > 0
+
+
+async def test_span_is_recorded_in_current_profile():
+    profile = Profile("1", "GET", "/", max_spans=10)
+    record_span("redis", "GET", 0.001)
+    token = current_profile.set(profile)
+    record_span("redis", "SET", 0.001)
+    current_profile.reset(token)
+
+    assert [span[1] for span in profile.spans] == ["SET"]
+
+
+def test_stack_is_collapsed_from_root():
+    stack = collapse_stack(sys._getframe(), max_depth=2)
+
+    assert stack.endswith(f"{__name__}:test_stack_is_collapsed_from_root")
+    assert stack.count(";") == 1
+    assert collapsed_stacks({"a;b": 2, "a": 1}) == "a;b 2\na 1\n"
+
+
+async def test_samples_are_added_to_running_task():
+    sampler = StackSampler(interval=0.001, max_depth=64)
+    profile = Profile("1", "GET", "/", max_spans=10)
+    other = Profile("2", "GET", "/", max_spans=10)
+    other_task = asyncio.create_task(asyncio.sleep(1))
+    sampler.add(asyncio.current_task(), profile)
+    sampler.add(other_task, other)
+    busy_call(0.1)
+    sampler.remove(asyncio.current_task())
+    sampler.remove(other_task)
+    other_task.cancel()
+
+    assert sum(profile.stacks.values()) > 0
+    assert all(f"{__name__}:busy_call" in s for s in profile.stacks)
+    assert not other.stacks
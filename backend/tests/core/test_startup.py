@@ -0,0 +1,103 @@
+import asyncio
+import logging
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import Callable
+
+import pytest
+from sqlalchemy import func, select
+from src import main
+from src.authentication import AuthModel
+from src.config import RedisPrefixes
+from src.core.enums import Countries, UserType
+from src.db.redis import acache_db
+from src.geo import CountryModel
+
+from ..conftest import get_test_db
+
+PHASES = ("checks", "seeding", "caches", "total")
+SEEDING_LOCK = RedisPrefixes.STARTUP + "seeding"
+
+
+def counted(calls: Counter, name: str, func: Callable) -> Callable:
+    """Wrap the function to count its calls."""
+    if asyncio.iscoroutinefunction(func):
+
+        async def async_wrapper(*args, **kwargs):
+            calls[name] += 1
+            return await func(*args, **kwargs)
+
+        return async_wrapper
+
+    def wrapper(*args, **kwargs):
+        calls[name] += 1
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+@pytest.fixture
+def calls(monkeypatch) -> Counter:
+    """Calls of the startup phases with the real services."""
+    calls = Counter()
+    for name in (
+        "check_redis",
+        "check_postgres",
+        "admin_always_exists",
+        "countries_always_exists",
+    ):
+        monkeypatch.setattr(
+            main, name, counted(calls, name, getattr(main, name))
+        )
+    for obj, name in ((main.read_cache, "start"), (main.gazetteer, "load")):
+        monkeypatch.setattr(
+            obj, name, counted(calls, name, getattr(obj, name))
+        )
+
+    original_runner = main.single_runner
+
+    @asynccontextmanager
+    async def single_runner(name: str, timeout: float):
+        async with original_runner(name, timeout) as must_run:
+            calls[(name, must_run)] += 1
+            yield must_run
+
+    monkeypatch.setattr(main, "single_runner", single_runner)
+    return calls
+
+
+@pytest.mark.usefixtures("clean_db")
+async def test_startup_runs_every_phase_once(
+    monkeypatch, caplog, calls: Counter
+):
+    monkeypatch.delenv("TESTING")
+    # the logging config of the migrations disables the existing loggers
+    monkeypatch.setattr(main.logger, "disabled", False)
+
+    try:
+        with caplog.at_level(logging.INFO, main.logger.name):
+            await main.start_up()
+        lock_exists = await acache_db.exists(SEEDING_LOCK)
+    finally:
+        await main.shut_down()
+
+    assert calls == {
+        "check_redis": 1,
+        "check_postgres": 1,
+        (SEEDING_LOCK, True): 1,
+        "admin_always_exists": 1,
+        "countries_always_exists": 1,
+        "start": 1,
+        "load": 1,
+    }
+    for phase in PHASES:
+        assert caplog.text.count(f"startup {phase}:") == 1
+    assert lock_exists == 0
+
+    async with await anext(get_test_db()) as db:
+        assert await db.scalar(
+            select(func.count()).where(AuthModel.user_type == UserType.ADMIN)
+        )
+        assert await db.scalar(
+            select(func.count()).select_from(CountryModel)
+        ) == len(Countries)
@@ -0,0 +1,76 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from dns.exception import Timeout
+from dns.resolver import NXDOMAIN, NoAnswer
+from src.core import validators
+from src.core.exceptions import BadRequestException
+from src.core.validators import EmailDomainChecker, email_validator
+
+ANSWERS = {
+    ("good.test", "MX"): [SimpleNamespace(exchange="mx.good.test.")],
+    ("null.test", "MX"): [SimpleNamespace(exchange=".")],
+    ("a-only.test", "MX"): NoAnswer,
+    ("a-only.test", "A"): ["10.0.0.1"],
+    ("bad.test", "MX"): NXDOMAIN,
+    ("slow.test", "MX"): Timeout,
+}
+
+
+class FakeResolver:
+    calls = 0
+
+    async def resolve(self, domain: str, rdtype: str):
+        FakeResolver.calls += 1
+        await asyncio.sleep(0.01)
+        answer = ANSWERS[(domain, rdtype)]
+        if isinstance(answer, type):
+            raise answer
+        return answer
+
+
+@pytest.fixture
+def checker(monkeypatch) -> EmailDomainChecker:
+    monkeypatch.setattr(validators, "Resolver", FakeResolver)
+    FakeResolver.calls = 0
+    return EmailDomainChecker()
+
+
+def test_email_validator_normalizes_without_dns():
+    assert email_validator("User@Example.COM") == "user@example.com"
+
+
+@pytest.mark.parametrize(
+    "email, result",
+    (
+        ("a@good.test", True),
+        ("a@null.test", False),
+        ("a@a-only.test", True),
+        ("a@bad.test", False),
+        ("a@slow.test", True),
+    ),
+)
+async def test_is_deliverable(checker, email, result):
+    assert await checker.is_deliverable(email) is result
+
+
+async def test_results_are_cached(checker):
+    await checker.is_deliverable("a@bad.test")
+    with pytest.raises(BadRequestException):
+        await checker.check("b@bad.test")
+    assert FakeResolver.calls == 1
+
+
+async def test_resolver_errors_are_not_cached(checker):
+    await checker.is_deliverable("a@slow.test")
+    await checker.is_deliverable("a@slow.test")
+    assert FakeResolver.calls == 2
+
+
+async def test_concurrent_checks_share_lookup(checker):
+    results = await asyncio.gather(
+        *(checker.is_deliverable(f"{i}@good.test") for i in range(5))
+    )
+    assert all(results)
+    assert FakeResolver.calls == 1
@@ -0,0 +1,311 @@
+import asyncio
+
+import pytest
+from redis.exceptions import WatchError
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.db.postgres import CRUD
+from src.db.postgres.database import aengine
+from src.db.redis.cache import ReadThroughCache
+from src.parents import ParentModel
+
+
+class FakePipeline:
+    def __init__(self, redis: "FakeRedis") -> None:
+        self.redis = redis
+        self.calls = []
+        self.watched = None
+        self.immediate = False
+
+    async def __aenter__(self) -> "FakePipeline":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        return None
+
+    async def watch(self, key: str) -> None:
+        self.watched = (key, self.redis.data.get(key))
+        self.immediate = True
+
+    def multi(self) -> None:
+        self.immediate = False
+
+    def __getattr__(self, name: str):
+        if self.immediate:
+            return getattr(self.redis, name)
+
+        def call(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+
+        return call
+
+    async def execute(self) -> list:
+        if self.watched is not None:
+            key, value = self.watched
+            if self.redis.data.get(key) != value:
+                raise WatchError
+        return [
+            await getattr(self.redis, name)(*args, **kwargs)
+            for name, args, kwargs in self.calls
+        ]
+
+
+class FakePubSub:
+    def __init__(self, redis: "FakeRedis") -> None:
+        self.redis = redis
+        self.queue = asyncio.Queue()
+
+    async def subscribe(self, channel: str) -> None:
+        self.redis.subscribers.append(self.queue)
+
+    async def listen(self):
+        while True:
+            yield {"data": await self.queue.get()}
+
+    async def close(self) -> None:
+        self.redis.subscribers.remove(self.queue)
+
+
+class FakeRedis:
+    """Shared Redis of the workers without expiration."""
+
+    def __init__(self) -> None:
+        self.data = {}
+        self.subscribers = []
+        self.gets = 0
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+    def pubsub(self, **kwargs) -> FakePubSub:
+        return FakePubSub(self)
+
+    async def get(self, key: str):
+        self.gets += 1
+        return self.data.get(key)
+
+    async def ttl(self, key: str) -> int:
+        return 60 if key in self.data else -2
+
+    async def set(self, key: str, value: str, ex: int) -> None:
+        self.data[key] = value.encode()
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.data.pop(key, None)
+
+    async def sadd(self, key: str, *members: str) -> None:
+        self.data.setdefault(key, set()).update(m.encode() for m in members)
+
+    async def smembers(self, key: str) -> set:
+        return set(self.data.get(key, set()))
+
+    async def srem(self, key: str, *members: bytes) -> None:
+        self.data.get(key, set()).difference_update(members)
+
+    async def expire(self, key: str, ttl: int) -> None:
+        return None
+
+    async def incr(self, key: str) -> int:
+        self.data[key] = str(int(self.data.get(key, 0)) + 1).encode()
+        return int(self.data[key])
+
+    async def publish(self, channel: str, message: str) -> None:
+        for queue in self.subscribers:
+            queue.put_nowait(message.encode())
+
+
+@pytest.fixture
+def redis() -> FakeRedis:
+    return FakeRedis()
+
+
+async def start(cache: ReadThroughCache) -> ReadThroughCache:
+    await cache.start()
+    await asyncio.sleep(0)  # let the listener subscribe
+    return cache
+
+
+async def test_values_are_shared_by_redis(redis):
+    first = ReadThroughCache(redis, "c:", 10, 5)
+    second = ReadThroughCache(redis, "c:", 10, 5)
+    await first.set("key", "value", ["t:1"], 60)
+
+    assert await second.get("key") == "value"
+    assert await second.get("other") is None
+
+
+async def test_local_tier_is_used_only_when_subscribed(redis):
+    cache = ReadThroughCache(redis, "c:", 10, 5)
+    await cache.set("key", "value", ["t:1"], 60)
+    await cache.get("key")
+    await cache.get("key")
+    assert redis.gets == 2
+
+    await start(cache)
+    await cache.get("key")
+    await cache.get("key")
+    assert redis.gets == 3
+    await cache.stop()
+
+
+async def test_invalidation_reaches_other_workers(redis):
+    first = await start(ReadThroughCache(redis, "c:", 10, 5))
+    second = await start(ReadThroughCache(redis, "c:", 10, 5))
+    await first.set("key", "value", ["t:1", "t:all"], 60)
+    await first.set("other", "value", ["t:2"], 60)
+    assert await second.get("key") == "value"
+
+    version = await second.version()
+    await first.invalidate("t:1")
+    await asyncio.sleep(0)
+
+    assert await second.version() != version
+    assert await second.get("key") is None
+    assert await first.get("key") is None
+    assert await second.get("other") == "value"
+    await first.stop()
+    await second.stop()
+
+
+async def test_stale_version_is_not_stored(redis):
+    cache = ReadThroughCache(redis, "c:", 10, 5)
+    other = ReadThroughCache(redis, "c:", 10, 5)
+    version = await cache.version()
+    # another worker changes the data while this one reads it
+    await other.invalidate("t:1")
+    await cache.set("key", "value", ["t:1"], 60, version)
+
+    assert await cache.get("key") is None
+
+
+def set_between_phases(redis: FakeRedis, monkeypatch, fill) -> None:
+    """Run `fill` after the invalidation has read the keys of the tag."""
+    smembers = redis.smembers
+
+    async def read_then_fill(key: str) -> set:
+        members = await smembers(key)
+        monkeypatch.setattr(redis, "smembers", smembers)
+        await fill()
+        return members
+
+    monkeypatch.setattr(redis, "smembers", read_then_fill)
+
+
+async def test_value_read_before_invalidation_is_not_stored(
+    redis, monkeypatch
+):
+    cache = ReadThroughCache(redis, "c:", 10, 5)
+    other = ReadThroughCache(redis, "c:", 10, 5)
+    version = await cache.version()
+
+    async def fill():
+        await cache.set("key", "old", ["t:1"], 60, version)
+
+    set_between_phases(redis, monkeypatch, fill)
+    await other.invalidate("t:1")
+
+    assert await cache.get("key") is None
+
+
+async def test_value_read_after_invalidation_stays_tagged(redis, monkeypatch):
+    cache = ReadThroughCache(redis, "c:", 10, 5)
+    other = ReadThroughCache(redis, "c:", 10, 5)
+
+    async def fill():
+        version = await cache.version()
+        await cache.set("new", "value", ["t:1"], 60, version)
+
+    set_between_phases(redis, monkeypatch, fill)
+    await other.invalidate("t:1")
+    assert await cache.get("new") == "value"
+
+    # the next change of the tag still reaches the value
+    await other.invalidate("t:1")
+    assert await cache.get("new") is None
+
+
+async def test_least_recently_used_is_evicted(redis):
+    cache = await start(ReadThroughCache(redis, "c:", 2, 5))
+    await cache.set("a", "1", [], 60)
+    await cache.set("b", "2", [], 60)
+    await cache.get("a")
+    await cache.set("c", "3", [], 60)
+    gets = redis.gets
+
+    await cache.get("a")
+    await cache.get("c")
+    assert redis.gets == gets
+    await cache.get("b")
+    assert redis.gets == gets + 1
+    await cache.stop()
+
+
+class FakeSession(AsyncSession):
+    """Session of the primary returning the parents by a callback."""
+
+    def __init__(self, read) -> None:
+        super().__init__(bind=aengine)
+        self.read = read
+        self.reads = 0
+
+    async def scalar(self, stmt) -> ParentModel | None:
+        self.reads += 1
+        return await self.read()
+
+
+def get_parent() -> ParentModel:
+    return ParentModel(id=1, auth_id=2, name="Ann", surname="Lee")
+
+
+async def test_crud_reads_are_cached(redis):
+    crud = CRUD(ParentModel, cache=ReadThroughCache(redis, "c:", 10, 5))
+
+    async def read():
+        return get_parent()
+
+    db = FakeSession(read)
+    first = await crud.get(db, ParentModel.id == 1)
+    second = await crud.get(db, ParentModel.id == 1)
+    assert db.reads == 1
+    assert (second.id, second.name) == (first.id, first.name)
+
+    await crud.invalidate(1)
+    await crud.get(db, ParentModel.id == 1)
+    assert db.reads == 2
+
+
+async def test_cached_object_is_persistent(redis):
+    crud = CRUD(ParentModel, cache=ReadThroughCache(redis, "c:", 10, 5))
+
+    async def read():
+        return get_parent()
+
+    await crud.get(FakeSession(read), ParentModel.id == 1)
+    db = FakeSession(read)
+    parent = await crud.get(db, ParentModel.id == 1)
+
+    assert db.reads == 0
+    assert inspect(parent).persistent
+    # `save` updates the row instead of inserting it again
+    parent.name = "Kate"
+    db.add(parent)
+    assert not db.new and parent in db.dirty
+
+
+async def test_crud_doesnt_cache_read_racing_with_other_worker(redis):
+    crud = CRUD(ParentModel, cache=ReadThroughCache(redis, "c:", 10, 5))
+    other = CRUD(ParentModel, cache=ReadThroughCache(redis, "c:", 10, 5))
+
+    async def read():
+        # the row is read, then the other worker updates it
+        parent = get_parent()
+        await other.invalidate(parent.id)
+        return parent
+
+    db = FakeSession(read)
+    await crud.get(db, ParentModel.id == 1)
+    await crud.get(db, ParentModel.id == 1)
+
+    assert db.reads == 2
@@ -0,0 +1,211 @@
+import pytest
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.authentication import AuthModel
+from src.authentication.crud import auth_crud
+from src.config import Limits
+from src.core.enums import UserType
+
+from ..conftest import get_test_db
+
+COLUMNS = ("email", "password", "user_type", "is_active")
+# one row more than fits the bind parameters of one statement
+ROWS = Limits.MAX_BIND_PARAMS // len(COLUMNS) + 1
+
+
+def get_row(number: int, password: str = "hash") -> dict:
+    return {
+        "email": f"user_{number}@example.com",
+        "password": password,
+        "user_type": UserType.PARENT.value,
+        "is_active": False,
+    }
+
+
+@pytest.fixture
+async def db(clean_db) -> AsyncSession:
+    session = await anext(get_test_db())
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+@pytest.fixture
+def statements(db: AsyncSession, monkeypatch) -> list:
+    """Statements sent by `db.scalars`."""
+    executed = []
+    scalars = db.scalars
+
+    async def scalars_counted(stmt, *args, **kwargs):
+        executed.append(stmt)
+        return await scalars(stmt, *args, **kwargs)
+
+    monkeypatch.setattr(db, "scalars", scalars_counted)
+    return executed
+
+
+async def count(db: AsyncSession) -> int:
+    return await db.scalar(select(func.count()).select_from(AuthModel))
+
+
+async def insert_existing(db: AsyncSession, number: int) -> None:
+    await db.execute(insert(AuthModel), [get_row(number, "old")])
+    await db.commit()
+
+
+@pytest.mark.crud
+class TestCreateMany:
+    async def test_rows_over_bind_params_limit(
+        self, db: AsyncSession, statements: list
+    ):
+        existing = ROWS - 1  # in the second chunk
+        await insert_existing(db, existing)
+        rows = [get_row(i) for i in range(ROWS)] + [get_row(0)]
+
+        result = await auth_crud.create_many(
+            db, rows, unique=("email",), chunk_size=ROWS * 2
+        )
+
+        assert len(statements) == 2
+        assert len(result) == len(rows)
+        for row, (obj, err) in zip(rows[:existing], result):
+            assert err is None
+            assert obj.email == row["email"]
+        assert result[existing] == (None, "already exists")
+        # the same data twice, the second one is skipped
+        assert result[-1] == (None, "already exists")
+        assert await count(db) == ROWS
+
+    async def test_integrity_error_fails_every_row(self, db: AsyncSession):
+        rows = [get_row(i) for i in range(ROWS)]
+        rows[-1]["password"] = None
+
+        result = await auth_crud.create_many(
+            db, rows, unique=("email",), chunk_size=ROWS * 2
+        )
+
+        assert len(result) == ROWS
+        assert all(obj is None and err for obj, err in result)
+        # the first chunk is rolled back with the second one
+        assert await count(db) == 0
+
+
+@pytest.mark.crud
+class TestUpsertMany:
+    async def test_rows_over_bind_params_limit(
+        self, db: AsyncSession, statements: list
+    ):
+        existing = ROWS - 1  # in the second chunk
+        await insert_existing(db, existing)
+        rows = [get_row(i) for i in range(ROWS)] + [get_row(0, "last")]
+
+        result = await auth_crud.upsert_many(
+            db, rows, index_elements=("email",), chunk_size=ROWS * 2
+        )
+
+        # the duplicate is merged, the rows fit two statements
+        assert len(statements) == 2
+        assert [obj.email for obj in result] == [row["email"] for row in rows]
+        assert result[existing].password == "hash"
+        assert result[0] is result[-1]
+        assert result[0].password == "last"
+        assert await count(db) == ROWS
+        saved = await db.scalar(
+            select(AuthModel.password).where(
+                AuthModel.email == rows[existing]["email"]
+            )
+        )
+        assert saved == "hash"
+
+
+@pytest.fixture
+async def user(db: AsyncSession) -> AuthModel:
+    obj = AuthModel(**get_row(0))
+    db.add(obj)
+    await db.commit()
+    return obj
+
+
+@pytest.fixture
+def updates(db: AsyncSession, monkeypatch) -> list:
+    """Statements sent by `db.execute`."""
+    executed = []
+    execute = db.execute
+
+    async def execute_counted(stmt, *args, **kwargs):
+        executed.append(stmt)
+        return await execute(stmt, *args, **kwargs)
+
+    monkeypatch.setattr(db, "execute", execute_counted)
+    return executed
+
+
+@pytest.mark.crud
+class TestUpdate:
+    async def test_equal_values_are_not_written(
+        self, db: AsyncSession, user: AuthModel, updates: list
+    ):
+        obj, err = await auth_crud.update(
+            db, user, {"password": "hash", "is_active": False}
+        )
+
+        assert (obj, err) == (user, None)
+        assert updates == []
+
+    async def test_changed_value_is_written(
+        self, db: AsyncSession, user: AuthModel, updates: list
+    ):
+        # another request changed the row
+        await db.execute(
+            update(AuthModel)
+            .where(AuthModel.id == user.id)
+            .values(user_type=UserType.ADMIN.value)
+        )
+        await db.commit()
+
+        obj, err = await auth_crud.update(
+            db,
+            user,
+            {"password": "new", "is_active": False},
+            need_refresh=True,
+        )
+
+        assert err is None
+        assert obj.password == "new"
+        assert obj.user_type == UserType.ADMIN.value
+        assert len(updates) == 2
+        assert updates[-1].compile().params == {
+            "password": "new",
+            "id_1": user.id,
+        }
+        saved = await db.scalar(
+            select(AuthModel.password).where(AuthModel.id == user.id)
+        )
+        assert saved == "new"
+
+    async def test_expired_value_is_written(
+        self, db: AsyncSession, user: AuthModel, updates: list
+    ):
+        db.expire(user, ["password"])
+
+        obj, err = await auth_crud.update(db, user, {"password": "hash"})
+
+        assert err is None
+        assert len(updates) == 1
+        # set from the returned row without loading
+        assert obj.password == "hash"
+
+    async def test_unflushed_value_is_written(
+        self, db: AsyncSession, user: AuthModel, updates: list
+    ):
+        user.password = "new"
+
+        obj, err = await auth_crud.update(db, user, {"password": "new"})
+
+        assert err is None
+        assert len(updates) == 1
+        saved = await db.scalar(
+            select(AuthModel.password).where(AuthModel.id == user.id)
+        )
+        assert saved == "new"
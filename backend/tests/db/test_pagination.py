@@ -0,0 +1,25 @@
+from datetime import datetime
+
+import pytest
+from src.core.exceptions import BadRequestException
+from src.db.postgres.pagination import decode_cursor, encode_cursor
+
+
+class TestCursor:
+    def test_round_trip(self):
+        cursor = encode_cursor("id", 42, 42)
+        assert "=" not in cursor
+        assert decode_cursor(cursor, "id", int) == (42, 42)
+
+    def test_datetime_value(self):
+        value = datetime(2023, 4, 1, 12, 30)
+        cursor = encode_cursor("created_at", value, 7)
+        assert decode_cursor(cursor, "created_at", datetime) == (value, 7)
+
+    @pytest.mark.parametrize(
+        "cursor",
+        ("garbage", "", encode_cursor("name", "a", 1), "W10"),
+    )
+    def test_invalid_cursor(self, cursor):
+        with pytest.raises(BadRequestException):
+            decode_cursor(cursor, "id", int)
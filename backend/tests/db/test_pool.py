@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from src.config import settings
+from src.db.profiles import split_pool
+from src.server import configure_workers
+
+
+@pytest.mark.parametrize(
+    "pools,max_connections,pool_size,max_overflow,result",
+    [
+        (4, 100, None, None, (10, 10)),  # the profile fits
+        (4, 40, None, None, (10, 0)),
+        (8, 40, None, None, (5, 0)),
+        (4, 60, 5, 20, (5, 10)),
+        (16, 8, None, None, (1, 0)),  # at least one connection
+    ],
+)
+def test_split_pool(pools, max_connections, pool_size, max_overflow, result):
+    assert (
+        split_pool("prod", pools, max_connections, pool_size, max_overflow)
+        == result
+    )
+
+
+def test_workers_fit_default_budget(monkeypatch):
+    monkeypatch.setattr(settings, "db_profile", "prod")
+    monkeypatch.setattr(settings, "db_pool_size", None)
+    monkeypatch.setattr(settings, "db_max_overflow", None)
+    monkeypatch.setattr(settings, "postgres_replica_host", "replica")
+    configure_workers(8)
+
+    assert settings.db_pool_size >= 1
+    connections = settings.db_pool_size + settings.db_max_overflow
+    assert connections * 8 * 2 <= settings.db_max_connections
+
+
+# the engine is created once per process, so it is checked in a new one
+CHECK_ENGINE = """
+import sys
+from src.server import configure_workers
+configure_workers(16)
+assert "src.db.postgres" not in sys.modules
+from src.db.postgres.database import aengine
+print(aengine.pool.size(), aengine.pool._max_overflow)
+"""
+
+
+def test_engine_gets_worker_pool():
+    env = {**os.environ, "DB_PROFILE": "prod", "DB_MAX_CONNECTIONS": "90"}
+    env.pop("DB_POOL_SIZE", None)
+    env.pop("DB_MAX_OVERFLOW", None)
+    env.pop("POSTGRES_REPLICA_HOST", None)
+    result = subprocess.run(
+        [sys.executable, "-c", CHECK_ENGINE],
+        cwd=Path(__file__).parents[2],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert result.stdout.split() == ["5", "0"]
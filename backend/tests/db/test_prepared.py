@@ -0,0 +1,60 @@
+import pytest
+from asyncpg.exceptions import InvalidCachedStatementError
+from sqlalchemy import column, select, table, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.db.postgres.prepared import PreparedQuery
+
+from ..conftest import get_test_db
+
+TABLE = "prepared_test"
+
+
+@pytest.fixture
+async def db(databases_and_migrations) -> AsyncSession:
+    async with await anext(get_test_db()) as session:
+        await session.execute(text(f"CREATE TABLE {TABLE} (value int)"))
+        await session.execute(text(f"INSERT INTO {TABLE} VALUES (1)"))
+        await session.commit()
+    session = await anext(get_test_db())
+    try:
+        yield session
+    finally:
+        await session.close()
+        async with await anext(get_test_db()) as session:
+            await session.execute(text(f"DROP TABLE {TABLE}"))
+            await session.commit()
+
+
+@pytest.fixture
+def query() -> PreparedQuery:
+    return PreparedQuery("test", select(table(TABLE, column("value")).c.value))
+
+
+async def change_schema(db: AsyncSession) -> None:
+    await db.execute(text(f"ALTER TABLE {TABLE} ALTER value TYPE bigint"))
+
+
+@pytest.mark.crud
+class TestPreparedQuery:
+    async def test_changed_schema_is_prepared_again(
+        self, db: AsyncSession, query: PreparedQuery
+    ):
+        assert (await query.fetchrow(db))["value"] == 1
+        async with await anext(get_test_db()) as other_db:
+            await change_schema(other_db)
+            await other_db.commit()
+
+        # the connection of the session is not in a transaction
+        assert (await query.fetchrow(db))["value"] == 1
+
+    async def test_failed_transaction_is_not_retried(
+        self, db: AsyncSession, query: PreparedQuery
+    ):
+        assert (await query.fetchrow(db))["value"] == 1
+        await change_schema(db)
+
+        with pytest.raises(InvalidCachedStatementError):
+            await query.fetchrow(db)
+        await db.rollback()
+
+        assert (await query.fetchrow(db))["value"] == 1
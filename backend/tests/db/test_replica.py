@@ -0,0 +1,87 @@
+import pytest
+from src.db.postgres import replica
+from src.db.postgres.replica import ReplicaMonitor, get_read_db
+
+
+class FakeConnection:
+    def __init__(self, lag: float) -> None:
+        self.lag = lag
+
+    async def __aenter__(self) -> "FakeConnection":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        return None
+
+    async def scalar(self, stmt) -> float:
+        return self.lag
+
+
+class FakeEngine:
+    def __init__(self, lag: float) -> None:
+        self.lag = lag
+        self.checks = 0
+
+    def connect(self) -> FakeConnection:
+        self.checks += 1
+        return FakeConnection(self.lag)
+
+
+class FakeSessionMaker:
+    def __init__(self, target: str) -> None:
+        self.target = target
+
+    def __call__(self) -> "FakeSessionMaker":
+        return self
+
+    async def __aenter__(self) -> str:
+        return self.target
+
+    async def __aexit__(self, *args) -> None:
+        return None
+
+
+class FakeRequest:
+    def __init__(self) -> None:
+        self.scope = {}
+
+
+class TestReplicaMonitor:
+    async def test_lag_is_checked_once_in_check_time(self):
+        engine = FakeEngine(lag=0.5)
+        monitor = ReplicaMonitor(engine, max_lag=1, check_time=60)
+
+        assert await monitor.is_usable()
+        assert await monitor.is_usable()
+        assert engine.checks == 1
+
+    async def test_lagging_replica_is_not_usable(self):
+        monitor = ReplicaMonitor(FakeEngine(lag=5), max_lag=1, check_time=60)
+
+        assert not await monitor.is_usable()
+        assert monitor.lag == 5
+
+
+@pytest.mark.parametrize(
+    ("lag", "target"),
+    ((0.5, "replica"), (5, "primary")),
+)
+async def test_reads_of_lagging_replica_go_to_primary(
+    monkeypatch, lag, target
+):
+    monitor = ReplicaMonitor(FakeEngine(lag), max_lag=1, check_time=60)
+    monkeypatch.setattr(replica, "replica_monitor", monitor)
+    monkeypatch.setattr(
+        replica, "AReadSessionMaker", FakeSessionMaker("replica")
+    )
+    monkeypatch.setattr(replica, "ASessionMaker", FakeSessionMaker("primary"))
+    before = replica.READ_SESSIONS.labels(target)._value.get()
+
+    request = FakeRequest()
+    sessions = get_read_db(request)
+    session = await anext(sessions)
+    await sessions.aclose()
+
+    assert session == target
+    assert request.scope[replica.SESSIONS_SCOPE_KEY] == [target]
+    assert replica.READ_SESSIONS.labels(target)._value.get() == before + 1
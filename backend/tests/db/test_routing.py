@@ -0,0 +1,75 @@
+import pytest
+from fastapi import APIRouter, BackgroundTasks, Depends, FastAPI, Request
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from src.db.postgres import SessionRoute
+from src.db.postgres.database import SESSIONS_SCOPE_KEY
+
+
+class FakeSession:
+    def __init__(self) -> None:
+        self.closed = False
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+@pytest.fixture
+def sessions() -> list[FakeSession]:
+    return []
+
+
+@pytest.fixture
+def app(sessions: list[FakeSession]) -> FastAPI:
+    def get_session(request: Request) -> FakeSession:
+        session = FakeSession()
+        sessions.append(session)
+        request.scope.setdefault(SESSIONS_SCOPE_KEY, []).append(session)
+        return session
+
+    router = APIRouter(route_class=SessionRoute)
+
+    @router.get("/background")
+    async def background(
+        background_tasks: BackgroundTasks,
+        db: FakeSession = Depends(get_session),
+    ):
+        background_tasks.add_task(lambda: sessions.append(db.closed))
+        return "ok"
+
+    @router.get("/error")
+    async def error(db: FakeSession = Depends(get_session)):
+        raise RuntimeError("error")
+
+    @router.get("/stream")
+    async def stream(db: FakeSession = Depends(get_session)):
+        async def body():
+            for _ in range(2):
+                yield "closed" if db.closed else "open"
+
+        return StreamingResponse(body())
+
+    app = FastAPI()
+    app.include_router(router)
+    return app
+
+
+class TestSessionRoute:
+    def test_closed_before_background_tasks(self, app, sessions):
+        response = TestClient(app).get("/background")
+
+        assert response.status_code == 200
+        session, closed_in_task = sessions
+        assert closed_in_task is True
+
+    def test_closed_when_handler_raises(self, app, sessions):
+        with pytest.raises(RuntimeError):
+            TestClient(app).get("/error")
+
+        assert sessions[0].closed
+
+    def test_streaming_body_keeps_session(self, app, sessions):
+        response = TestClient(app).get("/stream")
+
+        assert response.text == "openopen"
+        assert sessions[0].closed
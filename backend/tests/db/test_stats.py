@@ -0,0 +1,47 @@
+import pytest
+from src.core.profiling import Profile, current_profile
+from src.db.postgres.stats import (
+    QueryLimitError,
+    QueryStats,
+    query_stats,
+    record_query,
+)
+
+
+class TestQueryStats:
+    def test_no_limits(self):
+        stats = QueryStats()
+        for _ in range(3):
+            stats.add("SELECT 1", 0.5)
+        assert stats.count == 3
+        assert stats.seconds == 1.5
+        stats.check(None, None)
+
+    def test_max_queries(self):
+        stats = QueryStats()
+        stats.add("SELECT 1", 0)
+        stats.add("SELECT 2", 0)
+        stats.check(2, None)
+        with pytest.raises(QueryLimitError):
+            stats.check(1, None)
+
+    def test_max_repeats(self):
+        stats = QueryStats()
+        stats.add("SELECT 1", 0)
+        stats.add("SELECT 2", 0)
+        stats.check(None, 1)
+        stats.add("SELECT 1", 0)
+        with pytest.raises(QueryLimitError, match="repeated 2 times"):
+            stats.check(None, 1)
+
+
+def test_driver_query_is_recorded():
+    stats, profile = QueryStats(), Profile("1", "GET", "/", max_spans=10)
+    stats_token = query_stats.set(stats)
+    profile_token = current_profile.set(profile)
+    record_query("SELECT 1", 0.5)
+    current_profile.reset(profile_token)
+    query_stats.reset(stats_token)
+
+    assert stats.statements == {"SELECT 1": 1}
+    assert profile.spans[0][:2] == ("sql", "SELECT 1")
@@ -83,7 +83,7 @@ class TestAddresses(Values):
     )
 
 
-@pytest.fixture(scope="module", autouse=True)
+@pytest.fixture(scope="package", autouse=True)
 async def set_addresses(databases_and_migrations):
     """Set test addresses for the test database."""
     db = await anext(get_test_db())
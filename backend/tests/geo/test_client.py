@@ -0,0 +1,110 @@
+import asyncio
+from time import sleep
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from src.core.exceptions import ServiceUnavailableException
+from src.geo.client import CircuitBreaker, GeocoderClient
+
+
+class TestCircuitBreaker:
+    def test_opens_after_failures(self):
+        breaker = CircuitBreaker(failures=2, reset_time=60)
+        breaker.before_call()
+        breaker.failure()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+        breaker.before_call()
+        breaker.failure()
+        assert breaker.state == CircuitBreaker.OPEN
+
+        with pytest.raises(ServiceUnavailableException) as exc:
+            breaker.before_call()
+        assert exc.value.headers["Retry-After"] == "60"
+
+    def test_success_resets_failures(self):
+        breaker = CircuitBreaker(failures=2, reset_time=60)
+        breaker.failure()
+        breaker.success()
+        breaker.failure()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_trial_call(self):
+        breaker = CircuitBreaker(failures=1, reset_time=0.1)
+        breaker.failure()
+        sleep(0.1)
+
+        breaker.before_call()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        # only one trial call at the same time
+        with pytest.raises(ServiceUnavailableException):
+            breaker.before_call()
+
+        breaker.failure()
+        assert breaker.state == CircuitBreaker.OPEN
+
+        sleep(0.1)
+        breaker.before_call()
+        breaker.success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_lost_trial_call_is_replaced(self):
+        breaker = CircuitBreaker(failures=1, reset_time=0.1)
+        breaker.failure()
+        sleep(0.1)
+        breaker.before_call()
+        # the trial call ended without success or failure
+        sleep(0.1)
+
+        breaker.before_call()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    def test_cancelled_trial_call_is_replaced_at_once(self):
+        breaker = CircuitBreaker(failures=1, reset_time=0.1)
+        breaker.failure()
+        sleep(0.1)
+        breaker.before_call()
+        breaker.cancel()
+
+        breaker.before_call()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+class TestGeocoderClient:
+    async def test_broken_body_is_failure(self):
+        async def broken_json(request: web.Request) -> web.Response:
+            return web.Response(text="{", content_type="application/json")
+
+        app = web.Application()
+        app.router.add_get("/", broken_json)
+        breaker = CircuitBreaker(failures=1, reset_time=60)
+        client = GeocoderClient(timeout=5, connections=1, breaker=breaker)
+        async with TestServer(app) as server:
+            with pytest.raises(ValueError):
+                await client.get_json(str(server.make_url("/")))
+        await client.close()
+
+        assert breaker.state == CircuitBreaker.OPEN
+
+    async def test_cancelled_calls_are_not_failures(self):
+        async def slow(request: web.Request) -> web.Response:
+            await asyncio.sleep(10)
+            return web.json_response({})
+
+        app = web.Application()
+        app.router.add_get("/", slow)
+        breaker = CircuitBreaker(failures=2, reset_time=60)
+        client = GeocoderClient(timeout=5, connections=5, breaker=breaker)
+        async with TestServer(app) as server:
+            for _ in range(5):
+                task = asyncio.create_task(
+                    client.get_json(str(server.make_url("/")))
+                )
+                await asyncio.sleep(0.05)
+                task.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await task
+        await client.close()
+
+        assert breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,140 @@
+import asyncio
+
+import pytest
+from sqlalchemy import Integer, delete, func, literal, select
+from src.core.exceptions import BadRequestException, ServerError
+from src.geo import AddressModel, AddressScheme, PhoneModel, address_crud
+from src.geo.crud import AddressCRUD
+from src.geo.gazetteer import gazetteer
+from tests.conftest import get_test_db
+from tests.geo.conftest import TestCities, TestCountries
+
+PHONE = 79990000001
+
+
+def get_address(building: str, phones: list[int] | None = None):
+    return AddressScheme(
+        country=TestCountries.country_1.name,
+        city=TestCities.city_1_0_0_1.name,
+        street="TestStreet_crud",
+        building=building,
+        phones=phones,
+    )
+
+
+async def save(db, address: AddressScheme):
+    full_address = await address_crud.get_full_address(db, address)
+    return await address_crud.flush_new_address(db, address, full_address)
+
+
+async def count(db, model) -> int:
+    return await db.scalar(select(func.count()).select_from(model))
+
+
+@pytest.fixture
+async def db():
+    session = await anext(get_test_db())
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+@pytest.fixture(autouse=True)
+async def valid_address(monkeypatch):
+    """The geocoder agrees with the user, the new rows are removed."""
+
+    async def as_is(address: AddressScheme) -> AddressScheme:
+        return address
+
+    monkeypatch.setattr("src.geo.crud.get_valid_address", as_is)
+    gazetteer.clear()
+    yield
+    async with await anext(get_test_db()) as db:
+        await db.execute(
+            delete(AddressModel).where(AddressModel.building.like("crud%"))
+        )
+        await db.commit()
+
+
+@pytest.mark.crud
+async def test_new_address_is_inserted(db):
+    saved = await save(db, get_address("crud 1", [PHONE]))
+    await db.commit()
+
+    assert saved.street.id is not None
+    assert saved.address.street_id == saved.street.id
+    phone = await db.scalar(
+        select(PhoneModel).where(PhoneModel.number == PHONE)
+    )
+    assert phone.address_id == saved.address.id
+
+
+@pytest.mark.crud
+async def test_existing_address_id_is_returned(db):
+    address = get_address("crud 2", [PHONE])
+    # both requests didn't find the address before saving it
+    full_address = await address_crud.get_full_address(db, address)
+    first = await address_crud.flush_new_address(db, address, full_address)
+    addresses = await count(db, AddressModel)
+    second = await address_crud.flush_new_address(db, address, full_address)
+    await db.commit()
+
+    assert second.address.id == first.address.id
+    assert second.street.id == first.street.id
+    assert await count(db, AddressModel) == addresses
+
+
+@pytest.mark.crud
+async def test_phone_of_other_address_is_busy(db):
+    first = await save(db, get_address("crud 3", [PHONE]))
+    await db.commit()
+    first_id = first.address.id
+
+    with pytest.raises(BadRequestException) as exc:
+        await save(db, get_address("crud 4", [PHONE + 1, PHONE]))
+    await db.rollback()
+
+    assert str(PHONE) in exc.value.detail
+    phone = await db.scalar(
+        select(PhoneModel).where(PhoneModel.number == PHONE)
+    )
+    assert phone.address_id == first_id
+
+
+@pytest.mark.crud
+async def test_concurrent_requests_get_same_address(db):
+    address = get_address("crud 5")
+    first = await save(db, address)
+
+    async with await anext(get_test_db()) as other_db:
+        # the second insert waits for the uncommitted row of the first one
+        task = asyncio.create_task(save(other_db, address))
+        await asyncio.sleep(0.2)
+        assert not task.done()
+        await db.commit()
+        second = await task
+        await other_db.commit()
+
+    assert second.address.id == first.address.id
+
+
+@pytest.mark.crud
+async def test_address_not_found_after_retry(db, monkeypatch):
+    # a concurrent request inserted the row and then deleted it
+    statement = select(literal(None, Integer).label("address_id"))
+    monkeypatch.setattr(
+        AddressCRUD, "_AddressCRUD__upsert_statement", lambda *_: statement
+    )
+    executed = []
+    execute = db.execute
+
+    async def execute_counted(stmt, *args, **kwargs):
+        executed.append(stmt)
+        return await execute(stmt, *args, **kwargs)
+
+    monkeypatch.setattr(db, "execute", execute_counted)
+
+    with pytest.raises(ServerError):
+        await save(db, get_address("crud 6"))
+    assert executed.count(statement) == 2
@@ -0,0 +1,78 @@
+from src.core.enums import Countries
+from src.geo import (
+    AddressScheme,
+    CityModel,
+    CountryModel,
+    DistrictModel,
+    RegionModel,
+    StreetModel,
+)
+from src.geo.gazetteer import Gazetteer
+
+
+def get_gazetteer() -> Gazetteer:
+    gazetteer = Gazetteer()
+    gazetteer.add(
+        CountryModel(id=1, name=Countries.RUSSIA),
+        RegionModel(id=1, name="Region", country_id=1),
+        DistrictModel(id=1, name="District", region_id=1),
+        CityModel(id=1, name="City", country_id=1),
+        CityModel(id=2, name="City", country_id=1, region_id=1),
+        CityModel(id=3, name="City", country_id=1, region_id=1, district_id=1),
+        StreetModel(id=1, name="Street", city_id=3),
+    )
+    return gazetteer
+
+
+class TestGazetteer:
+    def test_resolve(self):
+        gazetteer = get_gazetteer()
+
+        full_address = gazetteer.resolve(
+            AddressScheme(
+                region="Region",
+                district="District",
+                city="City",
+                street="Street",
+                building="1",
+            )
+        )
+        assert full_address.country.id == 1
+        assert full_address.region.id == 1
+        assert full_address.district.id == 1
+        assert full_address.city.id == 3
+        assert full_address.street.id == 1
+        assert full_address.address is None
+
+        full_address = gazetteer.resolve(
+            AddressScheme(region="Region", city="City")
+        )
+        assert full_address.district is None
+        assert full_address.city.id in (2, 3)
+
+    def test_miss(self):
+        gazetteer = get_gazetteer()
+
+        assert gazetteer.resolve(AddressScheme(city="Unknown")) is None
+        assert (
+            gazetteer.resolve(AddressScheme(region="Unknown", city="City"))
+            is None
+        )
+        assert (
+            gazetteer.resolve(AddressScheme(city="City", street="Unknown"))
+            is None
+        )
+        assert gazetteer.stats()["misses"] == 3
+        assert gazetteer.stats()["hit_rate"] == 0
+
+    def test_stats(self):
+        gazetteer = get_gazetteer()
+        memory = gazetteer.memory_usage()
+        gazetteer.add(CityModel(id=1, name="City", country_id=1))
+        assert gazetteer.memory_usage() == memory
+
+        gazetteer.resolve(AddressScheme(city="City"))
+        stats = gazetteer.stats()
+        assert stats["hit_rate"] == 1
+        assert stats["entries"]["city"] == 3
+        assert stats["memory_bytes"] == memory
@@ -61,7 +61,15 @@ from tests.geo.conftest import (
         (
             AddressModel,
             TableNames.ADDRESS,
-            {"id", "city_id", "street_id", "building", "adds", "office"},
+            {
+                "id",
+                "city_id",
+                "street_id",
+                "building",
+                "adds",
+                "office",
+                "fingerprint",
+            },
         ),
     ],
 )
@@ -0,0 +1,51 @@
+from src.core.enums import Countries
+from src.geo import (
+    AddressScheme,
+    CityModel,
+    CountryModel,
+    RegionModel,
+    StreetModel,
+)
+from src.geo.utils import FullAddress, get_fingerprint
+
+
+def get_full_address(region: RegionModel | None) -> FullAddress:
+    return FullAddress(
+        CountryModel(id=1, name=Countries.RUSSIA),
+        region,
+        None,
+        CityModel(id=1, name="Town", country_id=1, region_id=1),
+        StreetModel(id=1, name="Main", city_id=1),
+        None,
+    )
+
+
+class TestFingerprint:
+    def test_building_case_and_spaces_are_ignored(self):
+        full_address = get_full_address(RegionModel(id=1, name="Region"))
+        address = AddressScheme(
+            country=Countries.RUSSIA, city="Town", building="12A"
+        )
+
+        assert get_fingerprint(full_address, address) == get_fingerprint(
+            full_address, address.copy(update={"building": " 12a "})
+        )
+
+    def test_names_of_found_objects_are_used(self):
+        # the request without the region finds the same address
+        full_address = get_full_address(RegionModel(id=1, name="Region"))
+        address = AddressScheme(
+            country=Countries.RUSSIA, city="Town", building="1"
+        )
+        with_region = address.copy(update={"region": "region"})
+
+        assert get_fingerprint(full_address, address) == get_fingerprint(
+            full_address, with_region
+        )
+
+    def test_unknown_region_of_city(self):
+        address = AddressScheme(
+            country=Countries.RUSSIA, city="Town", building="1"
+        )
+
+        assert get_fingerprint(get_full_address(None), address) is None
@@ -0,0 +1,130 @@
+import asyncio
+from email import message_from_bytes
+from smtplib import SMTPAuthenticationError
+
+import pytest
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult, Envelope
+from prometheus_client import REGISTRY
+from pydantic import SecretStr
+from src.mail import MailDispatcher
+
+SMTP_HOST = "127.0.0.1"
+SMTP_PORT = 28025
+SMTP_USER = "sender@gmail.com"
+SMTP_PASSWORD = "app_key"
+
+
+class Handler:
+    def __init__(self) -> None:
+        self.envelopes: list[Envelope] = []
+        self.logins = 0
+
+    async def handle_DATA(self, server, session, envelope: Envelope) -> str:
+        self.envelopes.append(envelope)
+        return "250 OK"
+
+    def authenticator(self, server, session, envelope, mechanism, auth_data):
+        self.logins += 1
+        return AuthResult(
+            success=(
+                auth_data.login.decode() == SMTP_USER
+                and auth_data.password.decode() == SMTP_PASSWORD
+            )
+        )
+
+
+@pytest.fixture
+def smtp_server() -> Handler:
+    handler = Handler()
+    controller = Controller(
+        handler,
+        hostname=SMTP_HOST,
+        port=SMTP_PORT,
+        authenticator=handler.authenticator,
+        auth_require_tls=False,
+    )
+    controller.start()
+    yield handler
+    controller.stop()
+
+
+def get_dispatcher(
+    workers: int = 1,
+    password: str = SMTP_PASSWORD,
+) -> MailDispatcher:
+    return MailDispatcher(
+        smtp_host=SMTP_HOST,
+        smtp_port=SMTP_PORT,
+        from_addr=SMTP_USER,
+        smtp_password=SecretStr(password),
+        use_ssl=False,
+        workers=workers,
+    )
+
+
+class TestMailDispatcher:
+    async def test_connection_is_reused(self, smtp_server: Handler):
+        dispatcher = get_dispatcher()
+        await dispatcher.start()
+        recipients = [f"user_{i}@example.com" for i in range(5)]
+        for recipient in recipients:
+            await dispatcher.send_confirm_email(recipient, "http://link")
+        await dispatcher.stop()
+
+        assert not dispatcher.is_running
+        assert smtp_server.logins == 1
+        assert [e.rcpt_tos[0] for e in smtp_server.envelopes] == recipients
+        msg = message_from_bytes(smtp_server.envelopes[0].content)
+        assert msg["From"] == SMTP_USER
+        assert "http://link" in msg.get_payload()[0].get_payload()
+
+    async def test_unavailable_server(self):
+        dispatcher = get_dispatcher()
+        await dispatcher.send_confirm_email("user@example.com", "http://link")
+        # the error doesn't break the worker
+        await dispatcher.stop()
+        assert not dispatcher.is_running
+
+    async def test_rest_of_batch_fails_on_wrong_password(
+        self, monkeypatch: pytest.MonkeyPatch
+    ):
+        dispatcher = get_dispatcher()
+        failed = REGISTRY.get_sample_value(
+            "mail_sent_total", {"result": "failed"}
+        )
+
+        def wrong_password():
+            raise SMTPAuthenticationError(535, b"wrong password")
+
+        monkeypatch.setattr(
+            dispatcher, "_MailDispatcher__connect", wrong_password
+        )
+        for i in range(3):
+            await dispatcher.send_confirm_email(f"user_{i}@example.com", "")
+        await dispatcher.stop()
+
+        assert (
+            REGISTRY.get_sample_value("mail_sent_total", {"result": "failed"})
+            == (failed or 0) + 3
+        )
+
+    async def test_unexpected_error_doesnt_stop_worker(
+        self, smtp_server: Handler, monkeypatch: pytest.MonkeyPatch
+    ):
+        dispatcher = get_dispatcher()
+
+        def broken_batch(connection, batch):
+            raise RuntimeError("unexpected")
+
+        monkeypatch.setattr(
+            dispatcher, "_MailDispatcher__send_batch", broken_batch
+        )
+        await dispatcher.send_confirm_email("user@example.com", "")
+        await asyncio.sleep(0.1)
+        assert dispatcher.is_running
+
+        monkeypatch.undo()
+        await dispatcher.send_confirm_email("user@example.com", "")
+        await dispatcher.stop()
+        assert len(smtp_server.envelopes) == 1